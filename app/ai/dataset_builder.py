@@ -24,7 +24,9 @@ def build_dataset(limit=500):
             label = 0
         else:
             label = 1 if pred["risk_level"] in ["WARNING", "IMMINENT"] else 0
-        src = image_doc["filepath"]
+        src = image_doc.get("filepath")
+        if not src:
+            continue
         dst = f"{DATASET_DIR}/{label}/{os.path.basename(src)}"
 
         if os.path.exists(src) and not os.path.exists(dst):
@@ -1,12 +1,23 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
 import torch
 from torchvision import transforms, models
 from PIL import Image
 import torch.nn.functional as F
-import threading
+
+from app.utils.frame import CameraFrame
 
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 MODEL_PATH = "polaris_cnn.pth"
 
+# Micro-batching: frames arriving within the window share one forward pass.
+CNN_BATCH_WINDOW_MS = max(0, int(os.getenv("POLARIS_CNN_BATCH_WINDOW_MS", "15")))
+CNN_MAX_BATCH_SIZE = max(1, int(os.getenv("POLARIS_CNN_MAX_BATCH_SIZE", "16")))
+
 _model_lock = threading.Lock()
 _model = None
 
@@ -36,14 +47,133 @@ transform = transforms.Compose([
     transforms.ToTensor()
 ])
 
-def ai_predict(image_path):
+
+def _prepare_tensor(image_source):
+    if isinstance(image_source, CameraFrame):
+        img = Image.fromarray(image_source.rgb)
+    else:
+        img = Image.open(image_source).convert("RGB")
+    return transform(img)
+
+
+def _predict_tensors(tensors):
+    """
+    Runs one forward pass over a stack of preprocessed images and
+    returns the HIGH RISK probability for each of them.
+    """
     _ensure_model_loaded()
-    img = Image.open(image_path).convert("RGB")
-    tensor = transform(img).unsqueeze(0).to(DEVICE)
+    batch = torch.stack(tensors).to(DEVICE)
 
     with _model_lock:
         with torch.no_grad():
-            output = _model(tensor)
+            output = _model(batch)
             probs = F.softmax(output, dim=1)
 
-    return float(probs[0][1])  # probability of HIGH RISK
+    return [float(p) for p in probs[:, 1].tolist()]
+
+
+class CnnBatcher:
+    """
+    Collects pending frames for a short window (or until max_batch_size
+    frames are waiting) and resolves each caller's future from a single
+    batched forward pass.
+    """
+
+    def __init__(self, window_ms: int = CNN_BATCH_WINDOW_MS, max_batch_size: int = CNN_MAX_BATCH_SIZE):
+        self.window_seconds = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {"batches": 0, "frames": 0, "largest_batch": 0}
+
+    def submit(self, tensor) -> Future:
+        future = Future()
+        self._ensure_started()
+        self._queue.put((tensor, future))
+        return future
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = self._stats.copy()
+        stats["pending"] = self._queue.qsize()
+        stats["window_ms"] = int(self.window_seconds * 1000)
+        stats["max_batch_size"] = self.max_batch_size
+        return stats
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    daemon=True,
+                    name="cnn-batcher",
+                )
+                self._thread.start()
+
+    def _collect_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window_seconds
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            live = [(tensor, future) for tensor, future in batch if future.set_running_or_notify_cancel()]
+            if not live:
+                continue
+
+            try:
+                probabilities = _predict_tensors([tensor for tensor, _ in live])
+            except Exception as exc:
+                for _, future in live:
+                    future.set_exception(exc)
+                continue
+
+            with self._stats_lock:
+                self._stats["batches"] += 1
+                self._stats["frames"] += len(live)
+                self._stats["largest_batch"] = max(self._stats["largest_batch"], len(live))
+
+            for (_, future), probability in zip(live, probabilities):
+                future.set_result(probability)
+
+
+_batcher = CnnBatcher()
+
+
+def ai_predict_future(image_source) -> Future:
+    """
+    Queues an image (path or CameraFrame) for batched CNN inference.
+    The returned future resolves to the probability of HIGH RISK.
+    """
+    tensor = _prepare_tensor(image_source)
+    if CNN_MAX_BATCH_SIZE == 1:
+        future = Future()
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(_predict_tensors([tensor])[0])
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+    return _batcher.submit(tensor)
+
+
+def ai_predict(image_source):
+    return ai_predict_future(image_source).result()  # probability of HIGH RISK
+
+
+def get_cnn_batching_stats() -> dict:
+    return _batcher.stats()
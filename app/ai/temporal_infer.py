@@ -1,3 +1,4 @@
+import os
 import torch
 import torch.nn as nn
 import numpy as np
@@ -6,6 +7,9 @@ import threading
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 MODEL_PATH = "polaris_lstm.pth"
 
+# Streaming mode re-runs the full window every N frames to bound drift.
+TEMPORAL_RESYNC_STEPS = max(1, int(os.getenv("POLARIS_TEMPORAL_RESYNC_STEPS", "20")))
+
 class TemporalLSTM(nn.Module):
     def __init__(self):
         super().__init__()
@@ -13,13 +17,22 @@ class TemporalLSTM(nn.Module):
         self.fc = nn.Linear(32, 2)
 
     def forward(self, x):
-        _, (h_n, _) = self.lstm(x)
-        return self.fc(h_n[-1])
+        logits, _ = self.forward_with_state(x)
+        return logits
+
+    def forward_with_state(self, x, state=None):
+        _, (h_n, c_n) = self.lstm(x, state)
+        return self.fc(h_n[-1]), (h_n, c_n)
 
 
 _model_lock = threading.Lock()
 _model = None
 
+# camera_id -> {"model": ..., "state": (h, c), "steps": frames since resync}
+_stream_states = {}
+_camera_locks_guard = threading.Lock()
+_camera_locks = {}
+
 
 def reload_temporal_model():
     global _model
@@ -35,9 +48,13 @@ def _ensure_model_loaded():
     if _model is None:
         reload_temporal_model()
 
+def _to_batch(sequence):
+    return torch.from_numpy(np.asarray(sequence, dtype=np.float32)).unsqueeze(0).to(DEVICE)
+
+
 def temporal_predict(sequence):
     _ensure_model_loaded()
-    seq = torch.tensor(sequence, dtype=torch.float32).unsqueeze(0).to(DEVICE)
+    seq = _to_batch(sequence)
 
     with _model_lock:
         with torch.no_grad():
@@ -45,3 +62,53 @@ def temporal_predict(sequence):
             probs = torch.softmax(out, dim=1)
 
     return float(probs[0][1])
+
+
+def temporal_stream_lock(camera_id):
+    """
+    Orders one camera's streaming steps. Hold it from recording the frame
+    until temporal_predict_streaming returns, so concurrent frames from a
+    camera each advance the state once, in the order their windows end.
+    """
+    with _camera_locks_guard:
+        return _camera_locks.setdefault(camera_id, threading.RLock())
+
+
+def temporal_predict_streaming(camera_id, sequence):
+    """
+    Stateful variant of temporal_predict for a live camera.
+    `sequence` is the camera's full window with the newest frame last.
+    The cached (h, c) is advanced by that newest frame only; the full
+    window is replayed on first use, after a model reload, and every
+    TEMPORAL_RESYNC_STEPS frames.
+    """
+    _ensure_model_loaded()
+
+    with temporal_stream_lock(camera_id), _model_lock:
+        entry = _stream_states.get(camera_id)
+        resync = (
+            entry is None
+            or entry["model"] is not _model
+            or entry["steps"] >= TEMPORAL_RESYNC_STEPS
+        )
+        seq = _to_batch(sequence if resync else sequence[-1:])
+
+        with torch.no_grad():
+            out, state = _model.forward_with_state(seq, None if resync else entry["state"])
+            probs = torch.softmax(out, dim=1)
+
+        _stream_states[camera_id] = {
+            "model": _model,
+            "state": state,
+            "steps": 0 if resync else entry["steps"] + 1,
+        }
+
+    return float(probs[0][1])
+
+
+def reset_temporal_stream(camera_id=None):
+    with _model_lock:
+        if camera_id is None:
+            _stream_states.clear()
+        else:
+            _stream_states.pop(camera_id, None)
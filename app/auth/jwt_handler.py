@@ -59,6 +59,22 @@ def verify_jwt(
     return payload
 
 
+def role_from_token(token: str | None) -> str | None:
+    """
+    Role claim of a bearer token, or None when it is missing or invalid.
+    For transports that cannot use the HTTPBearer dependency (WebSocket,
+    EventSource query strings).
+    """
+    if not token:
+        return None
+    settings = get_settings()
+    try:
+        payload = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
+    except JWTError:
+        return None
+    return str(payload.get("role") or "").strip().lower() or None
+
+
 def require_roles(*roles: str):
     allowed_roles = {role.strip().lower() for role in roles if role.strip()}
 
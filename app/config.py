@@ -62,6 +62,8 @@ class PolarisSettings:
     max_upload_bytes: int
     camera_upload_dir: Path
     citizen_upload_dir: Path
+    persist_camera_frames: bool
+    audit_query_plans: bool
     enable_debug_endpoints: bool
     enable_test_alert_endpoints: bool
     authority_username: str | None
@@ -156,6 +158,8 @@ def get_settings() -> PolarisSettings:
         max_upload_bytes=_get_int("POLARIS_MAX_UPLOAD_BYTES", 5 * 1024 * 1024, minimum=1024),
         camera_upload_dir=upload_root,
         citizen_upload_dir=upload_root / "citizen",
+        persist_camera_frames=_get_bool("POLARIS_PERSIST_CAMERA_FRAMES", True),
+        audit_query_plans=_get_bool("POLARIS_AUDIT_QUERY_PLANS", False),
         enable_debug_endpoints=_get_bool("POLARIS_ENABLE_DEBUG_ENDPOINTS", debug_default),
         enable_test_alert_endpoints=_get_bool(
             "POLARIS_ENABLE_TEST_ALERT_ENDPOINTS",
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pymongo import MongoClient
 
 from app.config import get_settings
@@ -29,6 +31,7 @@ active_learning_collection = db["active_learning_samples"]
 help_requests_collection = db["help_requests"]
 rescue_teams_collection = db["rescue_teams"]
 team_notifications_collection = db["team_notifications"]
+prediction_rollups_collection = db["prediction_rollups"]
 
 
 def ensure_database_connection():
@@ -42,6 +45,18 @@ def ensure_safezone_indexes():
     safezones_collection.create_index(
         [("active", 1), ("confidence_level", 1)]
     )
+    # Diffed and updated by zone_id in the scheduled safe-zone job.
+    safezones_collection.create_index(
+        [("zone_id", 1)]
+    )
+    safezones_collection.create_index(
+        [("source", 1), ("active", 1)]
+    )
+    # Map viewport and tile queries.
+    backfill_geo_locations(safezones_collection)
+    safezones_collection.create_index(
+        [("location", "2dsphere")]
+    )
 
 
 def ensure_active_learning_indexes():
@@ -62,6 +77,42 @@ def ensure_fcm_token_indexes():
     fcm_tokens_collection.create_index(
         [("active", 1), ("updated_at", -1)]
     )
+    # Covers the _id-keyed paging over active tokens in send_push_fcm.
+    fcm_tokens_collection.create_index(
+        [("active", 1), ("_id", 1), ("token", 1)]
+    )
+
+
+def geo_point(lat, lng) -> dict | None:
+    """
+    GeoJSON point for a 2dsphere index (note: [lng, lat] order), or None
+    when either coordinate is missing or out of range (Mongo rejects such
+    points on insert into a 2dsphere-indexed field).
+    """
+    if lat is None or lng is None:
+        return None
+    lat, lng = float(lat), float(lng)
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return {"type": "Point", "coordinates": [lng, lat]}
+
+
+def backfill_geo_locations(collection) -> int:
+    """
+    Sets `location` from the legacy lat/lng fields on documents written
+    before it existed. Documents without valid numeric coordinates are
+    left alone, since the 2dsphere index skips a missing field but fails
+    to build over an out-of-range point.
+    """
+    result = collection.update_many(
+        {
+            "location": {"$exists": False},
+            "lat": {"$type": "number", "$gte": -90, "$lte": 90},
+            "lng": {"$type": "number", "$gte": -180, "$lte": 180},
+        },
+        [{"$set": {"location": {"type": "Point", "coordinates": ["$lng", "$lat"]}}}],
+    )
+    return result.modified_count
 
 
 def ensure_help_request_indexes():
@@ -71,6 +122,10 @@ def ensure_help_request_indexes():
     help_requests_collection.create_index(
         [("assigned_team_id", 1), ("status", 1)]
     )
+    backfill_geo_locations(help_requests_collection)
+    help_requests_collection.create_index(
+        [("location", "2dsphere")]
+    )
 
 
 def ensure_rescue_team_indexes():
@@ -81,6 +136,18 @@ def ensure_rescue_team_indexes():
     rescue_teams_collection.create_index(
         [("status", 1), ("updated_at", -1)]
     )
+    # Backs the $geoNear lookup in notify_nearby_teams.
+    backfill_geo_locations(rescue_teams_collection)
+    rescue_teams_collection.create_index(
+        [("location", "2dsphere"), ("status", 1)]
+    )
+
+
+def ensure_historical_event_indexes():
+    backfill_geo_locations(historical_events_collection)
+    historical_events_collection.create_index(
+        [("location", "2dsphere")]
+    )
 
 
 def ensure_team_notification_indexes():
@@ -90,3 +157,135 @@ def ensure_team_notification_indexes():
     team_notifications_collection.create_index(
         [("team_id", 1), ("created_at", -1)]
     )
+
+
+# Indexes behind the per-frame, dashboard and alert-dispatch queries,
+# by collection name. Entries are index keys, or (keys, create_index
+# options). Created at startup by ensure_hot_path_indexes().
+HOT_PATH_INDEXES = {
+    "predictions": [
+        [("timestamp", -1)],
+        # Map tiles and viewport queries over recent located predictions.
+        [("location", "2dsphere"), ("timestamp", -1)],
+    ],
+    "alerts": [
+        [("timestamp", -1)],
+        [("severity", 1), ("timestamp", -1)],
+        [("source", 1), ("timestamp", -1)],
+        [("status", 1), ("timestamp", -1)],
+        # Outbox claim order, and recovery of expired leases.
+        [("status", 1), ("priority", -1), ("next_attempt_at", 1)],
+        [("status", 1), ("lease_expires_at", 1)],
+        [("dedup_key", 1), ("timestamp", -1)],
+    ],
+    "feedback": [
+        [("timestamp", -1)],
+    ],
+    "citizen_reports": [
+        [("zone_id", 1), ("type", 1), ("timestamp", -1)],
+        [("verified", 1), ("timestamp", -1)],
+    ],
+    "overrides": [
+        [("active", 1), ("timestamp", -1)],
+        [("timestamp", -1)],
+    ],
+    "prediction_rollups": [
+        ([("resolution", 1), ("bucket_start", 1)], {"unique": True}),
+        ([("expires_at", 1)], {"expireAfterSeconds": 0}),
+    ],
+}
+
+
+def _hot_queries(now):
+    """
+    (name, collection, filter, sort) for every hot query, as issued by
+    the code paths that run per frame, per dashboard poll or per alert.
+    """
+    return [
+        ("latest prediction", "predictions", {}, [("timestamp", -1)]),
+        ("prediction history", "predictions", {"timestamp": {"$gte": now}}, [("timestamp", 1)]),
+        ("latest alert", "alerts", {}, [("timestamp", -1)]),
+        ("alert history by severity", "alerts", {"severity": "ALERT"}, [("timestamp", -1)]),
+        ("latest manual override alert", "alerts", {"source": "MANUAL_OVERRIDE"}, [("timestamp", -1)]),
+        ("alerts by status", "alerts", {"status": "failed"}, [("timestamp", -1)]),
+        ("alert dedup lookup", "alerts", {"dedup_key": "x", "timestamp": {"$gte": now}}, [("timestamp", -1)]),
+        (
+            "outbox claim",
+            "alerts",
+            {
+                "$or": [
+                    {"status": "queued", "next_attempt_at": {"$lte": now}},
+                    {"status": "sending", "lease_expires_at": {"$lte": now}},
+                ]
+            },
+            [("priority", -1), ("next_attempt_at", 1)],
+        ),
+        ("feedback window", "feedback", {}, [("timestamp", -1)]),
+        (
+            "zone water signal",
+            "citizen_reports",
+            {"zone_id": "TEST_ZONE", "type": {"$in": ["WATER_LEVEL", "FLOODING"]}, "timestamp": {"$gte": now}},
+            None,
+        ),
+        ("unverified citizen reports", "citizen_reports", {"verified": False}, [("timestamp", -1)]),
+        ("active override", "overrides", {"active": True}, [("timestamp", -1)]),
+        ("override history", "overrides", {}, [("timestamp", -1)]),
+        (
+            "live-risk map tile",
+            "predictions",
+            {
+                "location": {"$geoWithin": {"$geometry": {
+                    "type": "Polygon",
+                    "coordinates": [[[72.8, 19.0], [73.0, 19.0], [73.0, 19.2], [72.8, 19.2], [72.8, 19.0]]],
+                }}},
+                "timestamp": {"$gte": now},
+            },
+            None,
+        ),
+        (
+            "timeseries rollup",
+            "prediction_rollups",
+            {"resolution": "minute", "bucket_start": {"$gte": now}},
+            [("bucket_start", 1)],
+        ),
+    ]
+
+
+def ensure_hot_path_indexes(database=None):
+    database = db if database is None else database
+    for collection_name, indexes in HOT_PATH_INDEXES.items():
+        for entry in indexes:
+            keys, options = entry if isinstance(entry, tuple) else (entry, {})
+            database[collection_name].create_index(keys, **options)
+
+
+def _plan_stages(plan):
+    yield plan.get("stage")
+    for key in ("inputStage", "queryPlan"):
+        if isinstance(plan.get(key), dict):
+            yield from _plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from _plan_stages(child)
+
+
+def audit_hot_query_plans(database=None) -> list[str]:
+    """
+    Explains every hot query and returns the ones whose winning plan
+    contains a COLLSCAN.
+    """
+    database = db if database is None else database
+    violations = []
+    for name, collection_name, query, sort in _hot_queries(datetime.now()):
+        cursor = database[collection_name].find(query).limit(50)
+        if sort:
+            cursor = cursor.sort(sort)
+        winning_plan = cursor.explain()["queryPlanner"]["winningPlan"]
+        if "COLLSCAN" in set(_plan_stages(winning_plan)):
+            violations.append(f"{name} ({collection_name}): {query} sort={sort}")
+    return violations
+
+
+def verify_hot_query_plans(database=None) -> None:
+    violations = audit_hot_query_plans(database)
+    if violations:
+        raise RuntimeError("Hot queries without index support:\n- " + "\n- ".join(violations))
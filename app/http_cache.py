@@ -0,0 +1,45 @@
+"""
+ETag helpers for cacheable GET endpoints.
+"""
+
+import hashlib
+import json
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+
+def if_none_match(request: Request) -> set[str]:
+    header = request.headers.get("if-none-match") or ""
+    return {
+        tag.strip().removeprefix("W/")
+        for tag in header.split(",")
+        if tag.strip()
+    }
+
+
+def content_etag(content) -> str:
+    """
+    Strong ETag derived from the JSON form of `content`, so every worker
+    tags the same payload identically.
+    """
+    encoded = json.dumps(jsonable_encoder(content), sort_keys=True, separators=(",", ":"))
+    return '"' + hashlib.sha1(encoded.encode("utf-8")).hexdigest()[:20] + '"'
+
+
+def etag_response(
+    request: Request,
+    content,
+    etag: str | None = None,
+    cache_control: str = "no-cache",
+) -> Response:
+    """
+    JSON response carrying ETag/Cache-Control, or an empty 304 when the
+    client already holds this version.
+    """
+    etag = etag or content_etag(content)
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag in if_none_match(request):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=jsonable_encoder(content), headers=headers)
@@ -1,4 +1,8 @@
-from fastapi import Depends, FastAPI, File, HTTPException, UploadFile
+from fastapi import Depends, FastAPI, File, Form, HTTPException, Query, Request, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+import asyncio
+import logging
 import os
 import threading
 from datetime import datetime
@@ -19,14 +23,23 @@ from app.config import REPO_ROOT, get_settings
 from app.utils.image_processing import extract_features
 from app.utils.risk_logic import calculate_risk, risk_level
 from app.database import alerts_collection, images_collection, predictions_collection
-from app.utils.time_series import get_recent_risks, is_sudden_spike
+from app.utils.time_series import (
+    DEFAULT_CAMERA_ID,
+    feature_vector,
+    get_feature_sequence,
+    get_recent_risks,
+    is_sudden_spike,
+    record_feature_vector,
+    record_risk,
+    seed_camera_history,
+)
 from app.routes.citizen import router as citizen_router
-from app.utils.fusion_logic import fuse_risk
+from app.utils.fusion_logic import DEFAULT_ZONE_ID, fuse_risk
 from app.routes.feedback import router as feedback_router
 from app.utils.confidence_logic import calculate_confidence
 from app.routes.dashboard import router as dashboard_router
-from app.ai.infer import ai_predict
-from app.ai.temporal_infer import temporal_predict
+from app.ai.infer import ai_predict_future, get_cnn_batching_stats
+from app.ai.temporal_infer import temporal_predict_streaming, temporal_stream_lock
 from app.ai.ensemble import compute_ensemble_score, level_from_score
 from app.utils.eta_logic import estimate_eta
 from app.utils.alert_severity import determine_alert_severity
@@ -39,15 +52,21 @@ from app.utils.active_learning import (
     queue_active_learning_sample,
 )
 from app.routes.override import router as override_router
-from app.database import overrides_collection
+from app.services.override_state import watch_override_changes
+from app.services.decision_snapshot import (
+    DECISION_LONG_POLL_MAX_SECONDS,
+    peek_decision_snapshot,
+    publish_latest_decision,
+    refresh_decision_snapshot,
+    refresh_stale_decision_snapshot,
+    wait_for_decision_change,
+)
 from app.routes.camera import router as camera_router
 from app.routes.admin_ml import router as admin_ml_router
 
 
 
-from app.notifications.valkey_pub import publish_decision
-from app.notifications.deliver import deliver
-from app.notifications.fcm_push import send_push_fcm_to_targets
+from app.notifications.fcm_push import send_push_fcm_to_targets, warm_fcm_credentials
 from app.notifications.alert_engine import build_alert_payload
 from app.routes.map import router as map_router
 from app.database import (
@@ -56,17 +75,68 @@ from app.database import (
     ensure_active_learning_indexes,
     ensure_fcm_token_indexes,
     ensure_help_request_indexes,
+    ensure_historical_event_indexes,
     ensure_rescue_team_indexes,
     ensure_team_notification_indexes,
+    ensure_hot_path_indexes,
+    geo_point,
+    verify_hot_query_plans,
 )
 from app.routes.safezones import router as safezones_router
 from app.database import safe_zones_collection, fcm_tokens_collection
 from app.database import historical_events_collection
 from app.routes.alerts import router as alerts_router
-from app.upload_security import save_image_upload
+from app.routes.stream import router as stream_router
+from app.http_cache import if_none_match
+from app.upload_security import read_image_upload, write_image_bytes
+from app.services.ingest_pipeline import (
+    get_ingest_metrics,
+    ingest_admission,
+    run_in_analysis_pool,
+    start_ingest_workers,
+    stop_ingest_workers,
+    submit_background,
+)
+from app.services.alert_outbox import (
+    ALERT_RETRY_ENABLED,
+    ALERT_RETRY_MAX_ATTEMPTS,
+    enqueue_alert,
+    get_outbox_metrics,
+    requeue_legacy_alerts,
+    start_alert_outbox_workers,
+    stop_alert_outbox_workers,
+)
+from app.services.alert_dedup import (
+    ALERT_DEDUP_SECONDS,
+    alert_dedup_key,
+    claim_dedup_window,
+    release_dedup_window,
+)
+from app.services.prediction_rollups import record_prediction_rollup, rollup_series
+from app.utils.location_stats import record_location_risk, seed_location_stats
+from app.services.map_tiles import bbox_filter, get_map_tile_metrics, parse_bbox
+from app.services.snapshot_cache import TtlSingleFlight
+from app.services.event_hub import get_event_hub_metrics, relay_valkey_events
+from app.services.safezone_job import get_safezone_job_metrics, run_safezone_job
+from app.routes.dashboard import (
+    confidence_timeseries,
+    current_status,
+    eta_timeseries,
+    get_teams_snapshot,
+    risk_timeseries,
+)
+from app.utils.frame import CameraFrame
 
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+DASHBOARD_SNAPSHOT_TTL_SECONDS = max(0.5, float(os.getenv("POLARIS_DASHBOARD_SNAPSHOT_TTL_SECONDS", "2")))
+# Upper bound on raw points per map layer request; larger areas use tiles.
+MAP_LAYER_MAX_POINTS = 2000
+# Fixed map position (Mumbai) for predictions stored without coordinates.
+LEGACY_CAMERA_LAT = 19.0760
+LEGACY_CAMERA_LNG = 72.8777
+_dashboard_snapshot_cache = TtlSingleFlight(DASHBOARD_SNAPSHOT_TTL_SECONDS)
 
 
 class AuthTokenRequest(BaseModel):
@@ -116,27 +186,57 @@ async def lifespan(app: FastAPI):
     ensure_help_request_indexes()
     ensure_rescue_team_indexes()
     ensure_team_notification_indexes()
-    retry_stop_event = None
-    retry_thread = None
-    if ALERT_RETRY_ENABLED:
-        retry_stop_event = threading.Event()
-        retry_thread = threading.Thread(
-            target=_alert_retry_worker,
-            args=(retry_stop_event,),
-            daemon=True,
-            name="alert-retry-worker",
-        )
-        retry_thread.start()
-    app.state.alert_retry_stop_event = retry_stop_event
-    app.state.alert_retry_thread = retry_thread
+    ensure_historical_event_indexes()
+    ensure_hot_path_indexes()
+    if settings.audit_query_plans:
+        verify_hot_query_plans()
+    seed_camera_history()
+    seed_location_stats()
+    refresh_decision_snapshot()
+    warm_fcm_credentials()
+    start_ingest_workers()
+    requeue_legacy_alerts()
+    start_alert_outbox_workers()
+    override_stop_event = threading.Event()
+    override_thread = threading.Thread(
+        target=watch_override_changes,
+        args=(override_stop_event,),
+        daemon=True,
+        name="override-watcher",
+    )
+    override_thread.start()
+    app.state.override_stop_event = override_stop_event
+    app.state.override_thread = override_thread
+    event_relay_stop_event = threading.Event()
+    event_relay_thread = threading.Thread(
+        target=relay_valkey_events,
+        args=(event_relay_stop_event,),
+        daemon=True,
+        name="event-relay",
+    )
+    event_relay_thread.start()
+    app.state.event_relay_stop_event = event_relay_stop_event
+    app.state.event_relay_thread = event_relay_thread
+    safezone_stop_event = threading.Event()
+    safezone_thread = threading.Thread(
+        target=run_safezone_job,
+        args=(safezone_stop_event,),
+        daemon=True,
+        name="safezone-job",
+    )
+    safezone_thread.start()
+    app.state.safezone_stop_event = safezone_stop_event
+    app.state.safezone_thread = safezone_thread
     yield
     # Shutdown logic
-    stop_event = getattr(app.state, "alert_retry_stop_event", None)
-    thread = getattr(app.state, "alert_retry_thread", None)
-    if stop_event is not None:
-        stop_event.set()
-    if thread is not None and thread.is_alive():
-        thread.join(timeout=2)
+    app.state.override_stop_event.set()
+    app.state.override_thread.join(timeout=2)
+    app.state.event_relay_stop_event.set()
+    app.state.event_relay_thread.join(timeout=2)
+    app.state.safezone_stop_event.set()
+    app.state.safezone_thread.join(timeout=2)
+    stop_ingest_workers()
+    stop_alert_outbox_workers()
 
 
 
@@ -158,6 +258,7 @@ app.add_middleware(
 app.include_router(alerts_router)
 app.include_router(camera_router)
 app.include_router(admin_ml_router)
+app.include_router(stream_router)
 @app.get("/")
 def root():
     return {"status": "Polaris server running"}
@@ -172,11 +273,18 @@ def backend_health():
     }
 
 
-ALERT_DEDUP_SECONDS = int(os.getenv("ALERT_DEDUP_SECONDS", "180"))
-ALERT_RETRY_ENABLED = (os.getenv("ALERT_RETRY_ENABLED", "1").strip() == "1")
-ALERT_RETRY_INTERVAL_SECONDS = max(5, int(os.getenv("ALERT_RETRY_INTERVAL_SECONDS", "30")))
-ALERT_RETRY_MAX_ATTEMPTS = max(1, int(os.getenv("ALERT_RETRY_MAX_ATTEMPTS", "3")))
-ALERT_RETRY_BATCH_SIZE = max(1, int(os.getenv("ALERT_RETRY_BATCH_SIZE", "20")))
+@app.get("/backend/metrics")
+def backend_metrics(_: dict = Depends(require_authority)):
+    return {
+        "timestamp": datetime.now(),
+        "ingest": get_ingest_metrics(),
+        "cnn_batching": get_cnn_batching_stats(),
+        "alert_outbox": get_outbox_metrics(),
+        "dashboard_snapshot_cache": _dashboard_snapshot_cache.stats(),
+        "event_hub": get_event_hub_metrics(),
+        "safezones": get_safezone_job_metrics(),
+        "map_tiles": get_map_tile_metrics(),
+    }
 
 
 def _parse_csv(raw_value: str) -> list[str]:
@@ -253,82 +361,11 @@ def _get_fcm_debug_config() -> dict:
         "topic": topic or None,
         "dedup_seconds": ALERT_DEDUP_SECONDS,
         "retry_enabled": ALERT_RETRY_ENABLED,
-        "retry_interval_seconds": ALERT_RETRY_INTERVAL_SECONDS,
         "retry_max_attempts": ALERT_RETRY_MAX_ATTEMPTS,
-        "retry_batch_size": ALERT_RETRY_BATCH_SIZE,
+        "outbox": get_outbox_metrics(),
     }
 
 
-def _retry_failed_alerts_once() -> None:
-    if not ALERT_RETRY_ENABLED:
-        return
-
-    cursor = alerts_collection.find(
-        {
-            "status": "failed",
-            "retry_count": {"$lt": ALERT_RETRY_MAX_ATTEMPTS},
-        }
-    ).sort("timestamp", 1).limit(ALERT_RETRY_BATCH_SIZE)
-
-    for alert in cursor:
-        payload = {
-            "severity": alert.get("severity"),
-            "channel": alert.get("channel"),
-            "message": alert.get("message"),
-            "title": alert.get("title"),
-        }
-
-        delivery_result = deliver(payload)
-        retry_count = int(alert.get("retry_count", 0)) + 1
-
-        update_doc = {
-            "retry_count": retry_count,
-            "last_retry_at": datetime.now(),
-            "delivery": delivery_result,
-        }
-        if delivery_result.get("ok"):
-            update_doc["status"] = "sent"
-
-        alerts_collection.update_one(
-            {"_id": alert["_id"]},
-            {"$set": update_doc}
-        )
-
-
-def _alert_retry_worker(stop_event: threading.Event) -> None:
-    while not stop_event.is_set():
-        try:
-            _retry_failed_alerts_once()
-        except Exception:
-            pass
-        stop_event.wait(ALERT_RETRY_INTERVAL_SECONDS)
-
-
-def _is_recent_duplicate_alert(payload: dict) -> bool:
-    if ALERT_DEDUP_SECONDS <= 0:
-        return False
-
-    severity = (payload.get("severity") or "").strip().upper()
-    message = (payload.get("message") or "").strip()
-    if not severity or not message:
-        return False
-
-    latest = alerts_collection.find_one(
-        {"severity": severity, "message": message},
-        sort=[("timestamp", -1)],
-        projection={"timestamp": 1},
-    )
-    if not latest:
-        return False
-
-    ts = latest.get("timestamp")
-    if not isinstance(ts, datetime):
-        return False
-
-    age_seconds = (datetime.now() - ts).total_seconds()
-    return age_seconds <= ALERT_DEDUP_SECONDS
-
-
 def _dispatch_alert_payload(payload: dict, source: str = "API_DISPATCH") -> dict:
     severity = (payload.get("severity") or "").strip().upper()
     channel = (payload.get("channel") or "").strip().upper()
@@ -352,7 +389,8 @@ def _dispatch_alert_payload(payload: dict, source: str = "API_DISPATCH") -> dict
         "title": payload.get("title"),
     }
 
-    if _is_recent_duplicate_alert(normalized_payload):
+    dedup_key = alert_dedup_key(severity, message)
+    if claim_dedup_window(dedup_key):
         duplicate_doc = {
             "channel": channel,
             "severity": severity,
@@ -378,35 +416,27 @@ def _dispatch_alert_payload(payload: dict, source: str = "API_DISPATCH") -> dict
             },
         }
 
-    alert_doc = {
-        "channel": channel,
-        "severity": severity,
-        "message": message,
-        "title": normalized_payload.get("title"),
-        "timestamp": datetime.now(),
-        "status": "queued",
-        "source": source,
-        "retry_count": 0,
-    }
-
-    # store first
-    result = alerts_collection.insert_one(alert_doc)
-
-    # deliver
-    delivery_result = deliver(normalized_payload)
-
-    # update status
-    new_status = "sent" if delivery_result.get("ok") else "failed"
-    alerts_collection.update_one(
-        {"_id": result.inserted_id},
-        {"$set": {"status": new_status, "delivery": delivery_result}}
-    )
+    # Delivery happens on the outbox workers; the caller only waits for the insert.
+    try:
+        alert_id = enqueue_alert({
+            "channel": channel,
+            "severity": severity,
+            "message": message,
+            "title": normalized_payload.get("title"),
+            "source": source,
+            "dedup_key": dedup_key,
+        })
+    except Exception:
+        release_dedup_window(dedup_key)
+        raise
 
     return {
-        "status": new_status,
+        "status": "queued",
+        "alert_id": str(alert_id),
         "channel": channel,
         "severity": severity,
-        "delivery": delivery_result
+        # Not delivered yet: the outcome is recorded on the alert document.
+        "delivery": {"ok": None, "queued": True},
     }
 
 
@@ -422,25 +452,37 @@ def backend_start(_: dict = Depends(require_authority)):
     }
 
 
-@app.post("/input/camera")
-async def receive_camera_image(
-    image: UploadFile = File(...),
-    _: dict = Depends(require_ingest_or_authority),
-):
-    timestamp = datetime.now()
-    filename, filepath = await save_image_upload(
-        image,
-        target_dir=settings.camera_upload_dir,
-        max_upload_bytes=settings.max_upload_bytes,
-    )
+def _extract_camera_signals(image_bytes: bytes):
+    """
+    Stage 1 (analysis pool): decode once, extract features and queue the
+    frame for batched CNN inference.
+    """
+    frame = CameraFrame.from_bytes(image_bytes)
 
     # 2. Extract features
-    features = extract_features(filepath)
+    features = extract_features(frame)
 
     # 3. Calculate risk
     risk_score = calculate_risk(features)
 
-    recent_risks = get_recent_risks(limit=10)
+    # The CNN future is awaited on the event loop so frames can batch.
+    cnn_future = ai_predict_future(frame)
+    return features, risk_score, cnn_future
+
+
+def _decide_camera_frame(
+    camera_id: str,
+    zone_id: str,
+    features: dict,
+    risk_score: float,
+    ai_probability: float,
+) -> dict:
+    """
+    Stage 2 (analysis pool): temporal model, ensemble and final decision.
+    """
+    # Rolling window lives in memory; no Mongo round-trip per frame.
+    recent_risks = get_recent_risks(limit=10, camera_id=camera_id)
+    record_risk(risk_score, camera_id=camera_id)
     recent_risks.append(risk_score)
     spike_detected = is_sudden_spike(recent_risks)
 
@@ -451,13 +493,11 @@ async def receive_camera_image(
 
 
     # Fuse rule-based decision with citizen inputs first.
-    fused_rule_level = fuse_risk(ai_level, "TEST_ZONE")
+    fused_rule_level = fuse_risk(ai_level, zone_id)
 
     # =========================
     # AI MODEL (CNN) PREDICTION
     # =========================
-    ai_probability = ai_predict(filepath)
-
     if ai_probability > 0.7:
         ai_ml_level = "IMMINENT"
     elif ai_probability > 0.5:
@@ -468,21 +508,20 @@ async def receive_camera_image(
     # =========================
     # TEMPORAL AI (SEQUENCE)
     # =========================
-    recent_sequence = []
-
-    for r in recent_risks[-10:]:
-        recent_sequence.append([
-        ai_probability,
-        risk_score,
-        features["brightness"],
-        features["edge_density"],
-        features["entropy"]
-        ])
-
-    if len(recent_sequence) == 10:
-        temporal_prob = temporal_predict(recent_sequence)
-    else:
-        temporal_prob = 0.0
+    # True sliding window of this camera's last frames, current frame last.
+    # The camera lock keeps another frame from landing between this frame's
+    # append and its streaming step.
+    with temporal_stream_lock(camera_id):
+        record_feature_vector(
+            feature_vector(ai_probability, risk_score, features),
+            camera_id=camera_id,
+        )
+        recent_sequence = get_feature_sequence(camera_id=camera_id)
+
+        if recent_sequence is not None:
+            temporal_prob = temporal_predict_streaming(camera_id, recent_sequence)
+        else:
+            temporal_prob = 0.0
 
     if temporal_prob > 0.7:
         temporal_level = "IMMINENT"
@@ -567,9 +606,64 @@ async def receive_camera_image(
     alert_severity=alert_severity,
     justification=authority_justification
 )
-    publish_decision(final_decision)
 
+    return {
+        "camera_id": camera_id,
+        "zone_id": zone_id,
+
+        # Core outcomes
+        "risk_score": risk_score,
+        "ensemble_score": ensemble_score,
+        "risk_level": final_level,
+        "confidence": confidence,
+
+        # AI outputs (learning-critical)
+        "ai_probability": ai_probability,
+        "ai_ml_level": ai_ml_level,
+        "temporal_probability": temporal_prob,
+        "temporal_level": temporal_level,
+
+        # Features (for retraining & explainability)
+        "features": features,
+        "eta": eta,
+        "alert_severity": alert_severity,
+        "authority_justification": authority_justification,
+        "eta_confidence": eta_confidence,
+        "final_decision": final_decision,
+    }
+
+
+def _persist_camera_frame(
+    *,
+    timestamp: datetime,
+    filename: str,
+    filepath: str | None,
+    image_bytes: bytes,
+    analysis: dict,
+    lat: float | None = None,
+    lng: float | None = None,
+) -> None:
+    """
+    Stage 3 (background worker): persist and dispatch alerts. The
+    decision itself was already published by publish_latest_decision.
+    """
+    final_decision = analysis["final_decision"]
 
+    # The safety alert is queued first, so a failure in any best-effort
+    # step below can never drop it.
+    auto_alert_payload = build_alert_payload(final_decision)
+    if auto_alert_payload:
+        try:
+            _dispatch_alert_payload(auto_alert_payload, source="AUTO_PIPELINE")
+        except Exception:
+            logger.exception("Auto alert dispatch failed for frame %s", filename)
+
+    if filepath:
+        try:
+            write_image_bytes(filepath, image_bytes)
+        except Exception:
+            logger.exception("Could not write camera frame %s", filepath)
+            filepath = None
 
     # 4. Save image metadata
     image_doc = {
@@ -577,89 +671,136 @@ async def receive_camera_image(
         "filepath": filepath,
         "timestamp": timestamp
     }
-    image_result = images_collection.insert_one(image_doc)
+    image_id = None
+    try:
+        image_id = images_collection.insert_one(image_doc).inserted_id
+    except Exception:
+        logger.exception("Could not store image metadata for frame %s", filename)
 
     # 5. Save prediction
     prediction_doc = {
-    "image_id": image_result.inserted_id,
-    "timestamp": timestamp,
-
-    # Core outcomes
-    "risk_score": risk_score,
-    "ensemble_score": ensemble_score,
-    "risk_level": final_level,
-    "confidence": confidence,
-
-    # AI outputs (learning-critical)
-    "ai_probability": ai_probability,
-    "ai_ml_level": ai_ml_level,
-    "temporal_probability": temporal_prob,
-    "temporal_level": temporal_level,
-
-    # Features (for retraining & explainability)
-    "features": features,
-    "eta": eta,
-    "alert_severity": alert_severity,
-    "authority_justification": authority_justification,
-    "eta_confidence": eta_confidence
-}
-    prediction_doc["final_decision"] = final_decision
-    prediction_result = predictions_collection.insert_one(prediction_doc)
-
-    # Auto-dispatch alerts directly from the decision pipeline.
-    # This keeps notifications working even if the external router process is not running.
-    auto_alert_payload = build_alert_payload(final_decision)
-    if auto_alert_payload:
-        _dispatch_alert_payload(auto_alert_payload, source="AUTO_PIPELINE")
-
-    if should_queue_for_active_learning(
-        confidence=confidence,
-        ensemble_score=ensemble_score,
-        cnn_probability=ai_probability,
-        temporal_probability=temporal_prob,
+        "image_id": image_id,
+        "timestamp": timestamp,
+        **analysis,
+    }
+    if lat is not None and lng is not None:
+        prediction_doc["lat"] = lat
+        prediction_doc["lng"] = lng
+        prediction_doc["location"] = geo_point(lat, lng)
+    prediction_id = None
+    try:
+        prediction_id = predictions_collection.insert_one(prediction_doc).inserted_id
+    except Exception:
+        logger.exception("Could not store prediction for frame %s", filename)
+    try:
+        record_prediction_rollup(prediction_doc)
+    except Exception:
+        logger.exception("Could not update prediction rollups for frame %s", filename)
+    try:
+        record_location_risk(lat, lng, analysis["risk_score"], timestamp)
+    except Exception:
+        logger.exception("Could not record location risk for frame %s", filename)
+
+    if prediction_id is not None and should_queue_for_active_learning(
+        confidence=analysis["confidence"],
+        ensemble_score=analysis["ensemble_score"],
+        cnn_probability=analysis["ai_probability"],
+        temporal_probability=analysis["temporal_probability"],
     ):
         try:
             queue_active_learning_sample(
-                prediction_id=prediction_result.inserted_id,
+                prediction_id=prediction_id,
                 image_path=filepath,
-                risk_score=risk_score,
-                ensemble_score=ensemble_score,
-                confidence=confidence,
-                cnn_probability=ai_probability,
-                temporal_probability=temporal_prob,
-                features=features,
+                risk_score=analysis["risk_score"],
+                ensemble_score=analysis["ensemble_score"],
+                confidence=analysis["confidence"],
+                cnn_probability=analysis["ai_probability"],
+                temporal_probability=analysis["temporal_probability"],
+                features=analysis["features"],
             )
         except Exception:
-            pass
+            logger.exception("Could not queue frame %s for active learning", filename)
 
-    return final_decision
 
-@app.get("/decision/latest")
-def get_latest_decision():
-    # 1️⃣ Check override FIRST
-    override = overrides_collection.find_one(
-        {"active": True},
-        sort=[("timestamp", -1)]
-    )
+@app.post("/input/camera")
+async def receive_camera_image(
+    image: UploadFile = File(...),
+    camera_id: str = Form(DEFAULT_CAMERA_ID, max_length=60),
+    zone_id: str = Form(DEFAULT_ZONE_ID, max_length=60),
+    lat: float | None = Form(None, ge=-90, le=90),
+    lng: float | None = Form(None, ge=-180, le=180),
+    _: dict = Depends(require_ingest_or_authority),
+):
+    camera_id = camera_id.strip() or DEFAULT_CAMERA_ID
+    zone_id = zone_id.strip() or DEFAULT_ZONE_ID
+    with ingest_admission():
+        timestamp = datetime.now()
+        filename, image_bytes = await read_image_upload(
+            image,
+            max_upload_bytes=settings.max_upload_bytes,
+        )
 
-    if override:
-        return {
-            "final_risk_level": override["risk_level"],
-            "final_confidence": 1.0,
-            "final_eta": "UNKNOWN",
-            "final_eta_confidence": "HIGH",
-            "final_alert_severity": override["alert_severity"],
-            "decision_mode": "MANUAL_OVERRIDE",
-            "justification": f"Manual override by {override['author']}: {override['reason']}",
-        }
+        # 1. Decode once; features and CNN share the in-memory frame.
+        try:
+            features, risk_score, cnn_future = await run_in_analysis_pool(
+                _extract_camera_signals, image_bytes
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-    # 2️⃣ Otherwise return last AI decision
-    doc = predictions_collection.find_one({}, sort=[("timestamp", -1)])
+        # Awaiting the batcher future lets concurrent uploads share one forward pass.
+        ai_probability = await asyncio.wrap_future(cnn_future)
 
-    if not doc:
-        return {"message": "No decisions yet"}
+        analysis = await run_in_analysis_pool(
+            _decide_camera_frame, camera_id, zone_id, features, risk_score, ai_probability
+        )
+        publish_latest_decision(analysis["final_decision"], timestamp)
+
+        # Disk persistence is a write-behind step, off the critical path.
+        filepath = None
+        if settings.persist_camera_frames:
+            filepath = str(settings.camera_upload_dir / filename)
+
+        submit_background(
+            _persist_camera_frame,
+            timestamp=timestamp,
+            filename=filename,
+            filepath=filepath,
+            image_bytes=image_bytes,
+            analysis=analysis,
+            lat=lat,
+            lng=lng,
+        )
+
+    return analysis["final_decision"]
+
+
+@app.get("/decision/latest")
+async def get_latest_decision(
+    request: Request,
+    wait: float = Query(default=0, ge=0, le=DECISION_LONG_POLL_MAX_SECONDS),
+):
+    """
+    Latest decision from the in-process snapshot (override first).
+    With If-None-Match and ?wait=N the request long-polls for up to N
+    seconds and answers 304 when nothing changed.
+    """
+    snapshot, stale = peek_decision_snapshot()
+    if stale:
+        snapshot = await run_in_threadpool(refresh_stale_decision_snapshot)
+
+    known_etags = if_none_match(request)
+    if snapshot["etag"] in known_etags and wait > 0:
+        snapshot = await wait_for_decision_change(snapshot["etag"], wait)
 
-    return doc.get("final_decision", {"message": "Final decision not stored yet"})
+    headers = {"ETag": snapshot["etag"], "Cache-Control": "no-cache"}
+    if snapshot["etag"] in known_etags:
+        return Response(status_code=304, headers=headers)
+
+    decision = snapshot["decision"]
+    if decision is None:
+        decision = {"message": "No decisions yet"}
+    return JSONResponse(content=decision, headers=headers)
 
 
 
@@ -777,6 +918,10 @@ def get_alert_debug_status(_: dict = Depends(require_authority)):
 
 @app.get("/alert/status")
 def get_alert_status(_: dict = Depends(require_authority)):
+    return _alert_status_payload()
+
+
+def _alert_status_payload() -> dict:
     latest_alert = None
     latest_prediction = None
     db_error = None
@@ -828,12 +973,25 @@ def get_recent_alerts(limit: int = 20):
     return alerts
 
 @app.get("/predictions/history")
-def get_prediction_history(hours: int = 24):
+def get_prediction_history(hours: int = 24, resolution: str = Query(default="raw", pattern="^(raw|minute|hour)$")):
     from datetime import timedelta
 
     now = datetime.now()
     since = now - timedelta(hours=hours)
 
+    if resolution != "raw":
+        return [
+            {
+                "timestamp": bucket["time"],
+                "risk_score": bucket["risk_score"]["mean"],
+                "risk_score_max": bucket["risk_score"]["max"],
+                "confidence": bucket["confidence"]["mean"],
+                "alert_severity": bucket["alert_severity"],
+                "count": bucket["count"],
+            }
+            for bucket in rollup_series(resolution, since)
+        ]
+
     preds = list(
         predictions_collection.find(
             {"timestamp": {"$gte": since}},
@@ -849,46 +1007,101 @@ def get_prediction_history(hours: int = 24):
 
     return preds
 
+def _bbox_query(bbox: str | None) -> dict:
+    if not bbox:
+        return {}
+    try:
+        return bbox_filter(parse_bbox(bbox))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid bbox: {exc}") from None
+
+
 @app.get("/map/live-risk")
-def get_live_risk_points(limit: int = 50):
+def get_live_risk_points(limit: int = 50, bbox: str | None = None):
+    """
+    Latest predictions, optionally only those inside
+    bbox=west,south,east,north (located predictions only).
+    """
     points = list(
         predictions_collection.find(
-            {},
+            _bbox_query(bbox),
             {
                 "_id": 0,
                 "timestamp": 1,
                 "risk_score": 1,
                 "risk_level": 1,
                 "alert_severity": 1,
+                "lat": 1,
+                "lng": 1,
             }
         )
         .sort("timestamp", -1)
-        .limit(limit)
+        .limit(max(1, min(limit, MAP_LAYER_MAX_POINTS)))
     )
 
-    # TEMP: fixed location (replace later with camera metadata)
+    # Predictions stored before cameras sent coordinates have none.
     for p in points:
-        p["lat"] = 19.0760   # Mumbai
-        p["lng"] = 72.8777
+        p.setdefault("lat", LEGACY_CAMERA_LAT)
+        p.setdefault("lng", LEGACY_CAMERA_LNG)
 
     return points
 
 @app.get("/map/safe-zones/raw")
-def get_safe_zones(_: dict = Depends(require_authority)):
+def get_safe_zones(
+    bbox: str | None = None,
+    limit: int = MAP_LAYER_MAX_POINTS,
+    _: dict = Depends(require_authority),
+):
     zones = list(
-        safe_zones_collection.find({}, {"_id": 0})
+        safe_zones_collection.find(_bbox_query(bbox), {"_id": 0, "location": 0})
+        .limit(max(1, min(limit, MAP_LAYER_MAX_POINTS)))
     )
     return zones
 
 
 
 @app.get("/map/historical-events")
-def get_historical_events():
+def get_historical_events(bbox: str | None = None, limit: int = MAP_LAYER_MAX_POINTS):
+    """
+    Historical events, optionally inside bbox=west,south,east,north.
+    For city-wide views use /map/tiles/historical-events/{z}/{x}/{y}.
+    """
     events = list(
-        historical_events_collection.find({}, {"_id": 0})
+        historical_events_collection.find(_bbox_query(bbox), {"_id": 0, "location": 0})
+        .limit(max(1, min(limit, MAP_LAYER_MAX_POINTS)))
     )
     return events
 
+def _build_dashboard_snapshot(resolution: str) -> dict:
+    return {
+        "generated_at": datetime.now(),
+        "current_status": current_status(),
+        "risk_timeseries": risk_timeseries(minutes=60, resolution=resolution),
+        "confidence_timeseries": confidence_timeseries(minutes=60, resolution=resolution),
+        "eta_timeseries": eta_timeseries(minutes=60, resolution=resolution),
+        "recent_alerts": get_recent_alerts(limit=20),
+        "alert_status": _alert_status_payload(),
+        "live_risk": get_live_risk_points(limit=50),
+        "teams": get_teams_snapshot({}),
+    }
+
+
+@app.get("/dashboard/snapshot")
+def get_dashboard_snapshot(
+    resolution: str = Query(default="minute", pattern="^(raw|minute|hour)$"),
+    _: dict = Depends(require_authority),
+):
+    """
+    Everything the dashboard home screen polls, in one response. Built at
+    most once per DASHBOARD_SNAPSHOT_TTL_SECONDS however many dashboards
+    are open.
+    """
+    return _dashboard_snapshot_cache.get(
+        resolution,
+        lambda: _build_dashboard_snapshot(resolution),
+    )
+
+
 @app.post("/auth/token")
 def issue_token(payload: AuthTokenRequest):
     if not (settings.authority_username and settings.authority_password) and not (
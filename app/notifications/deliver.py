@@ -1,6 +1,7 @@
-from typing import Dict
+import os
+from typing import Dict, List
 
-from app.notifications.fcm_push import send_push_fcm
+from app.notifications.fcm_push import send_push_fcm, send_push_fcm_to_targets
 
 
 SUPPORTED_CHANNELS = {
@@ -11,6 +12,57 @@ SUPPORTED_CHANNELS = {
     "ALL_CHANNELS",
 }
 
+# Mass-alert severities are published once to a topic/condition that every
+# client subscribes to, instead of once per registered token. Only an
+# explicit FCM_BROADCAST_TOPIC/CONDITION turns this on: web clients never
+# subscribe to topics, so FCM_TOPIC alone keeps delivery per-token.
+BROADCAST_SEVERITIES = {"WARNING", "ALERT", "EMERGENCY"}
+
+
+def _broadcast_target() -> Dict:
+    condition = (os.getenv("FCM_BROADCAST_CONDITION") or "").strip()
+    if condition:
+        return {"condition": condition}
+    topic = (os.getenv("FCM_BROADCAST_TOPIC") or "").strip()
+    if topic:
+        return {"topic": topic}
+    return {}
+
+
+def plan_delivery(payload: Dict) -> Dict:
+    """
+    Decides how a payload reaches devices:
+    - "targeted": explicit device_tokens in the payload
+    - "broadcast": mass severity with a topic/condition configured (1 request)
+    - "per_token": everything else, via registered tokens + FCM_TOPIC
+    """
+    device_tokens: List[str] = [
+        token.strip() for token in (payload.get("device_tokens") or []) if token and token.strip()
+    ]
+    if device_tokens:
+        return {"mode": "targeted", "device_tokens": device_tokens}
+
+    severity = (payload.get("severity") or "").upper()
+    if severity in BROADCAST_SEVERITIES:
+        target = _broadcast_target()
+        if target:
+            return {"mode": "broadcast", **target}
+
+    return {"mode": "per_token"}
+
+
+def _fanout_cost(plan: Dict, fcm_result: Dict) -> Dict:
+    cost = {
+        "mode": plan["mode"],
+        "fcm_requests": int(fcm_result.get("targets") or 0),
+    }
+    if plan["mode"] == "broadcast":
+        cost["target"] = f"condition:{plan['condition']}" if "condition" in plan else f"topic:{plan['topic']}"
+    token_sources = fcm_result.get("token_sources")
+    if token_sources:
+        cost["registered_tokens"] = token_sources.get("registered_count", 0)
+    return cost
+
 
 def deliver(payload: Dict) -> Dict:
     """
@@ -25,10 +77,22 @@ def deliver(payload: Dict) -> Dict:
             "error": f"No delivery route defined for channel '{channel}'",
         }
 
-    fcm_result = send_push_fcm(payload)
+    plan = plan_delivery(payload)
+    if plan["mode"] == "targeted":
+        fcm_result = send_push_fcm_to_targets(payload, device_tokens=plan["device_tokens"])
+    elif plan["mode"] == "broadcast":
+        fcm_result = send_push_fcm_to_targets(
+            payload,
+            topic=plan.get("topic"),
+            condition=plan.get("condition"),
+        )
+    else:
+        fcm_result = send_push_fcm(payload)
+
     return {
         "ok": bool(fcm_result.get("ok")),
         "channel": channel,
         "provider": "fcm",
+        "fanout": _fanout_cost(plan, fcm_result),
         "results": {"fcm": fcm_result},
     }
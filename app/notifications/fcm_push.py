@@ -1,17 +1,50 @@
 import os
 import json
-from typing import Dict, List
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Tuple
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
 
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 
 
 FCM_SCOPE = ["https://www.googleapis.com/auth/firebase.messaging"]
 REPO_ROOT = Path(__file__).resolve().parents[2]
 load_dotenv(REPO_ROOT / ".env")
 
+# Fan-out knobs. All sends in the process share one keep-alive session and
+# one bounded pool, so parallel alerts cannot exceed FCM_MAX_CONCURRENCY.
+FCM_MAX_CONCURRENCY = max(1, int(os.getenv("FCM_MAX_CONCURRENCY", "32")))
+FCM_CONNECT_TIMEOUT_SECONDS = max(0.5, float(os.getenv("FCM_CONNECT_TIMEOUT_SECONDS", "3")))
+FCM_REQUEST_TIMEOUT_SECONDS = max(1.0, float(os.getenv("FCM_REQUEST_TIMEOUT_SECONDS", "10")))
+
+# Registered tokens are streamed from Mongo in pages of this size; only the
+# first FCM_RESULT_DETAIL_LIMIT per-target results are kept in the response.
+FCM_TOKEN_PAGE_SIZE = max(1, int(os.getenv("FCM_TOKEN_PAGE_SIZE", "500")))
+FCM_RESULT_DETAIL_LIMIT = max(0, int(os.getenv("FCM_RESULT_DETAIL_LIMIT", "200")))
+
+# Access tokens live ~1 h; refresh in the background once inside the margin.
+FCM_TOKEN_REFRESH_MARGIN_SECONDS = max(60, int(os.getenv("FCM_TOKEN_REFRESH_MARGIN_SECONDS", "300")))
+FCM_TOKEN_MIN_REMAINING_SECONDS = 30
+
+_credential_lock = threading.Lock()
+_credential_refresh_lock = threading.Lock()
+_credential_state = {
+    "source_key": None,
+    "credentials": None,
+    "refreshing": False,
+}
+
+_fanout_lock = threading.Lock()
+_fanout = {
+    "session": None,
+    "executor": None,
+}
+
 
 def _parse_csv(raw_value: str) -> List[str]:
     if not raw_value:
@@ -37,39 +70,156 @@ def _mask_token(value: str) -> str:
     return f"{value[:6]}...{value[-4:]}"
 
 
-def _get_access_token(service_account_file: str):
+def _service_account_source() -> Tuple[str, str]:
+    service_account_file = (os.getenv("FCM_SERVICE_ACCOUNT_FILE") or "").strip()
+    service_account_json = (os.getenv("FCM_SERVICE_ACCOUNT_JSON") or "").strip()
+    service_account_file = os.path.expanduser(service_account_file)
+    if service_account_file and not os.path.isabs(service_account_file):
+        service_account_file = str((REPO_ROOT / service_account_file).resolve())
+    return service_account_file, service_account_json
+
+
+def _build_credentials(service_account_file: str, service_account_json: str):
     try:
-        from google.auth.transport.requests import Request
         from google.oauth2 import service_account
     except Exception:
         return None, "Missing google-auth dependency. Install with: pip install google-auth"
 
+    if service_account_json:
+        try:
+            return service_account.Credentials.from_service_account_info(
+                json.loads(service_account_json),
+                scopes=FCM_SCOPE,
+            ), None
+        except Exception as exc:
+            return None, f"Failed to load FCM service account JSON: {exc}"
+
     try:
-        credentials = service_account.Credentials.from_service_account_file(
+        return service_account.Credentials.from_service_account_file(
             service_account_file, scopes=FCM_SCOPE
-        )
-        credentials.refresh(Request())
-        return credentials.token, None
+        ), None
     except Exception as exc:
         return None, f"Failed to load FCM service account: {exc}"
 
 
-def _get_access_token_from_json(service_account_json: str):
-    try:
-        from google.auth.transport.requests import Request
-        from google.oauth2 import service_account
-    except Exception:
-        return None, "Missing google-auth dependency. Install with: pip install google-auth"
+def _seconds_until_expiry(credentials) -> float:
+    if not credentials.token or credentials.expiry is None:
+        return 0.0
+    # google-auth keeps expiry as a naive UTC datetime.
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return (credentials.expiry - now).total_seconds()
 
-    try:
-        credentials = service_account.Credentials.from_service_account_info(
-            json.loads(service_account_json),
-            scopes=FCM_SCOPE,
-        )
-        credentials.refresh(Request())
+
+def _refresh_credentials(source_key) -> Tuple[str | None, str | None]:
+    """
+    Mints a new access token for the cached credentials. Only one
+    refresh runs at a time; concurrent callers reuse its result.
+    """
+    with _credential_refresh_lock:
+        with _credential_lock:
+            credentials = _credential_state["credentials"]
+            if _credential_state["source_key"] != source_key or credentials is None:
+                return None, "FCM credentials changed during refresh"
+            if _seconds_until_expiry(credentials) > FCM_TOKEN_REFRESH_MARGIN_SECONDS:
+                return credentials.token, None
+
+        try:
+            from google.auth.transport.requests import Request
+
+            credentials.refresh(Request())
+        except Exception as exc:
+            return None, f"Failed to refresh FCM access token: {exc}"
         return credentials.token, None
-    except Exception as exc:
-        return None, f"Failed to load FCM service account JSON: {exc}"
+
+
+def _background_refresh(source_key) -> None:
+    try:
+        _refresh_credentials(source_key)
+    finally:
+        with _credential_lock:
+            _credential_state["refreshing"] = False
+
+
+def _refresh_in_background(source_key) -> None:
+    with _credential_lock:
+        if _credential_state["refreshing"]:
+            return
+        _credential_state["refreshing"] = True
+    threading.Thread(
+        target=_background_refresh,
+        args=(source_key,),
+        daemon=True,
+        name="fcm-token-refresh",
+    ).start()
+
+
+def _cached_access_token(service_account_file: str, service_account_json: str):
+    """
+    Returns (access_token, error). The token is reused until it is within
+    FCM_TOKEN_REFRESH_MARGIN_SECONDS of expiry, at which point a background
+    refresh starts while the still-valid token keeps being served. Only an
+    expired (or never minted) token makes the caller wait on Google.
+    """
+    if service_account_json:
+        source_key = ("json", hashlib.sha256(service_account_json.encode("utf-8")).hexdigest())
+    else:
+        source_key = ("file", service_account_file)
+
+    with _credential_lock:
+        if _credential_state["source_key"] != source_key:
+            credentials, error = _build_credentials(service_account_file, service_account_json)
+            if error:
+                return None, error
+            _credential_state.update(source_key=source_key, credentials=credentials, refreshing=False)
+        remaining = _seconds_until_expiry(_credential_state["credentials"])
+        token = _credential_state["credentials"].token
+
+    if remaining > FCM_TOKEN_REFRESH_MARGIN_SECONDS:
+        return token, None
+    if remaining > FCM_TOKEN_MIN_REMAINING_SECONDS:
+        _refresh_in_background(source_key)
+        return token, None
+    return _refresh_credentials(source_key)
+
+
+def warm_fcm_credentials() -> None:
+    """
+    Mints the first access token off the request path (called at startup).
+    """
+    service_account_file, service_account_json = _service_account_source()
+    if not service_account_json and not (service_account_file and os.path.exists(service_account_file)):
+        return
+    threading.Thread(
+        target=_cached_access_token,
+        args=(service_account_file, service_account_json),
+        daemon=True,
+        name="fcm-token-warmup",
+    ).start()
+
+
+def _fcm_api_base_url() -> str:
+    # Overridable so tests and staging can point at a stub FCM server.
+    return (os.getenv("FCM_API_BASE_URL") or "https://fcm.googleapis.com").strip().rstrip("/")
+
+
+def _fanout_resources() -> Tuple[requests.Session, ThreadPoolExecutor]:
+    with _fanout_lock:
+        if _fanout["session"] is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=FCM_MAX_CONCURRENCY,
+                max_retries=0,
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _fanout["session"] = session
+        if _fanout["executor"] is None:
+            _fanout["executor"] = ThreadPoolExecutor(
+                max_workers=FCM_MAX_CONCURRENCY,
+                thread_name_prefix="fcm-send",
+            )
+        return _fanout["session"], _fanout["executor"]
 
 
 def _is_permanent_token_failure(status_code: int | None, resp_text: str) -> bool:
@@ -112,21 +262,20 @@ def send_push_fcm_to_targets(
     payload: Dict,
     device_tokens: List[str] | None = None,
     topic: str | None = None,
+    condition: str | None = None,
 ) -> Dict:
     """
     Sends push notifications through Firebase Cloud Messaging HTTP v1 API.
     Targets:
     - device_tokens (explicit list)
     - topic (explicit topic)
+    - condition (topic condition, e.g. "'a' in topics || 'b' in topics")
     """
     project_id = (os.getenv("FCM_PROJECT_ID") or "").strip()
-    service_account_file = (os.getenv("FCM_SERVICE_ACCOUNT_FILE") or "").strip()
-    service_account_json = (os.getenv("FCM_SERVICE_ACCOUNT_JSON") or "").strip()
-    service_account_file = os.path.expanduser(service_account_file)
-    if service_account_file and not os.path.isabs(service_account_file):
-        service_account_file = str((REPO_ROOT / service_account_file).resolve())
+    service_account_file, service_account_json = _service_account_source()
     resolved_tokens = [item.strip() for item in (device_tokens or []) if item and item.strip()]
     resolved_topic = (topic or "").strip()
+    resolved_condition = (condition or "").strip()
 
     if not project_id:
         return {
@@ -149,17 +298,14 @@ def send_push_fcm_to_targets(
             "error": f"FCM service account file not found: {service_account_file}",
         }
 
-    if not resolved_tokens and not resolved_topic:
+    if not resolved_tokens and not resolved_topic and not resolved_condition:
         return {
             "ok": False,
             "provider": "fcm",
-            "error": "No FCM targets provided (device token or topic required)",
+            "error": "No FCM targets provided (device token, topic or condition required)",
         }
 
-    if service_account_json:
-        access_token, token_error = _get_access_token_from_json(service_account_json)
-    else:
-        access_token, token_error = _get_access_token(service_account_file)
+    access_token, token_error = _cached_access_token(service_account_file, service_account_json)
     if token_error:
         return {"ok": False, "provider": "fcm", "error": token_error}
 
@@ -174,7 +320,7 @@ def send_push_fcm_to_targets(
         "message": str(message),
     }
 
-    endpoint = f"https://fcm.googleapis.com/v1/projects/{project_id}/messages:send"
+    endpoint = f"{_fcm_api_base_url()}/v1/projects/{project_id}/messages:send"
     headers = {
         "Authorization": f"Bearer {access_token}",
         "Content-Type": "application/json; charset=UTF-8",
@@ -183,13 +329,13 @@ def send_push_fcm_to_targets(
     targets = [{"kind": "token", "value": token} for token in resolved_tokens]
     if resolved_topic:
         targets.append({"kind": "topic", "value": resolved_topic})
+    if resolved_condition:
+        targets.append({"kind": "condition", "value": resolved_condition})
 
-    results = []
-    stale_tokens: List[str] = []
-    success_count = 0
+    session, executor = _fanout_resources()
 
-    for target in targets:
-        message_target = {"token": target["value"]} if target["kind"] == "token" else {"topic": target["value"]}
+    def send_one(target):
+        message_target = {target["kind"]: target["value"]}
         body = {
             "message": {
                 **message_target,
@@ -199,41 +345,50 @@ def send_push_fcm_to_targets(
                 "apns": {"headers": {"apns-priority": "10"}},
             }
         }
+        label = f"{target['kind']}:{_mask_token(target['value'])}"
 
         try:
-            response = requests.post(endpoint, json=body, headers=headers, timeout=15)
+            response = session.post(
+                endpoint,
+                json=body,
+                headers=headers,
+                timeout=(FCM_CONNECT_TIMEOUT_SECONDS, FCM_REQUEST_TIMEOUT_SECONDS),
+            )
             if 200 <= response.status_code < 300:
                 resp_json = response.json()
-                success_count += 1
-                results.append(
-                    {
-                        "target": f"{target['kind']}:{_mask_token(target['value'])}",
-                        "ok": True,
-                        "status_code": response.status_code,
-                        "name": resp_json.get("name"),
-                    }
-                )
-            else:
-                if target["kind"] == "token" and _is_permanent_token_failure(
-                    response.status_code, response.text
-                ):
-                    stale_tokens.append(target["value"])
-                results.append(
-                    {
-                        "target": f"{target['kind']}:{_mask_token(target['value'])}",
-                        "ok": False,
-                        "status_code": response.status_code,
-                        "resp": response.text,
-                    }
-                )
+                return {
+                    "target": label,
+                    "ok": True,
+                    "status_code": response.status_code,
+                    "name": resp_json.get("name"),
+                }, None
+
+            stale_token = None
+            if target["kind"] == "token" and _is_permanent_token_failure(
+                response.status_code, response.text
+            ):
+                stale_token = target["value"]
+            return {
+                "target": label,
+                "ok": False,
+                "status_code": response.status_code,
+                "resp": response.text,
+            }, stale_token
         except Exception as exc:
-            results.append(
-                {
-                    "target": f"{target['kind']}:{_mask_token(target['value'])}",
-                    "ok": False,
-                    "error": str(exc),
-                }
-            )
+            return {
+                "target": label,
+                "ok": False,
+                "error": str(exc),
+            }, None
+
+    # map() keeps results in target order while sends run concurrently.
+    results = []
+    stale_tokens: List[str] = []
+    for result, stale_token in executor.map(send_one, targets):
+        results.append(result)
+        if stale_token:
+            stale_tokens.append(stale_token)
+    success_count = sum(1 for result in results if result["ok"])
 
     overall_ok = success_count > 0
     deactivated_count = _deactivate_stale_tokens(
@@ -250,46 +405,123 @@ def send_push_fcm_to_targets(
     }
 
 
+def iter_active_token_batches(page_size: int = FCM_TOKEN_PAGE_SIZE) -> Iterator[List[str]]:
+    """
+    Yields active registered tokens in pages of `page_size`, keyed on _id,
+    so memory stays bounded however many devices are registered.
+    """
+    from app.database import fcm_tokens_collection
+
+    last_id = None
+    while True:
+        query = {"active": True}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        page = list(
+            fcm_tokens_collection.find(query, {"_id": 1, "token": 1})
+            .sort("_id", 1)
+            .limit(page_size)
+        )
+        if not page:
+            return
+        last_id = page[-1]["_id"]
+
+        tokens = [
+            (doc.get("token") or "").strip()
+            for doc in page
+            if (doc.get("token") or "").strip()
+        ]
+        if tokens:
+            yield tokens
+        if len(page) < page_size:
+            return
+
+
+def _accumulate_result(summary: Dict, result: Dict) -> None:
+    if "targets" not in result:
+        # Configuration errors are the same for every batch.
+        summary.setdefault("error", result.get("error"))
+        return
+
+    summary["batches"] += 1
+    summary["ok"] = summary["ok"] or bool(result.get("ok"))
+    for key in ("targets", "delivered_count", "failed_count", "deactivated_tokens_count"):
+        summary[key] += int(result.get(key) or 0)
+
+    room = FCM_RESULT_DETAIL_LIMIT - len(summary["results"])
+    details = result.get("results") or []
+    summary["results"].extend(details[:max(room, 0)])
+    if len(details) > room:
+        summary["results_truncated"] = True
+
+
 def send_push_fcm(payload: Dict) -> Dict:
     """
     Sends push notifications through Firebase Cloud Messaging HTTP v1 API.
     Targets from .env:
     - FCM_DEVICE_TOKENS (comma-separated)
     - FCM_TOPIC (optional)
+    plus every active registered token, streamed in pages of FCM_TOKEN_PAGE_SIZE.
     """
     env_tokens = _parse_csv(os.getenv("FCM_DEVICE_TOKENS", ""))
     include_env_tokens = (os.getenv("FCM_INCLUDE_ENV_TOKENS", "0").strip() == "1")
     topic = (os.getenv("FCM_TOPIC") or "").strip()
-    db_tokens: List[str] = []
     db_tokens_error = None
-    try:
-        from app.database import fcm_tokens_collection
 
-        db_tokens = [
-            (doc.get("token") or "").strip()
-            for doc in fcm_tokens_collection.find(
-                {"active": True},
-                {"_id": 0, "token": 1},
-            ).limit(1000)
-            if (doc.get("token") or "").strip()
-        ]
+    batches = iter_active_token_batches()
+    try:
+        first_batch = next(batches, [])
     except Exception as exc:
+        first_batch, batches = [], iter(())
         db_tokens_error = str(exc)
 
-    token_groups = [db_tokens]
-    if include_env_tokens or not db_tokens:
-        token_groups.insert(0, env_tokens)
-    device_tokens = _merge_unique_tokens(*token_groups)
-    result = send_push_fcm_to_targets(
+    env_included = include_env_tokens or not first_batch
+    env_batch = _merge_unique_tokens(env_tokens) if env_included else []
+    env_token_set = set(env_batch)
+    registered_count = len(first_batch)
+
+    summary = {
+        "ok": False,
+        "provider": "fcm",
+        "batches": 0,
+        "targets": 0,
+        "delivered_count": 0,
+        "failed_count": 0,
+        "deactivated_tokens_count": 0,
+        "results": [],
+    }
+
+    # The first request carries the env tokens and the topic.
+    first_tokens = _merge_unique_tokens(env_batch, first_batch)
+    merged_count = len(first_tokens)
+    _accumulate_result(summary, send_push_fcm_to_targets(
         payload,
-        device_tokens=device_tokens,
+        device_tokens=first_tokens,
         topic=topic,
-    )
+    ))
+
+    if "error" not in summary:
+        try:
+            for batch in batches:
+                registered_count += len(batch)
+                batch_tokens = [token for token in batch if token not in env_token_set]
+                merged_count += len(batch_tokens)
+                if batch_tokens:
+                    _accumulate_result(summary, send_push_fcm_to_targets(payload, device_tokens=batch_tokens))
+        except Exception as exc:
+            db_tokens_error = str(exc)
+
+    if summary["batches"] == 0 and "error" in summary:
+        result = {"ok": False, "provider": "fcm", "error": summary["error"]}
+    else:
+        summary.pop("error", None)
+        result = summary
+
     result["token_sources"] = {
         "env_count": len(env_tokens),
-        "env_included": include_env_tokens or not db_tokens,
-        "registered_count": len(db_tokens),
-        "merged_count": len(device_tokens),
+        "env_included": env_included,
+        "registered_count": registered_count,
+        "merged_count": merged_count,
     }
     if db_tokens_error:
         result["token_sources"]["registered_error"] = db_tokens_error
@@ -1,3 +1,5 @@
+import os
+
 import app.notifications.deliver as delivery
 
 
@@ -34,5 +36,75 @@ def run_tests():
         delivery.send_push_fcm = original_fcm
 
 
+def run_planner_tests():
+    calls = []
+
+    def fake_fcm(_payload):
+        calls.append(("per_token", None))
+        return {"ok": True, "targets": 3, "token_sources": {"registered_count": 2}}
+
+    def fake_targets(_payload, device_tokens=None, topic=None, condition=None):
+        calls.append(("targets", device_tokens or topic or condition))
+        return {"ok": True, "targets": len(device_tokens or []) or 1}
+
+    original_fcm = delivery.send_push_fcm
+    original_targets = delivery.send_push_fcm_to_targets
+    original_env = {
+        key: os.environ.get(key)
+        for key in ("FCM_TOPIC", "FCM_BROADCAST_TOPIC", "FCM_BROADCAST_CONDITION")
+    }
+    delivery.send_push_fcm = fake_fcm
+    delivery.send_push_fcm_to_targets = fake_targets
+    for key in original_env:
+        os.environ.pop(key, None)
+
+    try:
+        # No broadcast target configured: mass alerts fall back to per-token.
+        response = delivery.deliver({"channel": "ALL_CHANNELS", "severity": "EMERGENCY"})
+        assert response["fanout"] == {"mode": "per_token", "fcm_requests": 3, "registered_tokens": 2}
+
+        # FCM_TOPIC alone does not switch to broadcast: web tokens are
+        # never subscribed to it.
+        os.environ["FCM_TOPIC"] = "polaris-alerts"
+        response = delivery.deliver({"channel": "ALL_CHANNELS", "severity": "EMERGENCY"})
+        assert calls[-1] == ("per_token", None)
+        assert response["fanout"]["mode"] == "per_token"
+
+        os.environ["FCM_BROADCAST_TOPIC"] = "polaris-alerts"
+        response = delivery.deliver({"channel": "ALL_CHANNELS", "severity": "EMERGENCY"})
+        assert calls[-1] == ("targets", "polaris-alerts")
+        assert response["fanout"] == {
+            "mode": "broadcast",
+            "fcm_requests": 1,
+            "target": "topic:polaris-alerts",
+        }
+
+        os.environ["FCM_BROADCAST_CONDITION"] = "'polaris-alerts' in topics || 'zone-a' in topics"
+        response = delivery.deliver({"channel": "PUSH_SMS", "severity": "WARNING"})
+        assert response["fanout"]["target"].startswith("condition:")
+
+        # Lower severities and targeted sends stay per-token.
+        response = delivery.deliver({"channel": "PUSH_NOTIFICATION", "severity": "WATCH"})
+        assert response["fanout"]["mode"] == "per_token"
+        response = delivery.deliver({
+            "channel": "ALL_CHANNELS",
+            "severity": "EMERGENCY",
+            "device_tokens": ["token-a", "token-b"],
+        })
+        assert calls[-1] == ("targets", ["token-a", "token-b"])
+        assert response["fanout"] == {"mode": "targeted", "fcm_requests": 2}
+
+        print("All delivery planner tests passed")
+    finally:
+        delivery.send_push_fcm = original_fcm
+        delivery.send_push_fcm_to_targets = original_targets
+        for key, value in original_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
 if __name__ == "__main__":
     run_tests()
+    run_planner_tests()
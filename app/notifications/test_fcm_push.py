@@ -0,0 +1,234 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import app.notifications.fcm_push as fcm_push
+
+
+STUB_DELAY_SECONDS = 0.2
+
+
+class StubFcmHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length))
+        token = body["message"].get("token", "")
+        time.sleep(STUB_DELAY_SECONDS)
+
+        if token.startswith("stale"):
+            status, reply = 404, {"error": {"status": "NOT_FOUND", "message": "UNREGISTERED"}}
+        else:
+            status, reply = 200, {"name": f"projects/stub/messages/{token or 'topic'}"}
+
+        data = json.dumps(reply).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *_args):
+        pass
+
+
+class FakeCredentials:
+    def __init__(self):
+        self.token = None
+        self.expiry = None
+        self.refresh_calls = 0
+
+    def refresh(self, _request):
+        self.refresh_calls += 1
+        self.token = f"access-{self.refresh_calls}"
+        self.expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(hours=1)
+
+
+def run_credential_cache_tests():
+    credentials = FakeCredentials()
+    original_build = fcm_push._build_credentials
+    original_state = dict(fcm_push._credential_state)
+    fcm_push._build_credentials = lambda _file, _json: (credentials, None)
+    fcm_push._credential_state.update(source_key=None, credentials=None, refreshing=False)
+
+    try:
+        # First call mints, later calls reuse the cached token.
+        assert fcm_push._cached_access_token("", "{}") == ("access-1", None)
+        assert fcm_push._cached_access_token("", "{}") == ("access-1", None)
+        assert credentials.refresh_calls == 1
+
+        # Inside the refresh margin: the old token is served while a
+        # background refresh mints the next one.
+        credentials.expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=90)
+        assert fcm_push._cached_access_token("", "{}") == ("access-1", None)
+        deadline = time.monotonic() + 2
+        while credentials.refresh_calls < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert credentials.refresh_calls == 2
+        assert fcm_push._cached_access_token("", "{}") == ("access-2", None)
+
+        # Expired: the caller waits for a fresh token.
+        credentials.expiry = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=1)
+        assert fcm_push._cached_access_token("", "{}") == ("access-3", None)
+
+        print("All FCM credential cache tests passed")
+    finally:
+        fcm_push._build_credentials = original_build
+        fcm_push._credential_state.update(original_state)
+
+
+class FakeTokenCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, key, direction):
+        self.docs = sorted(self.docs, key=lambda doc: doc[key], reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        self.docs = self.docs[:count]
+        return self
+
+    def __iter__(self):
+        return iter(self.docs)
+
+
+class FakeTokenCollection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.queries = []
+
+    def find(self, query, _projection):
+        self.queries.append(query)
+        after = query.get("_id", {}).get("$gt", -1)
+        return FakeTokenCursor([
+            doc for doc in self.docs
+            if doc["active"] is query["active"] and doc["_id"] > after
+        ])
+
+
+def run_token_paging_tests():
+    import app.database as database
+
+    docs = [{"_id": index, "token": f"token-{index}", "active": index % 10 != 0} for index in range(1, 26)]
+    collection = FakeTokenCollection(docs)
+    original_collection = database.fcm_tokens_collection
+    database.fcm_tokens_collection = collection
+
+    try:
+        batches = list(fcm_push.iter_active_token_batches(page_size=10))
+        assert [len(batch) for batch in batches] == [10, 10, 3]
+        assert sum(batches, []) == [doc["token"] for doc in docs if doc["active"]]
+        assert collection.queries[1] == {"active": True, "_id": {"$gt": 11}}
+    finally:
+        database.fcm_tokens_collection = original_collection
+
+    sent = []
+
+    def fake_targets(_payload, device_tokens=None, topic=None):
+        sent.append((list(device_tokens or []), topic))
+        results = [{"target": f"token:{token}", "ok": True} for token in device_tokens]
+        return {
+            "ok": True,
+            "provider": "fcm",
+            "targets": len(results),
+            "delivered_count": len(results),
+            "failed_count": 0,
+            "deactivated_tokens_count": 0,
+            "results": results,
+        }
+
+    original_batches = fcm_push.iter_active_token_batches
+    original_targets = fcm_push.send_push_fcm_to_targets
+    original_limit = fcm_push.FCM_RESULT_DETAIL_LIMIT
+    original_topic = os.environ.get("FCM_TOPIC")
+    fcm_push.iter_active_token_batches = lambda: iter([["a", "b"], ["c", "d"], ["e"]])
+    fcm_push.send_push_fcm_to_targets = fake_targets
+    fcm_push.FCM_RESULT_DETAIL_LIMIT = 3
+    os.environ["FCM_TOPIC"] = "polaris-alerts"
+
+    try:
+        result = fcm_push.send_push_fcm({"message": "Paged"})
+        # Topic rides along with the first batch only.
+        assert sent == [(["a", "b"], "polaris-alerts"), (["c", "d"], None), (["e"], None)]
+        assert result["batches"] == 3
+        assert result["delivered_count"] == 5
+        assert len(result["results"]) == 3
+        assert result["results_truncated"] is True
+        assert result["token_sources"]["registered_count"] == 5
+
+        print("All FCM token paging tests passed")
+    finally:
+        fcm_push.iter_active_token_batches = original_batches
+        fcm_push.send_push_fcm_to_targets = original_targets
+        fcm_push.FCM_RESULT_DETAIL_LIMIT = original_limit
+        if original_topic is None:
+            os.environ.pop("FCM_TOPIC", None)
+        else:
+            os.environ["FCM_TOPIC"] = original_topic
+
+
+def run_tests():
+    run_credential_cache_tests()
+    run_token_paging_tests()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubFcmHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    deactivated = []
+    original_token_loader = fcm_push._cached_access_token
+    original_deactivate = fcm_push._deactivate_stale_tokens
+    original_env = {
+        key: os.environ.get(key)
+        for key in ("FCM_PROJECT_ID", "FCM_SERVICE_ACCOUNT_JSON", "FCM_SERVICE_ACCOUNT_FILE", "FCM_API_BASE_URL")
+    }
+    fcm_push._cached_access_token = lambda _file, _json: ("stub-access-token", None)
+    fcm_push._deactivate_stale_tokens = lambda tokens, reason: deactivated.extend(tokens) or len(tokens)
+    os.environ.update({
+        "FCM_PROJECT_ID": "stub",
+        "FCM_SERVICE_ACCOUNT_JSON": "{}",
+        "FCM_SERVICE_ACCOUNT_FILE": "",
+        "FCM_API_BASE_URL": f"http://127.0.0.1:{server.server_port}",
+    })
+
+    try:
+        tokens = [f"device-token-{index:03d}" for index in range(20)] + ["stale-token-001"]
+        started = time.monotonic()
+        result = fcm_push.send_push_fcm_to_targets(
+            {"title": "Test", "message": "Fan-out", "severity": "EMERGENCY"},
+            device_tokens=tokens,
+            topic="polaris-alerts",
+        )
+        elapsed = time.monotonic() - started
+
+        assert result["ok"] is True
+        assert result["targets"] == 22
+        assert result["delivered_count"] == 21
+        assert result["failed_count"] == 1
+        assert result["deactivated_tokens_count"] == 1
+        assert deactivated == ["stale-token-001"]
+
+        # Results keep target order: tokens first, topic last.
+        assert result["results"][0]["name"] == "projects/stub/messages/device-token-000"
+        assert result["results"][20]["status_code"] == 404
+        assert result["results"][-1]["target"].startswith("topic:")
+
+        # A sequential loop would need targets * delay.
+        assert elapsed < 22 * STUB_DELAY_SECONDS / 2, elapsed
+
+        print("All FCM fan-out tests passed")
+    finally:
+        fcm_push._cached_access_token = original_token_loader
+        fcm_push._deactivate_stale_tokens = original_deactivate
+        for key, value in original_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -1,22 +1,10 @@
-import json
 import os
 from valkey import Valkey
 
+# Decisions are published here by app.services.event_hub.
 CHANNEL = os.getenv("POLARIS_VALKEY_CHANNEL", "polaris:decisions")
 
-def get_client() -> Valkey:
+def get_client(**options) -> Valkey:
     host = os.getenv("VALKEY_HOST", "127.0.0.1")
     port = int(os.getenv("VALKEY_PORT", "6379"))
-    return Valkey(host=host, port=port, decode_responses=True)
-
-def publish_decision(decision: dict) -> None:
-    """
-    Publish the final decision JSON to Valkey Pub/Sub.
-    """
-    try:
-        client = get_client()
-        client.publish(CHANNEL, json.dumps(decision))
-    except Exception:
-        # Valkey is optional for the current auto-dispatch flow.
-        # If unavailable, do not block camera processing/alerts.
-        return
+    return Valkey(host=host, port=port, decode_responses=True, **options)
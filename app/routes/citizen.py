@@ -8,8 +8,11 @@ from pydantic import BaseModel, Field
 
 from app.auth.jwt_handler import require_authority
 from app.config import get_settings
-from app.database import citizen_reports_collection, help_requests_collection
+from app.database import citizen_reports_collection, geo_point, help_requests_collection
+from app.services.event_hub import publish_event
 from app.upload_security import save_image_upload
+from app.utils.fusion_logic import record_water_report
+from app.utils.location_stats import record_location_report
 
 router = APIRouter(prefix="/input/citizen", tags=["Citizen Inputs"])
 
@@ -57,7 +60,9 @@ async def citizen_image(
 @router.post("/water-level")
 async def citizen_water_level(
     zone_id: str = Form(...),
-    level: str = Form(...)
+    level: str = Form(...),
+    lat: float | None = Form(None, ge=-90, le=90),
+    lng: float | None = Form(None, ge=-180, le=180),
 ):
     timestamp = datetime.now()
 
@@ -68,8 +73,14 @@ async def citizen_water_level(
         "timestamp": timestamp,
         "verified": False
     }
+    if lat is not None and lng is not None:
+        doc["lat"] = lat
+        doc["lng"] = lng
 
     citizen_reports_collection.insert_one(doc)
+    record_water_report(zone_id, level, timestamp)
+    if lat is not None and lng is not None:
+        record_location_report(lat, lng, level, timestamp)
 
     return {
         "message": "Water level report received",
@@ -82,8 +93,8 @@ async def citizen_water_level(
 async def citizen_help_request(
     category: str = Form(...),
     contact_number: str = Form(...),
-    lat: float | None = Form(None),
-    lng: float | None = Form(None),
+    lat: float | None = Form(None, ge=-90, le=90),
+    lng: float | None = Form(None, ge=-180, le=180),
 ):
     normalized_category = category.strip()
     normalized_contact = contact_number.strip()
@@ -104,8 +115,19 @@ async def citizen_help_request(
         "created_at": timestamp,
         "updated_at": timestamp,
     }
+    location = geo_point(lat, lng)
+    if location is not None:
+        doc["location"] = location
 
     result = help_requests_collection.insert_one(doc)
+    publish_event("help_request", {
+        "request_id": str(result.inserted_id),
+        "status": "OPEN",
+        "category": normalized_category,
+        "lat": lat,
+        "lng": lng,
+        "created_at": timestamp,
+    })
     return {
         "status": "submitted",
         "request_id": str(result.inserted_id),
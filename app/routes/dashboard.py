@@ -1,20 +1,25 @@
 from datetime import datetime, timedelta
-from math import asin, cos, radians, sin, sqrt
 
 from bson import ObjectId
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, Field
 
 from app.auth.jwt_handler import require_authority
 from app.database import (
+    geo_point,
     help_requests_collection,
     predictions_collection,
     rescue_teams_collection,
     team_notifications_collection,
 )
+from app.services.event_hub import publish_event
+from app.services.prediction_rollups import rollup_series
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
+# "raw" returns every prediction; "minute"/"hour" return rollup buckets.
+RESOLUTION_PATTERN = "^(raw|minute|hour)$"
+
 
 def _to_iso(value):
     if isinstance(value, datetime):
@@ -55,16 +60,24 @@ def _serialize_team(doc: dict) -> dict:
     }
 
 
-def _distance_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
-    # Haversine distance in kilometers.
-    r = 6371.0
-    dlat = radians(lat2 - lat1)
-    dlng = radians(lng2 - lng1)
-    a = (
-        sin(dlat / 2) ** 2
-        + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlng / 2) ** 2
-    )
-    return 2 * r * asin(sqrt(a))
+def nearby_teams_pipeline(near: dict, radius_km: float) -> list[dict]:
+    """
+    $geoNear over the rescue_teams 2dsphere index: only active teams
+    inside the radius come back, nearest first, with `distance_m`.
+    """
+    return [
+        {
+            "$geoNear": {
+                "near": near,
+                "key": "location",
+                "distanceField": "distance_m",
+                "maxDistance": radius_km * 1000,
+                "spherical": True,
+                "query": {"status": {"$in": ["AVAILABLE", "DEPLOYED"]}},
+            }
+        },
+        {"$project": {"team_id": 1, "distance_m": 1}},
+    ]
 
 
 def _seed_default_teams_if_empty() -> None:
@@ -81,6 +94,7 @@ def _seed_default_teams_if_empty() -> None:
                 "status": "AVAILABLE",
                 "lat": 19.0896,
                 "lng": 72.8656,
+                "location": geo_point(19.0896, 72.8656),
                 "contact_number": "1001",
                 "updated_at": now,
             },
@@ -91,6 +105,7 @@ def _seed_default_teams_if_empty() -> None:
                 "status": "AVAILABLE",
                 "lat": 19.0623,
                 "lng": 72.8792,
+                "location": geo_point(19.0623, 72.8792),
                 "contact_number": "1002",
                 "updated_at": now,
             },
@@ -101,6 +116,7 @@ def _seed_default_teams_if_empty() -> None:
                 "status": "DEPLOYED",
                 "lat": 19.1044,
                 "lng": 72.9012,
+                "location": geo_point(19.1044, 72.9012),
                 "contact_number": "1003",
                 "updated_at": now,
             },
@@ -113,8 +129,8 @@ class TeamUpsertRequest(BaseModel):
     name: str = Field(..., min_length=2, max_length=80)
     members_count: int = Field(..., ge=1, le=100)
     status: str = Field(default="AVAILABLE")
-    lat: float
-    lng: float
+    lat: float = Field(..., ge=-90, le=90)
+    lng: float = Field(..., ge=-180, le=180)
     contact_number: str | None = Field(default=None, max_length=30)
 
 
@@ -131,9 +147,25 @@ class NotifyNearbyRequest(BaseModel):
 
 
 @router.get("/risk-timeseries")
-def risk_timeseries(minutes: int = 60):
+def risk_timeseries(minutes: int = 60, resolution: str = Query(default="raw", pattern=RESOLUTION_PATTERN)):
     since = datetime.now() - timedelta(minutes=minutes)
 
+    if resolution != "raw":
+        return [
+            {
+                "time": bucket["time"],
+                "risk_score": bucket["risk_score"]["mean"],
+                "risk": bucket["risk_score"]["mean"],
+                "risk_min": bucket["risk_score"]["min"],
+                "risk_max": bucket["risk_score"]["max"],
+                "ensemble_score": bucket["ensemble_score"]["mean"],
+                "level": bucket["risk_level"],
+                "levels": bucket["levels"],
+                "count": bucket["count"],
+            }
+            for bucket in rollup_series(resolution, since)
+        ]
+
     cursor = predictions_collection.find(
         {"timestamp": {"$gte": since}},
         {"_id": 0, "timestamp": 1, "risk_score": 1, "ensemble_score": 1, "risk_level": 1},
@@ -156,9 +188,22 @@ def risk_timeseries(minutes: int = 60):
 
 
 @router.get("/confidence-timeseries")
-def confidence_timeseries(minutes: int = 60):
+def confidence_timeseries(minutes: int = 60, resolution: str = Query(default="raw", pattern=RESOLUTION_PATTERN)):
     since = datetime.now() - timedelta(minutes=minutes)
 
+    if resolution != "raw":
+        return [
+            {
+                "time": bucket["time"],
+                "confidence": bucket["confidence"]["mean"],
+                "confidence_min": bucket["confidence"]["min"],
+                "confidence_max": bucket["confidence"]["max"],
+                "count": bucket["count"],
+            }
+            for bucket in rollup_series(resolution, since)
+            if bucket["confidence"]["mean"] is not None
+        ]
+
     cursor = predictions_collection.find(
         {"timestamp": {"$gte": since}},
         {"_id": 0, "timestamp": 1, "confidence": 1},
@@ -188,9 +233,16 @@ def current_status():
 
 
 @router.get("/eta-timeseries")
-def eta_timeseries(minutes: int = 60):
+def eta_timeseries(minutes: int = 60, resolution: str = Query(default="raw", pattern=RESOLUTION_PATTERN)):
     since = datetime.now() - timedelta(minutes=minutes)
 
+    if resolution != "raw":
+        return [
+            {"time": bucket["time"], "eta": bucket["eta"], "count": bucket["count"]}
+            for bucket in rollup_series(resolution, since)
+            if bucket["eta"] is not None
+        ]
+
     cursor = predictions_collection.find(
         {"timestamp": {"$gte": since}},
         {"_id": 0, "timestamp": 1, "eta": 1},
@@ -238,6 +290,7 @@ def upsert_team(payload: TeamUpsertRequest, _: dict = Depends(require_authority)
                 "status": status,
                 "lat": payload.lat,
                 "lng": payload.lng,
+                "location": geo_point(payload.lat, payload.lng),
                 "contact_number": (payload.contact_number or "").strip() or None,
                 "updated_at": now,
             },
@@ -293,6 +346,12 @@ def assign_team_to_help_request(
         },
     )
 
+    publish_event("help_request", {
+        "request_id": request_id,
+        "status": "ASSIGNED",
+        "assigned_team_id": team_id,
+        "updated_at": now,
+    })
     return {"status": "assigned", "request_id": request_id, "team_id": team_id}
 
 
@@ -311,56 +370,49 @@ def notify_nearby_teams(
     if not req_doc:
         raise HTTPException(status_code=404, detail=f"Help request not found: {request_id}")
 
-    req_lat = req_doc.get("lat")
-    req_lng = req_doc.get("lng")
-    if req_lat is None or req_lng is None:
+    near = req_doc.get("location") or geo_point(req_doc.get("lat"), req_doc.get("lng"))
+    if near is None:
         raise HTTPException(
             status_code=400,
             detail="Cannot notify nearby teams: request has no location",
         )
 
-    teams = list(
-        rescue_teams_collection.find(
-            {"status": {"$in": ["AVAILABLE", "DEPLOYED"]}},
-        )
-    )
+    teams = rescue_teams_collection.aggregate(nearby_teams_pipeline(near, payload.radius_km))
 
     now = datetime.now()
+    message = payload.message or (
+        f"Nearby help request ({req_doc.get('category', 'General')}) is open."
+    )
     notifications = []
     notified = []
     for team in teams:
-        team_lat = team.get("lat")
-        team_lng = team.get("lng")
-        if team_lat is None or team_lng is None:
-            continue
-        distance_km = _distance_km(float(req_lat), float(req_lng), float(team_lat), float(team_lng))
-        if distance_km > payload.radius_km:
-            continue
-
         team_id = str(team.get("team_id"))
-        message = payload.message or (
-            f"Nearby help request ({req_doc.get('category', 'General')}) is open."
-        )
+        distance_km = round(team["distance_m"] / 1000, 3)
         notifications.append(
             {
                 "team_id": team_id,
                 "request_id": request_id,
-                "distance_km": round(distance_km, 3),
+                "distance_km": distance_km,
                 "status": "SENT",
                 "message": message,
                 "author": payload.author.strip(),
                 "created_at": now,
             }
         )
-        notified.append({"team_id": team_id, "distance_km": round(distance_km, 3)})
-
-        rescue_teams_collection.update_one(
-            {"team_id": team_id},
-            {"$set": {"last_notified_at": now, "updated_at": now}},
-        )
+        notified.append({"team_id": team_id, "distance_km": distance_km})
 
     if notifications:
         team_notifications_collection.insert_many(notifications)
+        rescue_teams_collection.update_many(
+            {"team_id": {"$in": [item["team_id"] for item in notified]}},
+            {"$set": {"last_notified_at": now, "updated_at": now}},
+        )
+    publish_event("help_request", {
+        "request_id": request_id,
+        "status": req_doc.get("status"),
+        "notified_teams": [item["team_id"] for item in notified],
+        "updated_at": now,
+    })
 
     return {
         "status": "notified",
@@ -4,6 +4,7 @@ from bson import ObjectId
 from app.auth.jwt_handler import require_authority
 from app.database import feedback_collection, predictions_collection, active_learning_collection
 from app.services.ml_admin_service import maybe_trigger_auto_retrain
+from app.utils.active_learning import record_feedback_label
 
 router = APIRouter(
     prefix="/authority/feedback",
@@ -24,6 +25,7 @@ async def submit_feedback(
     }
 
     feedback_collection.insert_one(doc)
+    record_feedback_label(normalized_label)
     auto_job = None
     try:
         pid = ObjectId(prediction_id)
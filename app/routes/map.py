@@ -1,71 +1,27 @@
-from fastapi import APIRouter, Depends
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Request
 
 from app.auth.jwt_handler import require_authority
-from app.database import safezones_collection
-from app.utils.safezone_detector import (
-    filter_low_risk,
-    filter_historical,
-    filter_stable,
-    cluster_safezones,
-    rank_safezones,
-    persist_safezones
-)
+from app.http_cache import etag_response
+from app.services.map_tiles import MAP_TILE_CACHE_SECONDS, cached_tile
+from app.services.safezone_job import cached_active_safezones, latest_auto_safezones
 
 router = APIRouter(prefix="/map", tags=["Map"])
 
 
 # =========================================================
-# AUTO SAFE ZONE DETECTION (WRITE + RETURN)
+# AUTO SAFE ZONE DETECTION (READ LAST RUN)
 # =========================================================
 @router.get(
     "/safe-zones/auto",
     summary="Auto-detected Safe Zones",
-    description="Runs safe-zone detection logic, persists valid zones, and returns results."
+    description=(
+        "Returns the zones from the last scheduled detection run "
+        "(POLARIS_SAFEZONE_REFRESH_SECONDS). Supports If-None-Match."
+    )
 )
-def get_auto_safezones(_: dict = Depends(require_authority)):
-    # -----------------------------
-    # MOCK DATA (REPLACE LATER)
-    # -----------------------------
-    live_points = [
-        {"lat": 19.0760, "lng": 72.8777, "risk_score": 0.2},
-        {"lat": 19.0780, "lng": 72.8800, "risk_score": 0.25},
-        {"lat": 19.0700, "lng": 72.8700, "risk_score": 0.6},
-    ]
-
-    historical_events = [
-        {"lat": 19.0705, "lng": 72.8710}
-    ]
-
-    risk_history = {
-        "19.0760_72.8777": [0.30, 0.28, 0.25, 0.22],
-        "19.0780_72.8800": [0.35, 0.30, 0.27, 0.25],
-    }
-
-    # -----------------------------
-    # PIPELINE
-    # -----------------------------
-    low = filter_low_risk(live_points)
-    hist = filter_historical(low, historical_events)
-    stable = filter_stable(hist, risk_history)
-
-    if not stable:
-        return []
-
-    clusters = cluster_safezones(stable)
-    if not clusters:
-        return []
-
-    ranked = rank_safezones(clusters)
-    if not ranked:
-        return []
-
-    # -----------------------------
-    # PERSIST (AUTO ONLY)
-    # -----------------------------
-    persist_safezones(ranked, safezones_collection)
-
-    return ranked
+def get_auto_safezones(request: Request, _: dict = Depends(require_authority)):
+    latest = latest_auto_safezones()
+    return etag_response(request, latest["zones"], latest["etag"])
 
 
 # =========================================================
@@ -75,29 +31,39 @@ def get_auto_safezones(_: dict = Depends(require_authority)):
     "/safe-zones",
     tags=["Map"],
     summary="Active Safe Zones",
-    description="Returns active, non-expired safe zones for dashboard and alerts."
+    description="Returns active, non-expired safe zones for dashboard and alerts. Supports If-None-Match."
 )
-def get_active_safezones():
-    now = datetime.now()
+def get_active_safezones(request: Request):
+    active = cached_active_safezones()
+    return etag_response(request, active["zones"], active["etag"])
 
-    zones = list(
-        safezones_collection.find(
-            {
-                "active": True,
-                "$or": [
-                    {"source": "MANUAL"},
-                    {"expires_at": {"$gt": now}}
-                ]
-            },
-            {"_id": 0}
-        )
-    )
 
-    # Manual zones first (override order for guidance)
-    zones.sort(key=lambda z: 0 if z["source"] == "MANUAL" else 1)
-
-    return zones if zones else []
 
+# =========================================================
+# AGGREGATED MAP TILES
+# =========================================================
+@router.get(
+    "/tiles/{layer}/{z}/{x}/{y}",
+    summary="Aggregated Map Tile",
+    description=(
+        "XYZ tile of a map layer (live-risk, historical-events, safe-zones) "
+        "aggregated into a 16x16 grid: each cell is [lat, lng, count, "
+        "max_risk, mean_risk]. Cacheable; supports If-None-Match."
+    )
+)
+def get_map_tile(request: Request, layer: str, z: int, x: int, y: int):
+    try:
+        built = cached_tile(layer, z, x, y)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown map layer: {layer}") from None
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from None
+    return etag_response(
+        request,
+        built["tile"],
+        built["etag"],
+        cache_control=f"public, max-age={MAP_TILE_CACHE_SECONDS}",
+    )
 
 
 # =========================================================
@@ -4,11 +4,12 @@ from app.auth.jwt_handler import require_authority
 from app.database import (
     overrides_collection,
     alerts_collection,
-    predictions_collection,
 )
 from app.notifications.alert_engine import build_alert_payload
-from app.notifications.deliver import deliver
-from app.notifications.valkey_pub import publish_decision
+from app.services.alert_outbox import enqueue_alert
+from app.services.decision_snapshot import publish_latest_decision, refresh_decision_snapshot
+from app.services.event_hub import publish_event
+from app.services.override_state import current_override, refresh_active_override
 
 router = APIRouter(
     prefix="/override",
@@ -38,7 +39,7 @@ def set_override(payload: dict):
     }
 
     # If the same override is already active, skip duplicate set/dispatch.
-    active_override = overrides_collection.find_one({"active": True})
+    active_override = current_override()
     if active_override:
         active_signature = {
             "risk_level": (active_override.get("risk_level") or "").strip().upper(),
@@ -67,6 +68,7 @@ def set_override(payload: dict):
     }
 
     overrides_collection.insert_one(doc)
+    refresh_active_override()
 
     # Push manual override into the same decision/alert pipeline immediately.
     final_decision = {
@@ -78,10 +80,17 @@ def set_override(payload: dict):
         "decision_mode": "MANUAL_OVERRIDE",
         "justification": f"Manual override by {doc.get('author', 'Authority')}: {doc.get('reason', '')}",
     }
+    publish_event("override", {
+        "active": True,
+        "risk_level": doc["risk_level"],
+        "alert_severity": doc["alert_severity"],
+        "reason": doc["reason"],
+        "author": doc["author"],
+    })
+    publish_latest_decision(final_decision)
 
     alert_status = "no_alert"
     try:
-        publish_decision(final_decision)
         alert_payload = build_alert_payload(final_decision)
         if alert_payload:
             latest_manual_alert = alerts_collection.find_one(
@@ -93,22 +102,13 @@ def set_override(payload: dict):
                latest_manual_alert.get("message") == alert_payload.get("message"):
                 return {"status": "override_set", "alert_dispatch": "duplicate_ignored"}
 
-            alert_doc = {
+            enqueue_alert({
                 "channel": alert_payload.get("channel"),
                 "severity": alert_payload.get("severity"),
                 "message": alert_payload.get("message"),
-                "timestamp": datetime.now(),
-                "status": "queued",
                 "source": "MANUAL_OVERRIDE",
-            }
-            result = alerts_collection.insert_one(alert_doc)
-            delivery_result = deliver(alert_payload)
-            new_status = "sent" if delivery_result.get("ok") else "failed"
-            alerts_collection.update_one(
-                {"_id": result.inserted_id},
-                {"$set": {"status": new_status, "delivery": delivery_result}},
-            )
-            alert_status = new_status
+            })
+            alert_status = "queued"
     except Exception:
         alert_status = "dispatch_failed"
 
@@ -125,14 +125,11 @@ def _clear_override_state():
             }
         }
     )
-
-    latest_prediction = predictions_collection.find_one({}, sort=[("timestamp", -1)])
-    latest_final_decision = (
-        latest_prediction.get("final_decision")
-        if latest_prediction else None
-    )
-    if isinstance(latest_final_decision, dict):
-        publish_decision(latest_final_decision)
+    refresh_active_override()
+    snapshot = refresh_decision_snapshot()
+    publish_event("override", {"active": False})
+    if snapshot["decision"] is not None:
+        publish_event("decision", snapshot["decision"])
 
     return {"status": "override_cleared"}
 
@@ -2,7 +2,8 @@ from fastapi import APIRouter, Body, Depends
 from pydantic import BaseModel, Field
 from datetime import datetime
 from app.auth.jwt_handler import require_authority
-from app.database import safezones_collection
+from app.database import geo_point, safezones_collection
+from app.services.safezone_job import invalidate_safezone_cache
 
 router = APIRouter(
     prefix="/safe-zones",
@@ -44,6 +45,7 @@ def add_manual_safezone(payload: AddManualSafeZoneRequest):
         "zone_id": zone_id,
         "lat": payload.lat,
         "lng": payload.lng,
+        "location": geo_point(payload.lat, payload.lng),
         "radius": payload.radius,
 
         "confidence_score": 1.0,
@@ -60,6 +62,7 @@ def add_manual_safezone(payload: AddManualSafeZoneRequest):
     }
 
     safezones_collection.insert_one(doc)
+    invalidate_safezone_cache()
 
     return {
         "status": "added",
@@ -96,6 +99,7 @@ def disable_manual_safezone(payload: DisableSafeZoneRequest):
             "status": "not_found",
             "zone_id": payload.zone_id
         }
+    invalidate_safezone_cache()
 
     return {
         "status": "disabled",
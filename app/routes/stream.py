@@ -0,0 +1,123 @@
+import asyncio
+import json
+
+from fastapi import APIRouter, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from app.auth.jwt_handler import role_from_token
+from app.services.decision_snapshot import peek_decision_snapshot
+from app.services.event_hub import (
+    EVENT_TYPES,
+    make_event,
+    subscribe,
+    unsubscribe,
+)
+
+router = APIRouter(prefix="/stream", tags=["Live Stream"])
+
+HEARTBEAT_SECONDS = 15
+# Help requests carry contact numbers and locations.
+AUTHORITY_ONLY_TYPES = {"help_request"}
+
+
+def _bearer_token(authorization: str | None, token: str | None) -> str | None:
+    if token:
+        return token
+    if authorization and authorization.lower().startswith("bearer "):
+        return authorization[7:].strip()
+    return None
+
+
+def _allowed_types(requested: str | None, role: str | None) -> set[str]:
+    types = EVENT_TYPES
+    if requested:
+        types = {item.strip().lower() for item in requested.split(",")} & EVENT_TYPES
+    if role != "authority":
+        types = types - AUTHORITY_ONLY_TYPES
+    return types
+
+
+def _initial_events(types: set[str]) -> list[dict]:
+    # New clients get the current decision immediately instead of waiting
+    # for the next frame.
+    snapshot, _stale = peek_decision_snapshot()
+    if "decision" in types and snapshot["decision"] is not None:
+        return [make_event("decision", snapshot["decision"])]
+    return []
+
+
+@router.websocket("/decisions")
+async def stream_decisions_ws(
+    websocket: WebSocket,
+    types: str | None = Query(default=None),
+    token: str | None = Query(default=None),
+):
+    """
+    Pushes live events as JSON messages: {type, seq, timestamp, data}.
+    ?types=decision,alert narrows the event types; help_request events
+    need an authority token (?token= or Authorization header).
+    """
+    role = role_from_token(_bearer_token(websocket.headers.get("authorization"), token))
+    allowed = _allowed_types(types, role)
+    await websocket.accept()
+
+    subscription = subscribe(allowed)
+    try:
+        for event in _initial_events(allowed):
+            await websocket.send_text(json.dumps(event, default=str))
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                event = {"type": "ping"}
+            await websocket.send_text(json.dumps(event, default=str))
+    except WebSocketDisconnect:
+        pass
+    except Exception:
+        # Send on a dropped connection fails differently per server.
+        pass
+    finally:
+        unsubscribe(subscription)
+
+
+@router.get("/decisions")
+async def stream_decisions_sse(
+    request: Request,
+    types: str | None = Query(default=None),
+    token: str | None = Query(default=None),
+):
+    """
+    Server-Sent Events variant of the WebSocket stream, for EventSource
+    clients. Each event is sent with its type as the SSE event name.
+    """
+    role = role_from_token(_bearer_token(request.headers.get("authorization"), token))
+    allowed = _allowed_types(types, role)
+
+    async def event_stream():
+        subscription = subscribe(allowed)
+        try:
+            for event in _initial_events(allowed):
+                yield _sse_frame(event)
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield _sse_frame(event)
+        finally:
+            unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse_frame(event: dict) -> str:
+    return (
+        f"id: {event['seq']}\n"
+        f"event: {event['type']}\n"
+        f"data: {json.dumps(event['data'], default=str)}\n\n"
+    )
@@ -0,0 +1,88 @@
+"""
+Duplicate-alert suppression.
+
+Alerts are keyed on a hash of (severity, message). Recently dispatched
+keys are kept in an in-process TTL map. Alerts also store the key as
+`dedup_key`, indexed with timestamp, so alerts dispatched by other
+processes are found with a single index lookup instead of scanning
+message text.
+"""
+
+import hashlib
+import os
+import threading
+from datetime import datetime, timedelta
+
+from app.database import alerts_collection
+
+
+ALERT_DEDUP_SECONDS = int(os.getenv("ALERT_DEDUP_SECONDS", "180"))
+
+_seen_lock = threading.Lock()
+_seen: dict[str, datetime] = {}  # dedup_key -> dispatched_at
+
+
+def alert_dedup_key(severity: str, message: str) -> str:
+    raw = f"{(severity or '').strip().upper()}\x1f{(message or '').strip()}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _prune(now: datetime) -> None:
+    # By value, not insertion order: keys learned from Mongo carry an older
+    # dispatch time than keys recorded locally before them. Only a window's
+    # worth of alerts is held, so the scan is cheap.
+    cutoff = now - timedelta(seconds=ALERT_DEDUP_SECONDS)
+    for key in [key for key, dispatched_at in _seen.items() if dispatched_at < cutoff]:
+        del _seen[key]
+
+
+def claim_dedup_window(dedup_key: str) -> bool:
+    """
+    Returns True if an alert with this key was dispatched within the
+    window. Otherwise it records the key as dispatched now and returns
+    False, so concurrent callers in this process cannot both send it.
+    """
+    if ALERT_DEDUP_SECONDS <= 0:
+        return False
+
+    now = datetime.now()
+    window_start = now - timedelta(seconds=ALERT_DEDUP_SECONDS)
+    with _seen_lock:
+        _prune(now)
+        dispatched_at = _seen.get(dedup_key)
+        if dispatched_at is not None and dispatched_at >= window_start:
+            return True
+        _seen[dedup_key] = now
+
+    # Another process may have dispatched it.
+    try:
+        existing = alerts_collection.find_one(
+            {"dedup_key": dedup_key, "timestamp": {"$gte": window_start}},
+            sort=[("timestamp", -1)],
+            projection={"timestamp": 1},
+        )
+    except Exception:
+        # Nothing was sent: a retry must not be taken for a duplicate.
+        with _seen_lock:
+            if _seen.get(dedup_key) == now:
+                del _seen[dedup_key]
+        raise
+    if existing is None:
+        return False
+
+    with _seen_lock:
+        _seen[dedup_key] = existing["timestamp"]
+    return True
+
+
+def release_dedup_window(dedup_key: str) -> None:
+    """
+    Forgets a claimed key, e.g. when the alert could not be stored.
+    """
+    with _seen_lock:
+        _seen.pop(dedup_key, None)
+
+
+def reset_dedup_cache() -> None:
+    with _seen_lock:
+        _seen.clear()
@@ -0,0 +1,270 @@
+"""
+Durable alert outbox.
+
+Alerts are inserted as `queued` and delivered by a small pool of worker
+threads, so request handlers never wait on FCM. Each worker claims the
+highest-severity due alert with find_one_and_update and holds a lease on
+it while delivering. A lease that expires (worker crash, process restart)
+makes the alert claimable again. Failed deliveries are rescheduled with
+exponential backoff up to the retry limit and then marked `failed`.
+
+Alerts written before the outbox existed have no next_attempt_at and
+are moved into it once at startup (requeue_legacy_alerts).
+"""
+
+import os
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+
+from app.database import alerts_collection
+from app.notifications.deliver import deliver
+from app.notifications.thresholds import SEVERITY_ORDER
+from app.services.event_hub import publish_event
+
+
+ALERT_OUTBOX_WORKERS = max(1, int(os.getenv("ALERT_OUTBOX_WORKERS", "2")))
+ALERT_OUTBOX_LEASE_SECONDS = max(10, int(os.getenv("ALERT_OUTBOX_LEASE_SECONDS", "120")))
+ALERT_OUTBOX_POLL_SECONDS = max(0.1, float(os.getenv("ALERT_OUTBOX_POLL_SECONDS", "2")))
+ALERT_OUTBOX_BACKOFF_SECONDS = max(1, int(os.getenv("ALERT_OUTBOX_BACKOFF_SECONDS", "5")))
+ALERT_OUTBOX_BACKOFF_MAX_SECONDS = max(1, int(os.getenv("ALERT_OUTBOX_BACKOFF_MAX_SECONDS", "300")))
+ALERT_RETRY_ENABLED = (os.getenv("ALERT_RETRY_ENABLED", "1").strip() == "1")
+ALERT_RETRY_MAX_ATTEMPTS = max(1, int(os.getenv("ALERT_RETRY_MAX_ATTEMPTS", "3")))
+
+# One first attempt plus the configured retries.
+ALERT_MAX_DELIVERIES = 1 + (ALERT_RETRY_MAX_ATTEMPTS if ALERT_RETRY_ENABLED else 0)
+# Pre-outbox alerts older than this are closed rather than sent late.
+LEGACY_ALERT_MAX_AGE = timedelta(hours=1)
+
+_owner_prefix = uuid.uuid4().hex[:8]
+_wake_event = threading.Event()
+_stop_event = threading.Event()
+_workers: list[threading.Thread] = []
+
+_state_lock = threading.Lock()
+_state = {
+    "enqueued": 0,
+    "sent": 0,
+    "rescheduled": 0,
+    "failed": 0,
+    "lease_lost": 0,
+    "last_error": None,
+}
+
+
+def severity_priority(severity: str | None) -> int:
+    try:
+        return SEVERITY_ORDER.index((severity or "").upper())
+    except ValueError:
+        return 0
+
+
+def backoff_seconds(attempts: int) -> int:
+    return min(
+        ALERT_OUTBOX_BACKOFF_MAX_SECONDS,
+        ALERT_OUTBOX_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0),
+    )
+
+
+def enqueue_alert(alert_doc: dict):
+    """
+    Stores an alert for delivery and returns its _id.
+    """
+    now = datetime.now()
+    doc = {
+        **alert_doc,
+        "status": "queued",
+        "priority": severity_priority(alert_doc.get("severity")),
+        "attempts": 0,
+        "retry_count": 0,
+        "next_attempt_at": now,
+    }
+    doc.setdefault("timestamp", now)
+    result = alerts_collection.insert_one(doc)
+
+    with _state_lock:
+        _state["enqueued"] += 1
+    _wake_event.set()
+    _publish_alert_event(doc, "queued")
+    return result.inserted_id
+
+
+def _publish_alert_event(alert: dict, status: str) -> None:
+    publish_event("alert", {
+        "alert_id": str(alert.get("_id")),
+        "status": status,
+        "severity": alert.get("severity"),
+        "channel": alert.get("channel"),
+        "message": alert.get("message"),
+        "source": alert.get("source"),
+        "timestamp": alert.get("timestamp"),
+    })
+
+
+def claim_next_alert(owner: str):
+    now = datetime.now()
+    return alerts_collection.find_one_and_update(
+        {
+            "$or": [
+                {"status": "queued", "next_attempt_at": {"$lte": now}},
+                {"status": "sending", "lease_expires_at": {"$lte": now}},
+            ]
+        },
+        {
+            "$set": {
+                "status": "sending",
+                "lease_owner": owner,
+                "lease_expires_at": now + timedelta(seconds=ALERT_OUTBOX_LEASE_SECONDS),
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("priority", -1), ("next_attempt_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def requeue_legacy_alerts(now: datetime | None = None) -> dict:
+    """
+    Moves pre-outbox `queued`/`failed` alerts (no next_attempt_at) into
+    the outbox. Recent ones with deliveries left, which the old retry
+    worker would have retried, become `queued`; the rest are closed as
+    `failed`. Each alert is migrated once, by whichever process gets to
+    it first.
+    """
+    now = now or datetime.now()
+    counts = {"requeued": 0, "closed": 0}
+    legacy = alerts_collection.find(
+        {"status": {"$in": ["queued", "failed"]}, "next_attempt_at": {"$exists": False}},
+        {"status": 1, "severity": 1, "retry_count": 1, "timestamp": 1},
+    )
+    for alert in legacy:
+        # A legacy `failed` alert had its first delivery plus retry_count retries.
+        deliveries = int(alert.get("retry_count") or 0) + (1 if alert["status"] == "failed" else 0)
+        timestamp = alert.get("timestamp")
+        recent = isinstance(timestamp, datetime) and now - timestamp <= LEGACY_ALERT_MAX_AGE
+        if recent and deliveries < ALERT_MAX_DELIVERIES:
+            update = {
+                "status": "queued",
+                "priority": severity_priority(alert.get("severity")),
+                "attempts": deliveries,
+                "next_attempt_at": now,
+            }
+            outcome = "requeued"
+        else:
+            update = {"status": "failed", "next_attempt_at": None}
+            outcome = "closed"
+        result = alerts_collection.update_one(
+            {"_id": alert["_id"], "next_attempt_at": {"$exists": False}},
+            {"$set": update},
+        )
+        counts[outcome] += result.modified_count
+
+    if counts["requeued"]:
+        _wake_event.set()
+    return counts
+
+
+def _finish(alert: dict, owner: str, update: dict, counter: str) -> None:
+    # Only the current lease holder may record the outcome.
+    result = alerts_collection.update_one(
+        {"_id": alert["_id"], "status": "sending", "lease_owner": owner},
+        {
+            "$set": update,
+            "$unset": {"lease_owner": "", "lease_expires_at": ""},
+        },
+    )
+    with _state_lock:
+        _state[counter if result.modified_count else "lease_lost"] += 1
+    if result.modified_count and update["status"] != "queued":
+        _publish_alert_event(alert, update["status"])
+
+
+def deliver_claimed_alert(alert: dict, owner: str) -> None:
+    payload = {
+        "severity": alert.get("severity"),
+        "channel": alert.get("channel"),
+        "message": alert.get("message"),
+        "title": alert.get("title"),
+    }
+    try:
+        delivery_result = deliver(payload)
+    except Exception as exc:
+        delivery_result = {"ok": False, "error": str(exc)}
+
+    attempts = int(alert.get("attempts") or 1)
+    now = datetime.now()
+    update = {
+        "delivery": delivery_result,
+        "retry_count": attempts - 1,
+        "last_attempt_at": now,
+    }
+
+    if delivery_result.get("ok"):
+        _finish(alert, owner, {**update, "status": "sent", "sent_at": now}, "sent")
+    elif attempts < ALERT_MAX_DELIVERIES:
+        update["status"] = "queued"
+        update["next_attempt_at"] = now + timedelta(seconds=backoff_seconds(attempts))
+        _finish(alert, owner, update, "rescheduled")
+    else:
+        _finish(alert, owner, {**update, "status": "failed"}, "failed")
+
+
+def _outbox_worker(owner: str) -> None:
+    while not _stop_event.is_set():
+        try:
+            alert = claim_next_alert(owner)
+            if alert is not None:
+                deliver_claimed_alert(alert, owner)
+                continue
+        except Exception as exc:
+            with _state_lock:
+                _state["last_error"] = f"{exc}\n{traceback.format_exc()}"
+            _stop_event.wait(ALERT_OUTBOX_POLL_SECONDS)
+            continue
+
+        # Idle: sleep until an enqueue wakes us or the poll interval passes
+        # (alerts enqueued by other processes, backoff timers, expired leases).
+        _wake_event.wait(ALERT_OUTBOX_POLL_SECONDS)
+        _wake_event.clear()
+
+
+def start_alert_outbox_workers() -> None:
+    if _workers:
+        return
+    _stop_event.clear()
+    for index in range(ALERT_OUTBOX_WORKERS):
+        thread = threading.Thread(
+            target=_outbox_worker,
+            args=(f"{_owner_prefix}-{index + 1}",),
+            daemon=True,
+            name=f"alert-outbox-{index + 1}",
+        )
+        thread.start()
+        _workers.append(thread)
+
+
+def stop_alert_outbox_workers(timeout: float = 5.0) -> None:
+    """
+    Stops workers after their current delivery (up to timeout). Alerts
+    still leased when the process exits are picked up again once the
+    lease expires.
+    """
+    _stop_event.set()
+    _wake_event.set()
+    deadline = time.monotonic() + timeout
+    for thread in _workers:
+        thread.join(timeout=max(0.0, deadline - time.monotonic()))
+    _workers.clear()
+
+
+def get_outbox_metrics() -> dict:
+    with _state_lock:
+        metrics = _state.copy()
+    metrics["workers"] = ALERT_OUTBOX_WORKERS
+    metrics["lease_seconds"] = ALERT_OUTBOX_LEASE_SECONDS
+    metrics["max_deliveries"] = ALERT_MAX_DELIVERIES
+    return metrics
@@ -0,0 +1,194 @@
+"""
+In-process snapshot of the latest final_decision.
+
+The camera pipeline and override handlers publish every decision here,
+so GET /decision/latest is served from memory with an ETag and can
+long-poll for the next version. A snapshot older than
+DECISION_SNAPSHOT_TTL_SECONDS is reloaded from Mongo, which keeps
+workers that do not ingest frames themselves reasonably current.
+
+Concurrent pollers of a stale snapshot share one reload (single-flight).
+A reload never moves the snapshot backwards: it is dropped when a newer
+decision was published while it ran, or when it found an older decision
+from the same source (e.g. the latest frame's prediction is still queued
+for persistence). A switch between override and automated decisions
+always applies, since current_override() is authoritative for that.
+"""
+
+import asyncio
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from app.database import predictions_collection
+from app.services.event_hub import publish_event
+from app.services.override_state import current_override
+from app.services.snapshot_cache import TtlSingleFlight
+
+
+DECISION_SNAPSHOT_TTL_SECONDS = max(1, int(os.getenv("POLARIS_DECISION_SNAPSHOT_TTL_SECONDS", "5")))
+DECISION_LONG_POLL_MAX_SECONDS = max(1, int(os.getenv("POLARIS_DECISION_LONG_POLL_MAX_SECONDS", "30")))
+
+# Distinguishes ETags across restarts, since versions start again from 0.
+_BOOT_ID = uuid.uuid4().hex[:8]
+
+_state_lock = threading.Lock()
+_state = {
+    "version": 0,
+    "decision": None,
+    "decided_at": None,
+    "refreshed_at": None,
+}
+_waiters = []  # (event loop, future) pairs parked by long-poll requests
+_reload_flight = TtlSingleFlight(DECISION_SNAPSHOT_TTL_SECONDS)
+
+
+def decision_from_override(override: dict) -> dict:
+    return {
+        "final_risk_level": override["risk_level"],
+        "final_confidence": 1.0,
+        "final_eta": "UNKNOWN",
+        "final_eta_confidence": "HIGH",
+        "final_alert_severity": override["alert_severity"],
+        "decision_mode": "MANUAL_OVERRIDE",
+        "justification": f"Manual override by {override['author']}: {override['reason']}",
+    }
+
+
+def _load_latest_decision():
+    """
+    (decision, decided_at) from the active override or latest prediction.
+    """
+    override = current_override()
+    if override:
+        return decision_from_override(override), override.get("timestamp")
+
+    doc = predictions_collection.find_one(
+        {},
+        sort=[("timestamp", -1)],
+        projection={"_id": 0, "final_decision": 1, "timestamp": 1},
+    )
+    if not doc:
+        return None, None
+
+    return doc.get("final_decision", {"message": "Final decision not stored yet"}), doc.get("timestamp")
+
+
+def _is_override(decision) -> bool:
+    return isinstance(decision, dict) and decision.get("decision_mode") == "MANUAL_OVERRIDE"
+
+
+def _etag(version: int) -> str:
+    return f'"{_BOOT_ID}-{version}"'
+
+
+def _snapshot_locked() -> dict:
+    return {
+        "version": _state["version"],
+        "etag": _etag(_state["version"]),
+        "decision": _state["decision"],
+    }
+
+
+def _resolve(future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def _is_older(decision, decided_at) -> bool:
+    # Called with _state_lock held.
+    current = _state["decision"]
+    if current is None or _is_override(decision) != _is_override(current):
+        return False
+    return decided_at is not None and _state["decided_at"] is not None and decided_at < _state["decided_at"]
+
+
+def _store(decision, decided_at, *, force_new_version: bool, loaded_at_version=None) -> None:
+    with _state_lock:
+        _state["refreshed_at"] = time.monotonic()
+        if loaded_at_version is not None and (
+            _state["version"] != loaded_at_version or _is_older(decision, decided_at)
+        ):
+            return
+        if not force_new_version and decision == _state["decision"]:
+            return
+        _state["version"] += 1
+        _state["decision"] = decision
+        _state["decided_at"] = decided_at
+        waiters = list(_waiters)
+        _waiters.clear()
+
+    for loop, future in waiters:
+        loop.call_soon_threadsafe(_resolve, future)
+
+
+def publish_latest_decision(decision: dict, decided_at: datetime | None = None) -> None:
+    _store(dict(decision), decided_at or datetime.now(), force_new_version=True)
+    publish_event("decision", decision)
+
+
+def _reload_snapshot() -> dict:
+    with _state_lock:
+        version = _state["version"]
+    decision, decided_at = _load_latest_decision()
+    _store(decision, decided_at, force_new_version=False, loaded_at_version=version)
+    with _state_lock:
+        return _snapshot_locked()
+
+
+def refresh_decision_snapshot() -> dict:
+    """
+    Reloads from Mongo now, e.g. after this worker changed the override.
+    """
+    snapshot = _reload_snapshot()
+    _reload_flight.invalidate()
+    return snapshot
+
+
+def refresh_stale_decision_snapshot() -> dict:
+    """
+    Reload for a stale snapshot; concurrent callers share one Mongo read.
+    """
+    _reload_flight.get("latest", _reload_snapshot)
+    with _state_lock:
+        return _snapshot_locked()
+
+
+def peek_decision_snapshot():
+    """
+    Returns (snapshot, is_stale) without touching Mongo.
+    """
+    with _state_lock:
+        refreshed_at = _state["refreshed_at"]
+        stale = (
+            refreshed_at is None
+            or time.monotonic() - refreshed_at >= DECISION_SNAPSHOT_TTL_SECONDS
+        )
+        return _snapshot_locked(), stale
+
+
+async def wait_for_decision_change(etag: str, timeout: float) -> dict:
+    """
+    Parks until the snapshot's ETag differs from `etag` or timeout expires.
+    """
+    loop = asyncio.get_running_loop()
+    with _state_lock:
+        if _etag(_state["version"]) != etag:
+            return _snapshot_locked()
+        future = loop.create_future()
+        waiter = (loop, future)
+        _waiters.append(waiter)
+
+    try:
+        await asyncio.wait_for(future, timeout)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        with _state_lock:
+            if waiter in _waiters:
+                _waiters.remove(waiter)
+
+    with _state_lock:
+        return _snapshot_locked()
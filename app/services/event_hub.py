@@ -0,0 +1,215 @@
+"""
+In-process broadcast hub for live updates (/stream/decisions).
+
+Producers call publish_event(type, data) for decisions, alerts, override
+changes and help-request updates. When Valkey is reachable, events go
+through pub/sub and every worker process relays what it receives to its
+own subscribers. Decisions use the existing POLARIS_VALKEY_CHANNEL
+(polaris:decisions, also read by the alert router) as raw decision JSON;
+everything else uses POLARIS_EVENT_CHANNEL. Without Valkey the hub falls
+back to a local bus inside this process.
+
+publish_event never touches the network: with Valkey connected it only
+enqueues, and a publisher thread next to the relay does the publish
+(with socket timeouts). A full outbound queue falls back to the local bus.
+
+Subscribers are asyncio queues, one per WebSocket/SSE connection. A
+slow client's queue drops its oldest events instead of applying
+backpressure to producers.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import queue
+import threading
+from datetime import datetime
+
+from app.notifications.valkey_pub import CHANNEL as DECISION_CHANNEL
+from app.notifications.valkey_pub import get_client
+
+
+EVENT_CHANNEL = os.getenv("POLARIS_EVENT_CHANNEL", "polaris:events")
+EVENT_QUEUE_SIZE = max(1, int(os.getenv("POLARIS_EVENT_QUEUE_SIZE", "100")))
+EVENT_OUTBOUND_QUEUE_SIZE = 1000
+EVENT_RECONNECT_SECONDS = 5
+EVENT_PUBLISH_TIMEOUT_SECONDS = 2
+EVENT_TYPES = {"decision", "alert", "override", "help_request"}
+
+_sequence = itertools.count(1)
+_subscribers_lock = threading.Lock()
+_subscribers: set["Subscription"] = set()
+
+_publisher = None
+_outbound: queue.Queue = queue.Queue(maxsize=EVENT_OUTBOUND_QUEUE_SIZE)
+_state_lock = threading.Lock()
+_state = {
+    "valkey_connected": False,
+    "published": 0,
+    "delivered": 0,
+    "dropped": 0,
+    "publish_failed": 0,
+    "outbound_full": 0,
+}
+
+
+class Subscription:
+    def __init__(self, loop: asyncio.AbstractEventLoop, types: set[str]):
+        self.loop = loop
+        self.types = types
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+
+    def offer(self, event: dict) -> None:
+        # Runs on the subscriber's event loop.
+        if self.queue.full():
+            self.queue.get_nowait()
+            with _state_lock:
+                _state["dropped"] += 1
+        self.queue.put_nowait(event)
+
+
+def subscribe(types: set[str] | None = None) -> Subscription:
+    subscription = Subscription(asyncio.get_running_loop(), set(types or EVENT_TYPES))
+    with _subscribers_lock:
+        _subscribers.add(subscription)
+    return subscription
+
+
+def unsubscribe(subscription: Subscription) -> None:
+    with _subscribers_lock:
+        _subscribers.discard(subscription)
+
+
+def _broadcast_local(event: dict) -> None:
+    with _subscribers_lock:
+        targets = [sub for sub in _subscribers if event["type"] in sub.types]
+    for subscription in targets:
+        try:
+            subscription.loop.call_soon_threadsafe(subscription.offer, event)
+        except RuntimeError:
+            # Loop already closed; the connection is going away.
+            unsubscribe(subscription)
+    with _state_lock:
+        _state["delivered"] += len(targets)
+
+
+def make_event(event_type: str, data: dict) -> dict:
+    return {
+        "type": event_type,
+        "seq": next(_sequence),
+        "timestamp": datetime.now().isoformat(),
+        "data": data,
+    }
+
+
+def _publisher_client():
+    # One client (and connection pool) for all publishes, not one per event.
+    global _publisher
+    if _publisher is None:
+        _publisher = get_client(
+            socket_timeout=EVENT_PUBLISH_TIMEOUT_SECONDS,
+            socket_connect_timeout=EVENT_PUBLISH_TIMEOUT_SECONDS,
+        )
+    return _publisher
+
+
+def channel_message(event: dict) -> tuple[str, str]:
+    """
+    (channel, payload) for an event. Decisions keep the polaris:decisions
+    wire format (the bare decision) so the alert router can read them.
+    """
+    if event["type"] == "decision":
+        return DECISION_CHANNEL, json.dumps(event["data"], default=str)
+    return EVENT_CHANNEL, json.dumps(event, default=str)
+
+
+def event_from_message(channel: str, payload: str) -> dict:
+    if channel == DECISION_CHANNEL:
+        return make_event("decision", json.loads(payload))
+    return json.loads(payload)
+
+
+def publish_event(event_type: str, data: dict) -> None:
+    """
+    Fans an event out to every connected stream client. Never blocks on
+    Valkey and never raises: live updates must not break the request or
+    pipeline that emits them.
+    """
+    event = make_event(event_type, data)
+    with _state_lock:
+        _state["published"] += 1
+        via_valkey = _state["valkey_connected"]
+
+    if via_valkey:
+        try:
+            _outbound.put_nowait(event)
+            return
+        except queue.Full:
+            with _state_lock:
+                _state["outbound_full"] += 1
+    _broadcast_local(event)
+
+
+def _publish_outbound(stop_event: threading.Event) -> None:
+    while not stop_event.is_set():
+        try:
+            event = _outbound.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        try:
+            _publisher_client().publish(*channel_message(event))
+        except Exception:
+            with _state_lock:
+                _state["publish_failed"] += 1
+            _broadcast_local(event)
+
+
+def relay_valkey_events(stop_event: threading.Event) -> None:
+    """
+    Subscribes to EVENT_CHANNEL and DECISION_CHANNEL and relays messages
+    to local subscribers, reconnecting every EVENT_RECONNECT_SECONDS while
+    Valkey is down. Also runs the outbound publisher thread.
+    """
+    publisher = threading.Thread(
+        target=_publish_outbound,
+        args=(stop_event,),
+        daemon=True,
+        name="event-publisher",
+    )
+    publisher.start()
+    while not stop_event.is_set():
+        pubsub = None
+        try:
+            pubsub = get_client().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(EVENT_CHANNEL, DECISION_CHANNEL)
+            with _state_lock:
+                _state["valkey_connected"] = True
+            while not stop_event.is_set():
+                message = pubsub.get_message(timeout=1.0)
+                if message and message.get("type") == "message":
+                    try:
+                        _broadcast_local(event_from_message(message["channel"], message["data"]))
+                    except (TypeError, ValueError, KeyError):
+                        continue
+        except Exception:
+            pass
+        finally:
+            with _state_lock:
+                _state["valkey_connected"] = False
+            if pubsub is not None:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+        stop_event.wait(EVENT_RECONNECT_SECONDS)
+    publisher.join(timeout=1)
+
+
+def get_event_hub_metrics() -> dict:
+    with _state_lock:
+        metrics = _state.copy()
+    with _subscribers_lock:
+        metrics["subscribers"] = len(_subscribers)
+    metrics["outbound_queue_depth"] = _outbound.qsize()
+    return metrics
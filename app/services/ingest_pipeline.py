@@ -0,0 +1,156 @@
+"""
+Staged camera ingest.
+
+- CPU-bound analysis runs on a bounded thread pool, off the event loop.
+- Persistence, Valkey publish and alert dispatch run on background
+  workers fed by an in-process queue.
+- New frames are rejected with 503 once too many are in flight or
+  waiting for persistence, so a slow Mongo/FCM cannot grow memory
+  without bound.
+"""
+
+import asyncio
+import functools
+import os
+import queue
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, status
+
+
+INGEST_ANALYSIS_WORKERS = max(1, int(os.getenv("POLARIS_INGEST_ANALYSIS_WORKERS", "4")))
+INGEST_BACKGROUND_WORKERS = max(1, int(os.getenv("POLARIS_INGEST_BACKGROUND_WORKERS", "2")))
+INGEST_MAX_PENDING = max(1, int(os.getenv("POLARIS_INGEST_MAX_PENDING", "200")))
+
+_analysis_executor = ThreadPoolExecutor(
+    max_workers=INGEST_ANALYSIS_WORKERS,
+    thread_name_prefix="ingest-analysis",
+)
+_background_queue = queue.Queue()
+_stop_event = threading.Event()
+_workers: list[threading.Thread] = []
+
+_state_lock = threading.Lock()
+_state = {
+    "in_flight": 0,
+    "accepted": 0,
+    "rejected": 0,
+    "background_completed": 0,
+    "background_failed": 0,
+    "last_background_error": None,
+    "last_ingest_ms": None,
+    "avg_ingest_ms": None,
+}
+
+
+def _pending_count() -> int:
+    return _state["in_flight"] + _background_queue.qsize()
+
+
+@contextmanager
+def ingest_admission():
+    """
+    Admits one frame into the pipeline or raises 503 when saturated.
+    Records end-to-end handler latency on exit.
+    """
+    with _state_lock:
+        if _pending_count() >= INGEST_MAX_PENDING:
+            _state["rejected"] += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Ingest pipeline is saturated. Retry shortly.",
+                headers={"Retry-After": "1"},
+            )
+        _state["in_flight"] += 1
+        _state["accepted"] += 1
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+        with _state_lock:
+            _state["in_flight"] -= 1
+            _state["last_ingest_ms"] = elapsed_ms
+            previous = _state["avg_ingest_ms"]
+            _state["avg_ingest_ms"] = (
+                elapsed_ms if previous is None else round(0.9 * previous + 0.1 * elapsed_ms, 2)
+            )
+
+
+async def run_in_analysis_pool(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _analysis_executor,
+        functools.partial(fn, *args, **kwargs),
+    )
+
+
+def submit_background(fn, *args, **kwargs) -> None:
+    _background_queue.put((fn, args, kwargs))
+
+
+def _run_background_job(fn, args, kwargs) -> None:
+    try:
+        fn(*args, **kwargs)
+    except Exception as exc:
+        with _state_lock:
+            _state["background_failed"] += 1
+            _state["last_background_error"] = f"{exc}\n{traceback.format_exc()}"
+        return
+
+    with _state_lock:
+        _state["background_completed"] += 1
+
+
+def _background_worker() -> None:
+    while True:
+        try:
+            job = _background_queue.get(timeout=0.5)
+        except queue.Empty:
+            if _stop_event.is_set():
+                return
+            continue
+        try:
+            _run_background_job(*job)
+        finally:
+            _background_queue.task_done()
+
+
+def start_ingest_workers() -> None:
+    if _workers:
+        return
+    _stop_event.clear()
+    for index in range(INGEST_BACKGROUND_WORKERS):
+        thread = threading.Thread(
+            target=_background_worker,
+            daemon=True,
+            name=f"ingest-background-{index + 1}",
+        )
+        thread.start()
+        _workers.append(thread)
+
+
+def stop_ingest_workers(timeout: float = 5.0) -> None:
+    """
+    Lets workers drain queued jobs (up to timeout), then stops them.
+    """
+    _stop_event.set()
+    deadline = time.monotonic() + timeout
+    for thread in _workers:
+        thread.join(timeout=max(0.0, deadline - time.monotonic()))
+    _workers.clear()
+
+
+def get_ingest_metrics() -> dict:
+    with _state_lock:
+        metrics = _state.copy()
+    metrics["queue_depth"] = _background_queue.qsize()
+    metrics["max_pending"] = INGEST_MAX_PENDING
+    metrics["analysis_workers"] = INGEST_ANALYSIS_WORKERS
+    metrics["background_workers"] = INGEST_BACKGROUND_WORKERS
+    return metrics
@@ -0,0 +1,184 @@
+"""
+Viewport queries and server-side tiles for the map layers.
+
+Tiles use the standard XYZ (Web Mercator) scheme. Each tile is split
+into a TILE_GRID x TILE_GRID grid, and Mongo groups the layer's points
+into those cells (count, centroid, max/mean risk). The response size is
+bounded by the grid no matter how many points the tile covers. Points
+are selected through the 2dsphere `location` indexes. Built tiles are
+cached per (layer, z, x, y) for a short TTL.
+"""
+
+import os
+from datetime import datetime, timedelta
+from math import atan, degrees, pi, sinh
+
+from app.database import (
+    historical_events_collection,
+    predictions_collection,
+    safezones_collection,
+)
+from app.http_cache import content_etag
+from app.services.snapshot_cache import TtlSingleFlight
+
+
+TILE_GRID = 16
+MAX_TILE_ZOOM = 18
+# Wider boxes (zoom 0-1 tiles, world views) come close to a hemisphere,
+# where a 2dsphere polygon is ambiguous; they filter on lat/lng only.
+_MAX_GEO_SPAN_DEGREES = 90
+MAP_TILE_CACHE_SECONDS = max(1, int(os.getenv("POLARIS_MAP_TILE_CACHE_SECONDS", "30")))
+MAP_LIVE_RISK_MINUTES = max(1, int(os.getenv("POLARIS_MAP_LIVE_RISK_MINUTES", "60")))
+# Longest polygon edge, in degrees. Short edges keep the geodesic
+# polygon edges close to the tile's lines of latitude.
+_EDGE_STEP_DEGREES = 1.0
+
+TILE_FIELDS = ["lat", "lng", "count", "max_risk", "mean_risk"]
+
+_tile_cache = TtlSingleFlight(MAP_TILE_CACHE_SECONDS, max_entries=4096)
+
+
+def _live_risk_filter() -> dict:
+    return {"timestamp": {"$gte": datetime.now() - timedelta(minutes=MAP_LIVE_RISK_MINUTES)}}
+
+
+def _active_safezone_filter() -> dict:
+    return {
+        "active": True,
+        "$or": [{"source": "MANUAL"}, {"expires_at": {"$gt": datetime.now()}}],
+    }
+
+
+# layer -> (collection, base filter, risk field or None)
+MAP_LAYERS = {
+    "live-risk": (predictions_collection, _live_risk_filter, "$risk_score"),
+    "historical-events": (historical_events_collection, dict, None),
+    "safe-zones": (safezones_collection, _active_safezone_filter, None),
+}
+
+
+def parse_bbox(raw: str) -> tuple[float, float, float, float]:
+    """
+    "west,south,east,north" in degrees. Raises ValueError when malformed.
+    """
+    parts = [float(part) for part in raw.split(",")]
+    if len(parts) != 4:
+        raise ValueError("bbox must be west,south,east,north")
+    west, south, east, north = parts
+    if not (-180 <= west < east <= 180 and -90 <= south < north <= 90):
+        raise ValueError("bbox must satisfy -180 <= west < east <= 180 and -90 <= south < north <= 90")
+    return west, south, east, north
+
+
+def tile_bounds(z: int, x: int, y: int) -> tuple[float, float, float, float]:
+    if not 0 <= z <= MAX_TILE_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise ValueError(f"No tile {z}/{x}/{y}")
+    n = 2 ** z
+    west = x / n * 360 - 180
+    east = (x + 1) / n * 360 - 180
+    north = degrees(atan(sinh(pi * (1 - 2 * y / n))))
+    south = degrees(atan(sinh(pi * (1 - 2 * (y + 1) / n))))
+    return west, south, east, north
+
+
+def _bbox_polygon(west, south, east, north) -> dict:
+    steps = max(1, int((east - west) / _EDGE_STEP_DEGREES))
+    lngs = [west + (east - west) * i / steps for i in range(steps + 1)]
+    ring = (
+        [[lng, south] for lng in lngs]
+        + [[lng, north] for lng in reversed(lngs)]
+        + [[west, south]]
+    )
+    return {"type": "Polygon", "coordinates": [ring]}
+
+
+def bbox_filter(bbox) -> dict:
+    """
+    Mongo filter for points inside bbox. The 2dsphere match narrows via
+    the index; the lat/lng ranges make the edges exact.
+    """
+    west, south, east, north = bbox
+    query = {
+        "lat": {"$gte": south, "$lte": north},
+        "lng": {"$gte": west, "$lte": east},
+    }
+    if east - west <= _MAX_GEO_SPAN_DEGREES:
+        query["location"] = {"$geoWithin": {"$geometry": _bbox_polygon(west, south, east, north)}}
+    return query
+
+
+def _cell_index(field: str, origin: float, span: float, flip: bool) -> dict:
+    offset = {"$subtract": [origin, field]} if flip else {"$subtract": [field, origin]}
+    return {
+        "$min": [
+            TILE_GRID - 1,
+            {"$max": [0, {"$floor": {"$multiply": [offset, TILE_GRID / span]}}]},
+        ]
+    }
+
+
+def tile_pipeline(layer: str, bbox) -> list[dict]:
+    _, base_filter, risk_field = MAP_LAYERS[layer]
+    west, south, east, north = bbox
+    group = {
+        "_id": {
+            "x": _cell_index("$lng", west, east - west, flip=False),
+            "y": _cell_index("$lat", north, north - south, flip=True),
+        },
+        "count": {"$sum": 1},
+        "lat": {"$avg": "$lat"},
+        "lng": {"$avg": "$lng"},
+    }
+    if risk_field:
+        group["max_risk"] = {"$max": risk_field}
+        group["mean_risk"] = {"$avg": risk_field}
+    return [
+        {"$match": {**base_filter(), **bbox_filter(bbox)}},
+        {"$group": group},
+        {"$sort": {"_id.y": 1, "_id.x": 1}},
+    ]
+
+
+def _round(value, digits):
+    return None if value is None else round(value, digits)
+
+
+def build_tile(layer: str, z: int, x: int, y: int) -> dict:
+    collection = MAP_LAYERS[layer][0]
+    bbox = tile_bounds(z, x, y)
+    cells = [
+        [
+            _round(cell["lat"], 5),
+            _round(cell["lng"], 5),
+            cell["count"],
+            _round(cell.get("max_risk"), 3),
+            _round(cell.get("mean_risk"), 3),
+        ]
+        for cell in collection.aggregate(tile_pipeline(layer, bbox))
+    ]
+    tile = {
+        "layer": layer,
+        "z": z,
+        "x": x,
+        "y": y,
+        "bbox": [round(edge, 6) for edge in bbox],
+        "grid": TILE_GRID,
+        "fields": TILE_FIELDS,
+        "cells": cells,
+    }
+    return {"etag": content_etag(tile), "tile": tile}
+
+
+def cached_tile(layer: str, z: int, x: int, y: int) -> dict:
+    """
+    {etag, tile} for one tile. Raises KeyError for an unknown layer and
+    ValueError for an invalid tile address.
+    """
+    if layer not in MAP_LAYERS:
+        raise KeyError(layer)
+    tile_bounds(z, x, y)
+    return _tile_cache.get((layer, z, x, y), lambda: build_tile(layer, z, x, y))
+
+
+def get_map_tile_metrics() -> dict:
+    return _tile_cache.stats()
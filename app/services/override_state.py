@@ -0,0 +1,75 @@
+"""
+Process-wide cache of the active authority override.
+
+The decision pipeline, GET /decision/latest and /override/set read the
+active override from here instead of querying Mongo each time.
+/override/set and /override/clear refresh the cache after writing.
+Changes made by other workers are picked up from a Mongo change stream
+when the deployment supports one (replica set). Otherwise the cache
+falls back to reloading every OVERRIDE_CACHE_TTL_SECONDS.
+"""
+
+import os
+import threading
+import time
+
+from pymongo.errors import PyMongoError
+
+from app.database import overrides_collection
+
+
+OVERRIDE_CACHE_TTL_SECONDS = max(1, int(os.getenv("POLARIS_OVERRIDE_CACHE_TTL_SECONDS", "5")))
+
+_state_lock = threading.Lock()
+_state = {
+    "override": None,
+    "loaded_at": None,
+    "watching": False,
+}
+
+
+def refresh_active_override():
+    override = overrides_collection.find_one(
+        {"active": True},
+        sort=[("timestamp", -1)]
+    )
+    with _state_lock:
+        _state["override"] = override
+        _state["loaded_at"] = time.monotonic()
+    return override
+
+
+def current_override():
+    """
+    Returns the active override document, or None.
+    """
+    with _state_lock:
+        loaded_at = _state["loaded_at"]
+        fresh = loaded_at is not None and (
+            _state["watching"]
+            or time.monotonic() - loaded_at < OVERRIDE_CACHE_TTL_SECONDS
+        )
+        if fresh:
+            return _state["override"]
+    return refresh_active_override()
+
+
+def watch_override_changes(stop_event: threading.Event) -> None:
+    """
+    Keeps the cache in sync with writes from other workers.
+    Returns quietly (leaving TTL reloads in charge) when change
+    streams are unavailable, e.g. on a standalone mongod.
+    """
+    try:
+        with overrides_collection.watch(max_await_time_ms=1000) as stream:
+            refresh_active_override()
+            with _state_lock:
+                _state["watching"] = True
+            while not stop_event.is_set() and stream.alive:
+                if stream.try_next() is not None:
+                    refresh_active_override()
+    except PyMongoError:
+        return
+    finally:
+        with _state_lock:
+            _state["watching"] = False
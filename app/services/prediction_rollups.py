@@ -0,0 +1,117 @@
+"""
+Time-bucketed prediction rollups for the dashboard timeseries.
+
+Every stored prediction is folded into a per-minute and a per-hour
+bucket with one upsert each: count, sum/min/max of risk, ensemble score
+and confidence, plus per-level, per-severity and per-ETA counts. The
+timeseries endpoints read these buckets when called with
+?resolution=minute|hour, so payload size depends on the time span and
+not on the camera frame rate. Buckets are filled from the time this is
+deployed; raw predictions are not backfilled.
+"""
+
+import os
+from datetime import datetime, timedelta
+
+from app.database import prediction_rollups_collection
+
+
+ROLLUP_RESOLUTIONS = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+}
+ROLLUP_RETENTION = {
+    "minute": timedelta(days=max(1, int(os.getenv("POLARIS_MINUTE_ROLLUP_RETENTION_DAYS", "7")))),
+    "hour": timedelta(days=max(1, int(os.getenv("POLARIS_HOUR_ROLLUP_RETENTION_DAYS", "365")))),
+}
+_STATS = ("risk_score", "ensemble_score", "confidence")
+
+
+def bucket_start(timestamp: datetime, resolution: str) -> datetime:
+    if resolution == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(second=0, microsecond=0)
+
+
+def _count_key(value) -> str:
+    # Mongo field names cannot contain "." or start with "$".
+    return str(value).replace(".", "_").replace("$", "_")
+
+
+def record_prediction_rollup(prediction: dict) -> None:
+    timestamp = prediction["timestamp"]
+
+    inc = {"count": 1}
+    mins = {}
+    maxes = {}
+    for field in _STATS:
+        value = prediction.get(field)
+        if isinstance(value, (int, float)):
+            inc[f"{field}.sum"] = float(value)
+            inc[f"{field}.n"] = 1
+            mins[f"{field}.min"] = float(value)
+            maxes[f"{field}.max"] = float(value)
+    for field, counts in (("risk_level", "levels"), ("alert_severity", "severities"), ("eta", "etas")):
+        if prediction.get(field):
+            inc[f"{counts}.{_count_key(prediction[field])}"] = 1
+
+    for resolution in ROLLUP_RESOLUTIONS:
+        start = bucket_start(timestamp, resolution)
+        update = {
+            "$inc": inc,
+            "$set": {"updated_at": datetime.now()},
+            "$setOnInsert": {
+                "expires_at": start + ROLLUP_RESOLUTIONS[resolution] + ROLLUP_RETENTION[resolution],
+            },
+        }
+        if mins:
+            update["$min"] = mins
+            update["$max"] = maxes
+        prediction_rollups_collection.update_one(
+            {"resolution": resolution, "bucket_start": start},
+            update,
+            upsert=True,
+        )
+
+
+def _mode(counts: dict | None):
+    if not counts:
+        return None
+    return max(counts.items(), key=lambda item: item[1])[0]
+
+
+def _stat(bucket: dict, field: str) -> dict:
+    stats = bucket.get(field) or {}
+    n = stats.get("n") or 0
+    return {
+        "mean": round(stats["sum"] / n, 4) if n else None,
+        "min": stats.get("min"),
+        "max": stats.get("max"),
+    }
+
+
+def rollup_series(resolution: str, since: datetime) -> list[dict]:
+    """
+    Buckets for `resolution` starting at or after the bucket containing
+    `since`, oldest first, with means and modes resolved.
+    """
+    cursor = prediction_rollups_collection.find(
+        {"resolution": resolution, "bucket_start": {"$gte": bucket_start(since, resolution)}},
+        {"_id": 0},
+    ).sort("bucket_start", 1)
+
+    series = []
+    for bucket in cursor:
+        series.append({
+            "time": bucket["bucket_start"],
+            "count": bucket.get("count", 0),
+            "risk_score": _stat(bucket, "risk_score"),
+            "ensemble_score": _stat(bucket, "ensemble_score"),
+            "confidence": _stat(bucket, "confidence"),
+            "levels": bucket.get("levels", {}),
+            "severities": bucket.get("severities", {}),
+            "risk_level": _mode(bucket.get("levels")),
+            "alert_severity": _mode(bucket.get("severities")),
+            "eta": _mode(bucket.get("etas")),
+        })
+    return series
@@ -0,0 +1,248 @@
+"""
+Scheduled safe-zone detection.
+
+A background thread reruns the detector every SAFEZONE_REFRESH_SECONDS
+and writes only the difference to safe_zones in one bulk_write: new or
+changed zones are upserted, zones that vanished are deactivated, and
+unchanged zones are only touched to push out their expiry once half of
+it is used. A zone keeps its zone_id while it still overlaps its
+previous position.
+
+Inputs are the per-location rolling risk stats (app.utils.location_stats)
+and the stored historical events. The stats live in this process: seeded
+from Mongo at startup, then fed by the frames and reports it handles.
+
+Map reads are served from memory or a short-TTL cache with an ETag and
+never run detection or write.
+"""
+
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+import numpy as np
+from pymongo import UpdateOne
+
+from app.database import geo_point, historical_events_collection, safezones_collection
+from app.http_cache import content_etag
+from app.services.snapshot_cache import TtlSingleFlight
+from app.utils.location_stats import location_risk_stats
+from app.utils.safezone_detector import (
+    cluster_safezones,
+    filter_historical,
+    filter_low_risk,
+    filter_stable,
+    radius_pairs,
+    rank_safezones,
+)
+
+
+SAFEZONE_REFRESH_SECONDS = max(5, int(os.getenv("POLARIS_SAFEZONE_REFRESH_SECONDS", "60")))
+SAFEZONE_CACHE_TTL_SECONDS = max(1, int(os.getenv("POLARIS_SAFEZONE_CACHE_TTL_SECONDS", "10")))
+# A cluster needs this many low-risk cells within the cluster radius.
+SAFEZONE_MIN_SAMPLES = max(1, int(os.getenv("POLARIS_SAFEZONE_MIN_SAMPLES", "3")))
+SAFEZONE_MAX_RADIUS_M = max(300, int(os.getenv("POLARIS_SAFEZONE_MAX_RADIUS_M", "1000")))
+SAFEZONE_TTL = timedelta(minutes=30)
+_ZONE_FIELDS = ("lat", "lng", "radius", "confidence_score", "confidence_level", "reason")
+
+logger = logging.getLogger(__name__)
+
+_zone_cache = TtlSingleFlight(SAFEZONE_CACHE_TTL_SECONDS)
+_state_lock = threading.Lock()
+_state = {
+    "runs": 0,
+    "errors": 0,
+    "upserted": 0,
+    "extended": 0,
+    "deactivated": 0,
+    "unchanged": 0,
+    "last_run_at": None,
+    "auto": {"etag": content_etag([]), "zones": []},
+}
+
+
+def _detection_inputs():
+    # Live points: latest risk per located cell seen within the zone TTL.
+    live_points = location_risk_stats.latest_points(SAFEZONE_TTL.total_seconds())
+    historical_events = list(
+        historical_events_collection.find(
+            {"lat": {"$type": "number"}, "lng": {"$type": "number"}},
+            {"_id": 0, "lat": 1, "lng": 1},
+        )
+    )
+    return live_points, historical_events, location_risk_stats
+
+
+def detect_safezones() -> list[dict]:
+    live_points, historical_events, risk_stats = _detection_inputs()
+
+    low = filter_low_risk(live_points)
+    hist = filter_historical(low, historical_events)
+    stable = filter_stable(hist, risk_stats)
+    if not stable:
+        return []
+    clusters = cluster_safezones(stable, min_samples=SAFEZONE_MIN_SAMPLES, max_radius=SAFEZONE_MAX_RADIUS_M)
+    return rank_safezones(clusters)
+
+
+def assign_zone_ids(zones: list[dict], existing: list[dict]) -> None:
+    """
+    Gives each detected zone the zone_id of the nearest existing auto
+    zone it overlaps (closest pairs first, each id used once), or a new
+    id. Rewrites zone["id"] in place.
+    """
+    taken = set()
+    if zones and existing:
+        reach = max(max(z["radius"] for z in zones), max(e.get("radius") or 0 for e in existing))
+        new_i, old_j, distances = radius_pairs(
+            [z["lat"] for z in zones], [z["lng"] for z in zones],
+            [e["lat"] for e in existing], [e["lng"] for e in existing],
+            reach,
+        )
+        matched = set()
+        for k in np.argsort(distances, kind="stable"):
+            zone, old = zones[new_i[k]], existing[old_j[k]]
+            if new_i[k] in matched or old["zone_id"] in taken:
+                continue
+            if distances[k] < max(zone["radius"], old.get("radius") or 0):
+                zone["id"] = old["zone_id"]
+                matched.add(new_i[k])
+                taken.add(old["zone_id"])
+        unmatched = [z for i, z in enumerate(zones) if i not in matched]
+    else:
+        unmatched = zones
+
+    for zone in unmatched:
+        zone["id"] = f"SZ-{uuid.uuid4().hex[:8].upper()}"
+
+
+def plan_safezone_writes(zones: list[dict], existing: list[dict], now: datetime):
+    """
+    UpdateOne operations that bring the stored auto zones in line with
+    `zones`, plus counts per kind of change.
+    """
+    existing_by_id = {doc["zone_id"]: doc for doc in existing}
+    ops = []
+    counts = {"upserted": 0, "extended": 0, "deactivated": 0, "unchanged": 0}
+
+    for zone in zones:
+        fields = {field: zone[field] for field in _ZONE_FIELDS}
+        old = existing_by_id.pop(zone["id"], None)
+        if old is None or any(old.get(field) != value for field, value in fields.items()):
+            ops.append(UpdateOne(
+                {"zone_id": zone["id"]},
+                {"$set": {
+                    **fields,
+                    "location": geo_point(zone["lat"], zone["lng"]),
+                    "last_verified": now,
+                    "expires_at": now + SAFEZONE_TTL,
+                    "source": "AUTO",
+                    "active": True,
+                }},
+                upsert=True,
+            ))
+            counts["upserted"] += 1
+        elif old.get("expires_at") is None or old["expires_at"] - now < SAFEZONE_TTL / 2:
+            ops.append(UpdateOne(
+                {"zone_id": zone["id"]},
+                {"$set": {"last_verified": now, "expires_at": now + SAFEZONE_TTL}},
+            ))
+            counts["extended"] += 1
+        else:
+            counts["unchanged"] += 1
+
+    for zone_id in existing_by_id:
+        ops.append(UpdateOne(
+            {"zone_id": zone_id, "source": "AUTO"},
+            {"$set": {"active": False, "last_verified": now}},
+        ))
+        counts["deactivated"] += 1
+
+    return ops, counts
+
+
+def refresh_safezones(collection=None) -> dict:
+    collection = collection if collection is not None else safezones_collection
+    now = datetime.now()
+    zones = detect_safezones()
+    existing = list(
+        collection.find(
+            {"source": "AUTO", "active": True},
+            {"_id": 0, "zone_id": 1, "expires_at": 1, **{field: 1 for field in _ZONE_FIELDS}},
+        )
+    )
+    assign_zone_ids(zones, existing)
+
+    ops, counts = plan_safezone_writes(zones, existing, now)
+    if ops:
+        collection.bulk_write(ops, ordered=False)
+        _zone_cache.invalidate()
+
+    with _state_lock:
+        _state["runs"] += 1
+        _state["last_run_at"] = now
+        for key, value in counts.items():
+            _state[key] += value
+        # last_verified changes every run; tag only what clients render.
+        _state["auto"] = {
+            "etag": content_etag([{k: v for k, v in z.items() if k != "last_verified"} for z in zones]),
+            "zones": zones,
+        }
+    return counts
+
+
+def run_safezone_job(stop_event: threading.Event) -> None:
+    while not stop_event.is_set():
+        try:
+            refresh_safezones()
+        except Exception:
+            with _state_lock:
+                _state["errors"] += 1
+            logger.exception("Safe-zone refresh failed")
+        stop_event.wait(SAFEZONE_REFRESH_SECONDS)
+
+
+def latest_auto_safezones() -> dict:
+    """
+    Zones from the last detection run in this process: {etag, zones}.
+    """
+    with _state_lock:
+        return _state["auto"]
+
+
+def _load_active_safezones() -> dict:
+    now = datetime.now()
+    zones = list(
+        safezones_collection.find(
+            {
+                "active": True,
+                "$or": [
+                    {"source": "MANUAL"},
+                    {"expires_at": {"$gt": now}}
+                ]
+            },
+            {"_id": 0, "location": 0}
+        )
+    )
+
+    # Manual zones first (override order for guidance)
+    zones.sort(key=lambda z: 0 if z["source"] == "MANUAL" else 1)
+    return {"etag": content_etag(zones), "zones": zones}
+
+
+def cached_active_safezones() -> dict:
+    return _zone_cache.get("active", _load_active_safezones)
+
+
+def invalidate_safezone_cache() -> None:
+    _zone_cache.invalidate()
+
+
+def get_safezone_job_metrics() -> dict:
+    with _state_lock:
+        metrics = {key: value for key, value in _state.items() if key != "auto"}
+        metrics["auto_zones"] = len(_state["auto"]["zones"])
+    metrics["cache"] = _zone_cache.stats()
+    return metrics
@@ -0,0 +1,73 @@
+"""
+Short-TTL, single-flight cache for expensive read-only aggregates.
+
+A value is rebuilt at most once per TTL per key: while one thread
+rebuilds, concurrent callers for the same key wait for that result
+instead of running the builder themselves.
+"""
+
+import threading
+import time
+
+
+class TtlSingleFlight:
+    def __init__(self, ttl_seconds: float, max_entries: int | None = None):
+        self.ttl_seconds = ttl_seconds
+        # Bounds memory for open-ended key spaces (e.g. map tiles).
+        self.max_entries = max_entries
+        self._cond = threading.Condition()
+        self._entries = {}  # key -> (value, built_at monotonic)
+        self._building = set()
+        self._stats = {"hits": 0, "builds": 0, "errors": 0}
+
+    def get(self, key, builder):
+        with self._cond:
+            while True:
+                entry = self._entries.get(key)
+                if entry is not None and time.monotonic() - entry[1] < self.ttl_seconds:
+                    self._stats["hits"] += 1
+                    return entry[0]
+                if key not in self._building:
+                    self._building.add(key)
+                    break
+                self._cond.wait()
+
+        try:
+            value = builder()
+        except Exception:
+            with self._cond:
+                self._building.discard(key)
+                self._stats["errors"] += 1
+                self._cond.notify_all()
+            raise
+
+        with self._cond:
+            self._entries[key] = (value, time.monotonic())
+            if self.max_entries is not None and len(self._entries) > self.max_entries:
+                self._evict()
+            self._building.discard(key)
+            self._stats["builds"] += 1
+            self._cond.notify_all()
+        return value
+
+    def _evict(self) -> None:
+        # Drop expired entries first, then the oldest until within bounds.
+        now = time.monotonic()
+        for key in [k for k, (_, built_at) in self._entries.items() if now - built_at >= self.ttl_seconds]:
+            del self._entries[key]
+        excess = len(self._entries) - self.max_entries
+        if excess > 0:
+            oldest = sorted(self._entries, key=lambda k: self._entries[k][1])[:excess]
+            for key in oldest:
+                del self._entries[key]
+
+    def invalidate(self, key=None) -> None:
+        with self._cond:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return dict(self._stats, keys=len(self._entries))
@@ -34,40 +34,79 @@ def sanitize_filename(
     return f"{stem}{safe_suffix}"
 
 
-async def save_image_upload(
-    upload: UploadFile,
-    *,
-    target_dir: Path,
-    max_upload_bytes: int,
-) -> tuple[str, str]:
+def _upload_extension(upload: UploadFile) -> str:
     content_type = (upload.content_type or "").strip().lower()
     if content_type not in _ALLOWED_CONTENT_TYPES:
         raise HTTPException(
             status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
             detail="Only JPEG, PNG, and WEBP image uploads are allowed.",
         )
+    return _ALLOWED_CONTENT_TYPES[content_type]
+
+
+def _timestamped_filename(upload: UploadFile, extension: str) -> str:
+    safe_name = sanitize_filename(upload.filename, forced_extension=extension)
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{safe_name}"
+
+
+async def _iter_upload_chunks(upload: UploadFile, max_upload_bytes: int):
+    total_bytes = 0
+    while True:
+        chunk = await upload.read(1024 * 1024)
+        if not chunk:
+            break
+        total_bytes += len(chunk)
+        if total_bytes > max_upload_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Upload exceeds {max_upload_bytes} bytes.",
+            )
+        yield chunk
+
+
+async def read_image_upload(
+    upload: UploadFile,
+    *,
+    max_upload_bytes: int,
+) -> tuple[str, bytes]:
+    """
+    Validates an image upload and reads it into memory.
+    Returns the sanitized, timestamped filename and the raw bytes.
+    """
+    extension = _upload_extension(upload)
+    filename = _timestamped_filename(upload, extension)
+
+    chunks = []
+    try:
+        async for chunk in _iter_upload_chunks(upload, max_upload_bytes):
+            chunks.append(chunk)
+    finally:
+        await upload.close()
+
+    return filename, b"".join(chunks)
+
+
+def write_image_bytes(destination: str | Path, data: bytes) -> None:
+    destination = Path(destination)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    destination.write_bytes(data)
+
+
+async def save_image_upload(
+    upload: UploadFile,
+    *,
+    target_dir: Path,
+    max_upload_bytes: int,
+) -> tuple[str, str]:
+    extension = _upload_extension(upload)
 
     target_dir.mkdir(parents=True, exist_ok=True)
-    safe_name = sanitize_filename(
-        upload.filename,
-        forced_extension=_ALLOWED_CONTENT_TYPES[content_type],
-    )
-    filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{safe_name}"
+    filename = _timestamped_filename(upload, extension)
     destination = target_dir / filename
 
-    total_bytes = 0
     try:
         with destination.open("wb") as buffer:
-            while True:
-                chunk = await upload.read(1024 * 1024)
-                if not chunk:
-                    break
-                total_bytes += len(chunk)
-                if total_bytes > max_upload_bytes:
-                    raise HTTPException(
-                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                        detail=f"Upload exceeds {max_upload_bytes} bytes.",
-                    )
+            async for chunk in _iter_upload_chunks(upload, max_upload_bytes):
                 buffer.write(chunk)
     except HTTPException:
         destination.unlink(missing_ok=True)
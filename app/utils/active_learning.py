@@ -1,39 +1,94 @@
+import os
+import threading
+import time
+from collections import Counter, deque
 from datetime import datetime
 from bson import ObjectId
 
 from app.database import feedback_collection, active_learning_collection
 
 
+# Reload from Mongo at most this often; local inserts update the cache immediately.
+FEEDBACK_BIAS_TTL_SECONDS = max(5, int(os.getenv("POLARIS_FEEDBACK_BIAS_TTL_SECONDS", "300")))
+
+_bias_lock = threading.Lock()
+_bias_state = {
+    "window": None,
+    "labels": deque(),
+    "counts": Counter(),
+    "loaded_at": 0.0,
+    "value": 0.0,
+}
+
+
 def _clamp(value: float, low: float, high: float) -> float:
     return max(low, min(high, value))
 
 
+def _bias_from_counts(counts: Counter, total: int) -> float:
+    if not total:
+        return 0.0
+
+    bias = (
+        (-0.10 * (counts["FALSE_POSITIVE"] / total)) +
+        (0.12 * (counts["LATE"] / total)) +
+        (0.04 * (counts["TRUE_POSITIVE"] / total))
+    )
+    return round(_clamp(bias, -0.08, 0.08), 3)
+
+
+def _reload_feedback_window(window: int) -> None:
+    docs = list(
+        feedback_collection.find({}, {"_id": 0, "label": 1})
+        .sort("timestamp", -1)
+        .limit(window)
+    )
+    labels = deque(
+        ((d.get("label") or "").upper() for d in reversed(docs)),
+        maxlen=window,
+    )
+    counts = Counter(labels)
+
+    _bias_state.update(
+        window=window,
+        labels=labels,
+        counts=counts,
+        loaded_at=time.monotonic(),
+        value=_bias_from_counts(counts, len(labels)),
+    )
+
+
 def feedback_bias(window: int = 200) -> float:
     """
     Learns from authority feedback:
     - FALSE_POSITIVE lowers risk slightly
     - LATE raises risk slightly
     - TRUE_POSITIVE gives a small positive weight
+    The last `window` labels are cached and maintained incrementally.
     """
-    docs = list(
-        feedback_collection.find({}, {"_id": 0, "label": 1})
-        .sort("timestamp", -1)
-        .limit(window)
-    )
-    if not docs:
-        return 0.0
+    with _bias_lock:
+        expired = time.monotonic() - _bias_state["loaded_at"] >= FEEDBACK_BIAS_TTL_SECONDS
+        if _bias_state["window"] != window or expired:
+            _reload_feedback_window(window)
+        return _bias_state["value"]
 
-    total = len(docs)
-    false_positive = sum(1 for d in docs if (d.get("label") or "").upper() == "FALSE_POSITIVE")
-    late = sum(1 for d in docs if (d.get("label") or "").upper() == "LATE")
-    true_positive = sum(1 for d in docs if (d.get("label") or "").upper() == "TRUE_POSITIVE")
 
-    bias = (
-        (-0.10 * (false_positive / total)) +
-        (0.12 * (late / total)) +
-        (0.04 * (true_positive / total))
-    )
-    return round(_clamp(bias, -0.08, 0.08), 3)
+def record_feedback_label(label: str) -> None:
+    """
+    Applies a newly inserted feedback label to the cached bias.
+    """
+    with _bias_lock:
+        if _bias_state["window"] is None:
+            return
+
+        labels = _bias_state["labels"]
+        counts = _bias_state["counts"]
+        if len(labels) == labels.maxlen:
+            counts[labels[0]] -= 1
+        normalized = (label or "").upper()
+        labels.append(normalized)
+        counts[normalized] += 1
+        _bias_state["value"] = _bias_from_counts(counts, len(labels))
 
 
 def should_queue_for_active_learning(
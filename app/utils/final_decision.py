@@ -1,4 +1,4 @@
-from app.database import overrides_collection
+from app.services.override_state import current_override
 
 def build_final_decision(
     risk_level,
@@ -8,10 +8,7 @@ def build_final_decision(
     alert_severity,
     justification,
 ):
-    override = overrides_collection.find_one(
-        {"active": True},
-        sort=[("timestamp", -1)]
-    )
+    override = current_override()
 
     if override:
         return {
@@ -0,0 +1,32 @@
+from functools import cached_property
+
+import cv2
+import numpy as np
+
+
+class CameraFrame:
+    """
+    An uploaded camera image decoded once in memory.
+    Feature extraction and CNN inference both read from this object,
+    so a frame is never re-read from disk or decoded twice.
+    """
+
+    def __init__(self, data: bytes, bgr: np.ndarray):
+        self.data = data
+        self.bgr = bgr
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CameraFrame":
+        buffer = np.frombuffer(data, dtype=np.uint8)
+        bgr = cv2.imdecode(buffer, cv2.IMREAD_COLOR) if buffer.size else None
+        if bgr is None:
+            raise ValueError("Uploaded file is not a decodable image.")
+        return cls(data, bgr)
+
+    @cached_property
+    def gray(self) -> np.ndarray:
+        return cv2.cvtColor(self.bgr, cv2.COLOR_BGR2GRAY)
+
+    @cached_property
+    def rgb(self) -> np.ndarray:
+        return cv2.cvtColor(self.bgr, cv2.COLOR_BGR2RGB)
@@ -1,30 +1,155 @@
+import os
+import threading
+import time
 from app.database import citizen_reports_collection
 from datetime import datetime, timedelta
 
 
+DEFAULT_ZONE_ID = "TEST_ZONE"
+WATER_SIGNAL_TYPES = ["WATER_LEVEL", "FLOODING", "RAINFALL_INTENSITY"]
+WATER_SIGNAL_BUCKET_SECONDS = 60
+WATER_SIGNAL_RETENTION_MINUTES = 60
+# Reload a zone from Mongo this often so reports taken by other workers count.
+WATER_SIGNAL_TTL_SECONDS = max(5, int(os.getenv("POLARIS_WATER_SIGNAL_TTL_SECONDS", "60")))
+
+LEVEL_WEIGHT = {
+    "LOW": 0.6,
+    "MEDIUM": 1.0,
+    "HIGH": 1.4,
+    "SEVERE": 1.8,
+    "CRITICAL": 2.0,
+}
+
+# zone_id -> {"buckets": {bucket_start_epoch: weight}, "loaded_at": monotonic}
+_signal_lock = threading.Lock()  # guards _zone_signals and bucket updates; never held over Mongo
+_zone_signals = {}
+_zone_load_locks = {}  # zone_id -> Lock: one Mongo reload per zone at a time
+_reloading = {}  # zone_id -> [(timestamp, level)] recorded while the zone reloads
+
+
+def _report_weight(level):
+    return LEVEL_WEIGHT.get((level or "MEDIUM").upper(), 1.0)
+
+
+def _bucket_start(timestamp):
+    epoch = int(timestamp.timestamp())
+    return epoch - (epoch % WATER_SIGNAL_BUCKET_SECONDS)
+
+
+def _query_reports(zone_id, since):
+    return citizen_reports_collection.find(
+        {
+            "zone_id": zone_id,
+            "type": {"$in": WATER_SIGNAL_TYPES},
+            "timestamp": {"$gte": since}
+        },
+        {"_id": 0, "level": 1, "timestamp": 1},
+    )
+
+
+def _report_id(timestamp, level):
+    # Mongo keeps milliseconds; compare at that precision.
+    return timestamp.replace(microsecond=timestamp.microsecond // 1000 * 1000), level
+
+
+def _load_zone(zone_id):
+    # Runs without _signal_lock, so a slow reload only holds up its own zone.
+    with _signal_lock:
+        _reloading[zone_id] = []
+    try:
+        since = datetime.now() - timedelta(minutes=WATER_SIGNAL_RETENTION_MINUTES)
+        buckets = {}
+        loaded = set()
+        for report in _query_reports(zone_id, since):
+            bucket = _bucket_start(report["timestamp"])
+            buckets[bucket] = buckets.get(bucket, 0.0) + _report_weight(report.get("level"))
+            loaded.add(_report_id(report["timestamp"], report.get("level")))
+    except Exception:
+        with _signal_lock:
+            _reloading.pop(zone_id, None)
+        raise
+
+    entry = {"buckets": buckets, "loaded_at": time.monotonic()}
+    with _signal_lock:
+        # Reports recorded during the query may or may not be in its result.
+        for timestamp, level in _reloading.pop(zone_id, []):
+            if _report_id(timestamp, level) not in loaded:
+                bucket = _bucket_start(timestamp)
+                buckets[bucket] = buckets.get(bucket, 0.0) + _report_weight(level)
+        _zone_signals[zone_id] = entry
+    return entry
+
+
+def _is_fresh(entry):
+    return entry is not None and time.monotonic() - entry["loaded_at"] < WATER_SIGNAL_TTL_SECONDS
+
+
+def _zone_entry(zone_id):
+    """
+    The zone's aggregate, reloading it when missing or older than the TTL.
+    While one caller reloads a stale zone, others keep reading the
+    current aggregate; only a zone's first load makes callers wait.
+    """
+    with _signal_lock:
+        entry = _zone_signals.get(zone_id)
+        load_lock = _zone_load_locks.setdefault(zone_id, threading.Lock())
+    if _is_fresh(entry):
+        return entry
+
+    if not load_lock.acquire(blocking=entry is None):
+        return entry
+    try:
+        with _signal_lock:
+            current = _zone_signals.get(zone_id)
+        if current is not entry and _is_fresh(current):
+            return current  # reloaded by the caller we waited for
+        return _load_zone(zone_id)
+    finally:
+        load_lock.release()
+
+
+def _prune(buckets, now):
+    oldest = _bucket_start(now - timedelta(minutes=WATER_SIGNAL_RETENTION_MINUTES))
+    for bucket in [b for b in buckets if b < oldest]:
+        del buckets[bucket]
+
+
+def record_water_report(zone_id, level, timestamp):
+    """
+    Adds a freshly stored citizen report to the zone's aggregate.
+    """
+    with _signal_lock:
+        if zone_id in _reloading:
+            _reloading[zone_id].append((timestamp, level))
+        entry = _zone_signals.get(zone_id)
+        if entry is None:
+            # Not loaded yet: the next read loads it, including this report.
+            return
+        buckets = entry["buckets"]
+        bucket = _bucket_start(timestamp)
+        buckets[bucket] = buckets.get(bucket, 0.0) + _report_weight(level)
+        _prune(buckets, datetime.now())
+
+
 def recent_water_signal(zone_id, minutes=20):
-    since = datetime.now() - timedelta(minutes=minutes)
-    reports = list(citizen_reports_collection.find({
-        "zone_id": zone_id,
-        "type": {"$in": ["WATER_LEVEL", "FLOODING", "RAINFALL_INTENSITY"]},
-        "timestamp": {"$gte": since}
-    }))
-
-    if not reports:
-        return 0.0
-
-    level_weight = {
-        "LOW": 0.6,
-        "MEDIUM": 1.0,
-        "HIGH": 1.4,
-        "SEVERE": 1.8,
-        "CRITICAL": 2.0,
-    }
-
-    score = 0.0
-    for report in reports:
-        level = (report.get("level") or "MEDIUM").upper()
-        score += level_weight.get(level, 1.0)
+    """
+    Weighted citizen water signal for a zone over the last `minutes`,
+    read from per-minute buckets rather than the raw reports.
+    """
+    now = datetime.now()
+    since = now - timedelta(minutes=minutes)
+
+    if minutes > WATER_SIGNAL_RETENTION_MINUTES:
+        score = sum(_report_weight(r.get("level")) for r in _query_reports(zone_id, since))
+        return round(score, 2)
+
+    entry = _zone_entry(zone_id)
+    first_bucket = _bucket_start(since)
+    with _signal_lock:
+        score = sum(
+            weight for bucket, weight in entry["buckets"].items()
+            if bucket >= first_bucket
+        )
 
     return round(score, 2)
 
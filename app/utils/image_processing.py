@@ -1,6 +1,8 @@
 import cv2
 import numpy as np
 
+from app.utils.frame import CameraFrame
+
 def load_image(image_path):
     """
     Loads image from disk
@@ -37,9 +39,14 @@ def calculate_entropy(gray_image):   #Entropy = how chaotic the image looks.
     return float(entropy)
 
 
-def extract_features(image_path):
-    image = load_image(image_path)
-    gray = to_grayscale(image)
+def extract_features(image_source):
+    """
+    Accepts an image path or an already decoded CameraFrame
+    """
+    if isinstance(image_source, CameraFrame):
+        gray = image_source.gray
+    else:
+        gray = to_grayscale(load_image(image_source))
 
     features = {
         "brightness": calculate_brightness(gray),
@@ -0,0 +1,180 @@
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from app.database import citizen_reports_collection, predictions_collection
+from app.utils.fusion_logic import LEVEL_WEIGHT, WATER_SIGNAL_TYPES
+
+
+LOCATION_STATS_WINDOW = max(3, int(os.getenv("POLARIS_LOCATION_STATS_WINDOW", "20")))
+# Citizen water-level reports count as a risk score on the camera scale.
+LEVEL_RISK = {level: weight / max(LEVEL_WEIGHT.values()) for level, weight in LEVEL_WEIGHT.items()}
+
+
+def location_key(lat, lng):
+    """
+    Grid cell of a point: lat/lng rounded to 4 decimals (~11 m).
+    """
+    return f"{round(float(lat), 4)}_{round(float(lng), 4)}"
+
+
+class LocationStats:
+    """
+    Rolling risk statistics per location cell: count, mean and last
+    value, held in parallel NumPy arrays (one row per cell) instead of a
+    list of floats per cell. Updates and lookups are O(1).
+
+    `mean` is the exact mean of a cell's first `window` values and an
+    exponential moving average (alpha = 2 / (window + 1)) after that, so
+    old readings fade out without storing them.
+    """
+
+    def __init__(self, window=LOCATION_STATS_WINDOW, capacity=1024):
+        self.window = window
+        self._alpha = 2.0 / (window + 1)
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._size = 0
+        self._lat = np.zeros(capacity)
+        self._lng = np.zeros(capacity)
+        self._count = np.zeros(capacity, dtype=np.int64)
+        self._mean = np.zeros(capacity)
+        self._last = np.zeros(capacity)
+        self._updated = np.zeros(capacity)  # epoch seconds
+
+    def __len__(self):
+        return self._size
+
+    def _row_for(self, key, lat, lng):
+        row = self._rows.get(key)
+        if row is not None:
+            return row
+        if self._size == len(self._count):
+            grow = len(self._count)
+            for name in ("_lat", "_lng", "_count", "_mean", "_last", "_updated"):
+                array = getattr(self, name)
+                setattr(self, name, np.concatenate((array, np.zeros(grow, dtype=array.dtype))))
+        row = self._size
+        self._size += 1
+        self._rows[key] = row
+        self._lat[row] = round(float(lat), 4)
+        self._lng[row] = round(float(lng), 4)
+        return row
+
+    def record(self, lat, lng, value, timestamp=None):
+        value = float(value)
+        updated = (timestamp or datetime.now()).timestamp()
+        with self._lock:
+            row = self._row_for(location_key(lat, lng), lat, lng)
+            count = self._count[row] + 1
+            step = 1.0 / count if count <= self.window else self._alpha
+            self._mean[row] += (value - self._mean[row]) * step
+            self._count[row] = count
+            self._last[row] = value
+            self._updated[row] = max(self._updated[row], updated)
+
+    def lookup(self, lat, lng):
+        with self._lock:
+            row = self._rows.get(location_key(lat, lng))
+            if row is None:
+                return None
+            return {
+                "count": int(self._count[row]),
+                "mean": float(self._mean[row]),
+                "last": float(self._last[row]),
+            }
+
+    def stable_mask(self, lats, lngs, min_count):
+        """
+        Per point: the cell has at least `min_count` readings and its
+        latest reading is not above its rolling mean.
+        """
+        with self._lock:
+            rows = np.fromiter(
+                (self._rows.get(location_key(lat, lng), -1) for lat, lng in zip(lats, lngs)),
+                dtype=np.int64,
+                count=len(lats),
+            )
+            known = rows >= 0
+            mask = np.zeros(len(rows), dtype=bool)
+            hit = rows[known]
+            mask[known] = (self._count[hit] >= min_count) & (self._last[hit] <= self._mean[hit])
+            return mask
+
+    def latest_points(self, max_age_seconds=None):
+        """
+        One point per cell with its latest risk, for cells updated in the
+        last `max_age_seconds` (all cells when None).
+        """
+        with self._lock:
+            size = self._size
+            rows = np.arange(size)
+            if max_age_seconds is not None:
+                rows = rows[self._updated[:size] >= time.time() - max_age_seconds]
+            return [
+                {
+                    "lat": float(self._lat[row]),
+                    "lng": float(self._lng[row]),
+                    "risk_score": float(self._last[row]),
+                    "mean_risk": float(self._mean[row]),
+                    "count": int(self._count[row]),
+                }
+                for row in rows
+            ]
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+            self._size = 0
+            for name in ("_count", "_mean", "_last", "_updated"):
+                getattr(self, name)[:] = 0
+
+
+# Seeded from Mongo at startup, then fed in-process by each stored
+# prediction and citizen water-level report that carries coordinates.
+location_risk_stats = LocationStats()
+
+
+def report_risk(level):
+    return LEVEL_RISK.get((level or "MEDIUM").upper(), LEVEL_RISK["MEDIUM"])
+
+
+def record_location_risk(lat, lng, risk_score, timestamp=None):
+    if lat is None or lng is None or risk_score is None:
+        return
+    location_risk_stats.record(lat, lng, risk_score, timestamp)
+
+
+def record_location_report(lat, lng, level, timestamp=None):
+    record_location_risk(lat, lng, report_risk(level), timestamp)
+
+
+def seed_location_stats(scan_limit=20000):
+    """
+    Rebuilds the store from the latest located predictions and citizen
+    water reports, replayed oldest first.
+    """
+    located = {"lat": {"$type": "number"}, "lng": {"$type": "number"}}
+    readings = [
+        (doc["timestamp"], doc["lat"], doc["lng"], doc["risk_score"])
+        for doc in predictions_collection.find(
+            {**located, "risk_score": {"$type": "number"}},
+            {"_id": 0, "timestamp": 1, "lat": 1, "lng": 1, "risk_score": 1},
+        ).sort("timestamp", -1).limit(scan_limit)
+    ]
+    readings += [
+        (doc["timestamp"], doc["lat"], doc["lng"], report_risk(doc.get("level")))
+        for doc in citizen_reports_collection.find(
+            {**located, "type": {"$in": WATER_SIGNAL_TYPES}},
+            {"_id": 0, "timestamp": 1, "lat": 1, "lng": 1, "level": 1},
+        ).sort("timestamp", -1).limit(scan_limit)
+    ]
+    readings.sort(key=lambda reading: reading[0])
+
+    location_risk_stats.clear()
+    for timestamp, lat, lng, risk in readings:
+        location_risk_stats.record(lat, lng, risk, timestamp)
+    return len(readings)
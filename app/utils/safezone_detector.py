@@ -1,18 +1,132 @@
-from datetime import datetime, timedelta
-from math import radians, cos, sin, sqrt, atan2
+from datetime import datetime
 from statistics import mean
 
+import numpy as np
+
+EARTH_RADIUS_M = 6371000
+METERS_PER_DEGREE_LAT = 111320
+# Largest radius a detected zone may cover.
+MAX_ZONE_RADIUS_M = 1000
+
+
 # ----------------------------------
 # Distance helper (Haversine)
 # ----------------------------------
 def haversine(lat1, lon1, lat2, lon2):
-    R = 6371000  # meters
-    phi1, phi2 = radians(lat1), radians(lat2)
-    dphi = radians(lat2 - lat1)
-    dlambda = radians(lon2 - lon1)
+    """
+    Great-circle distance in meters. Accepts scalars or NumPy arrays
+    (broadcast element-wise), so one call can measure a whole batch.
+    """
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = np.radians(np.subtract(lon2, lon1))
+
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _unit_vectors(lats, lngs):
+    phi, lam = np.radians(lats), np.radians(lngs)
+    cos_phi = np.cos(phi)
+    return cos_phi * np.cos(lam), cos_phi * np.sin(lam), np.sin(phi)
+
+
+# ----------------------------------
+# Uniform grid index for radius queries
+# ----------------------------------
+_ALL_NEIGHBOURS = [(di, dj) for di in (-1, 0, 1) for dj in (-1, 0, 1)]
+# Same cell plus the "forward" half of its neighbours: each unordered
+# pair of cells is visited once when a and b are the same set.
+_HALF_NEIGHBOURS = [(0, 0), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+
+def radius_pairs(lat_a, lng_a, lat_b, lng_b, radius_m, *, upper_only=False):
+    """
+    All pairs (i, j) with point a[i] strictly closer than radius_m to
+    b[j], with their great-circle distances in meters.
+
+    Points are bucketed into a grid whose cells are at least radius_m
+    wide, so a[i] is only compared with the 3x3 cells around it, and
+    candidates are tested by chord length on the unit sphere (no trig per
+    candidate). With upper_only=True (a and b the same set) each
+    unordered pair is returned once, as i < j. Does not wrap across the
+    antimeridian.
+    """
+    lat_a, lng_a = np.asarray(lat_a, dtype=float), np.asarray(lng_a, dtype=float)
+    lat_b, lng_b = np.asarray(lat_b, dtype=float), np.asarray(lng_b, dtype=float)
+    empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0))
+    if lat_a.size == 0 or lat_b.size == 0:
+        return empty
+
+    max_abs_lat = max(np.abs(lat_a).max(), np.abs(lat_b).max())
+    lat_cell = radius_m / METERS_PER_DEGREE_LAT
+    lng_cell = lat_cell / max(np.cos(np.radians(max_abs_lat)), 0.01)
+
+    bi = np.floor(lat_b / lat_cell).astype(np.int64)
+    bj = np.floor(lng_b / lng_cell).astype(np.int64)
+    bi_min, bi_max, bj_min, bj_max = bi.min(), bi.max(), bj.min(), bj.max()
+    width = bj_max - bj_min + 1
+
+    # Work on copies sorted by cell so each cell is a contiguous run.
+    b_order = np.argsort((bi - bi_min) * width + (bj - bj_min), kind="stable")
+    bi, bj = bi[b_order], bj[b_order]
+    cell_keys, cell_starts, cell_counts = np.unique(
+        (bi - bi_min) * width + (bj - bj_min), return_index=True, return_counts=True
+    )
+    xb, yb, zb = _unit_vectors(lat_b[b_order], lng_b[b_order])
+
+    if upper_only:
+        a_order, ai, aj, xa, ya, za = b_order, bi, bj, xb, yb, zb
+    else:
+        ai = np.floor(lat_a / lat_cell).astype(np.int64)
+        aj = np.floor(lng_a / lng_cell).astype(np.int64)
+        a_order = np.lexsort((aj, ai))
+        ai, aj = ai[a_order], aj[a_order]
+        xa, ya, za = _unit_vectors(lat_a[a_order], lng_a[a_order])
+
+    max_chord_sq = (2 * np.sin(radius_m / (2 * EARTH_RADIUS_M))) ** 2
+    found_i, found_j, found_chord_sq = [], [], []
+    for di, dj in _HALF_NEIGHBOURS if upper_only else _ALL_NEIGHBOURS:
+        ni, nj = ai + di, aj + dj
+        in_range = (ni >= bi_min) & (ni <= bi_max) & (nj >= bj_min) & (nj <= bj_max)
+        wanted = (ni - bi_min) * width + (nj - bj_min)
+        slot = np.minimum(np.searchsorted(cell_keys, wanted), len(cell_keys) - 1)
+        hit = np.flatnonzero(in_range & (cell_keys[slot] == wanted))
+        if hit.size == 0:
+            continue
+
+        # Expand to one row per (a point, b point in the matching cell).
+        # Rows for one a point are adjacent, so its coordinates are
+        # repeated rather than gathered.
+        counts = cell_counts[slot[hit]]
+        i = np.repeat(hit, counts)
+        j = np.arange(i.size) + np.repeat(cell_starts[slot[hit]] - (np.cumsum(counts) - counts), counts)
+
+        chord_sq = np.square(np.repeat(xa[hit], counts) - xb[j])
+        chord_sq += np.square(np.repeat(ya[hit], counts) - yb[j])
+        chord_sq += np.square(np.repeat(za[hit], counts) - zb[j])
+        close = chord_sq < max_chord_sq
+        if upper_only and (di, dj) == (0, 0):
+            close &= i < j
+        found_i.append(i[close])
+        found_j.append(j[close])
+        found_chord_sq.append(chord_sq[close])
+
+    if not found_i:
+        return empty
+    i = a_order[np.concatenate(found_i)]
+    j = b_order[np.concatenate(found_j)]
+    # Great-circle distance from chord length; equal to haversine().
+    d = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.concatenate(found_chord_sq)) / 2)
+    if upper_only:
+        i, j = np.minimum(i, j), np.maximum(i, j)
+    return i, j, d
+
 
-    a = sin(dphi/2)**2 + cos(phi1)*cos(phi2)*sin(dlambda/2)**2
-    return 2 * R * atan2(sqrt(a), sqrt(1 - a))
+def _coords(points):
+    lats = np.fromiter((p["lat"] for p in points), dtype=float, count=len(points))
+    lngs = np.fromiter((p["lng"] for p in points), dtype=float, count=len(points))
+    return lats, lngs
 
 
 # ----------------------------------
@@ -26,55 +140,177 @@ def filter_low_risk(points, threshold=0.45):
 # Step B: Remove historically unsafe points
 # ----------------------------------
 def filter_historical(points, history, min_distance=500):
-    safe = []
-    for p in points:
-        too_close = False
-        for h in history:
-            d = haversine(p["lat"], p["lng"], h["lat"], h["lng"])
-            if d < min_distance:
-                too_close = True
-                break
-        if not too_close:
-            safe.append(p)
-    return safe
+    if not points or not history:
+        return list(points)
+
+    lats, lngs = _coords(points)
+    hist_lats, hist_lngs = _coords(history)
+    near, _, _ = radius_pairs(lats, lngs, hist_lats, hist_lngs, min_distance)
+
+    too_close = np.zeros(len(points), dtype=bool)
+    too_close[near] = True
+    return [p for p, unsafe in zip(points, too_close) if not unsafe]
 
 
 # ----------------------------------
 # Step C: Stability check
 # ----------------------------------
-def filter_stable(points, risk_history, window=3):
-    stable = []
-    for p in points:
-        key = f"{round(p['lat'],4)}_{round(p['lng'],4)}"
-        history = risk_history.get(key, [])
-        if len(history) >= window:
-            if history[-1] <= mean(history):
-                stable.append(p)
-    return stable
+def filter_stable(points, risk_stats, window=3):
+    """
+    Keeps points whose location has at least `window` readings and whose
+    latest reading is not above the rolling mean. `risk_stats` is a
+    LocationStats store (app.utils.location_stats).
+    """
+    if not points:
+        return []
+    lats, lngs = _coords(points)
+    mask = risk_stats.stable_mask(lats, lngs, window)
+    return [p for p, stable in zip(points, mask) if stable]
 
 
 # ----------------------------------
 # Step D: Cluster nearby safe points
 # ----------------------------------
-def cluster_safezones(points, cluster_radius=300):
-    clusters = []
-
-    for p in points:
-        added = False
-        for c in clusters:
-            d = haversine(p["lat"], p["lng"], c["lat"], c["lng"])
-            if d < cluster_radius:
-                c["points"].append(p)
-                added = True
+def _connected_components(n, u, v):
+    # Vectorized union-find: hook every edge's larger root onto the
+    # smaller one, then compress paths, until no edge spans two roots.
+    # Edges already inside one component are dropped each round.
+    parent = np.arange(n)
+    while True:
+        ru, rv = parent[u], parent[v]
+        split = ru != rv
+        if not split.any():
+            return parent
+        u, v, ru, rv = u[split], v[split], ru[split], rv[split]
+        # Every pointer goes to a smaller index, so any winner among
+        # duplicate hooks keeps the forest acyclic.
+        parent[np.maximum(ru, rv)] = np.minimum(ru, rv)
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
                 break
-        if not added:
-            clusters.append({
-                "lat": p["lat"],
-                "lng": p["lng"],
-                "points": [p]
-            })
+            parent = grand
+
+
+def dbscan(lats, lngs, eps_m, min_samples=1):
+    """
+    DBSCAN over lat/lng in meters. Returns one label per point: clusters
+    are numbered 0..k-1 in order of their first point, noise is -1. A
+    point is core when at least min_samples points (itself included) lie
+    within eps_m; with min_samples=1 every point is core and clusters are
+    the eps_m single-linkage components.
+    """
+    lats, lngs = np.asarray(lats, dtype=float), np.asarray(lngs, dtype=float)
+    n = lats.size
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+
+    i, j, _ = radius_pairs(lats, lngs, lats, lngs, eps_m, upper_only=True)
+    neighbours = 1 + np.bincount(i, minlength=n) + np.bincount(j, minlength=n)
+    core = neighbours >= min_samples
+
+    both_core = core[i] & core[j]
+    roots = _connected_components(n, i[both_core], j[both_core])
+
+    labels = np.where(core, roots, -1)
+    # Border points join the cluster of a core neighbour.
+    for border, anchor in ((i, j), (j, i)):
+        attach = ~core[border] & core[anchor]
+        labels[border[attach]] = roots[anchor[attach]]
+
+    clustered = labels >= 0
+    _, first_seen, dense = np.unique(labels[clustered], return_index=True, return_inverse=True)
+    rank = np.empty_like(first_seen)
+    rank[np.argsort(first_seen)] = np.arange(first_seen.size)
+    labels[clustered] = rank[dense]
+    return labels
+
+
+def _centres_and_spread(labels, lats, lngs, k):
+    sizes = np.bincount(labels, minlength=k)
+    centre_lat = np.bincount(labels, lats, minlength=k) / sizes
+    centre_lng = np.bincount(labels, lngs, minlength=k) / sizes
+    spread = haversine(lats, lngs, centre_lat[labels], centre_lng[labels])
+    return centre_lat, centre_lng, spread
 
-    return clusters
+
+def _split_within(lats, lngs, max_radius):
+    """
+    Halves a group of points at the median of its wider axis until every
+    part lies within max_radius of its mean position. Returns the part
+    number of each point.
+    """
+    parts = np.zeros(lats.size, dtype=np.int64)
+    pending = [np.arange(lats.size)]
+    count = 0
+    while pending:
+        idx = pending.pop()
+        lat, lng = lats[idx], lngs[idx]
+        if haversine(lat, lng, lat.mean(), lng.mean()).max() <= max_radius:
+            parts[idx] = count
+            count += 1
+            continue
+        height = np.ptp(lat)
+        width = np.ptp(lng) * np.cos(np.radians(lat.mean()))
+        order = np.argsort(lat if height >= width else lng, kind="stable")
+        half = idx.size // 2
+        pending.extend((idx[order[half:]], idx[order[:half]]))
+    return parts
+
+
+def cluster_safezones(points, cluster_radius=300, min_samples=3, max_radius=MAX_ZONE_RADIUS_M):
+    """
+    Groups points with dbscan(). Each cluster is centred on its members'
+    mean position and its radius covers every member (at least
+    cluster_radius). Noise points are dropped.
+
+    DBSCAN can chain dense points into one long cluster, so a cluster
+    wider than max_radius is split into parts that each fit within it.
+    """
+    if not points:
+        return []
+
+    lats, lngs = _coords(points)
+    labels = dbscan(lats, lngs, cluster_radius, min_samples)
+    clustered = np.flatnonzero(labels >= 0)
+    if clustered.size == 0:
+        return []
+
+    labels, lats, lngs = labels[clustered], lats[clustered], lngs[clustered]
+    k = labels.max() + 1
+    centre_lat, centre_lng, spread = _centres_and_spread(labels, lats, lngs, k)
+
+    widest = np.zeros(k)
+    np.maximum.at(widest, labels, spread)
+    wide = np.flatnonzero(widest > max_radius)
+    if wide.size:
+        by_label = np.argsort(labels, kind="stable")
+        starts = np.searchsorted(labels[by_label], wide, side="left")
+        stops = np.searchsorted(labels[by_label], wide, side="right")
+        for c, lo, hi in zip(wide, starts, stops):
+            idx = by_label[lo:hi]
+            parts = _split_within(lats[idx], lngs[idx], max_radius)
+            moved = parts > 0
+            labels[idx[moved]] = k + parts[moved] - 1
+            k += parts.max()
+        centre_lat, centre_lng, spread = _centres_and_spread(labels, lats, lngs, k)
+
+    radii = np.full(k, float(cluster_radius))
+    np.maximum.at(radii, labels, spread)
+
+    members = [[] for _ in range(k)]
+    for label, index in zip(labels, clustered):
+        members[label].append(points[index])
+
+    return [
+        {
+            "lat": round(float(centre_lat[c]), 6),
+            "lng": round(float(centre_lng[c]), 6),
+            "radius": int(np.ceil(radii[c])),
+            "points": members[c],
+        }
+        for c in range(k)
+    ]
 
 
 # ----------------------------------
@@ -87,57 +323,18 @@ def rank_safezones(clusters):
         score = round(1 - avg_risk, 3)
 
         results.append({
-        "id": f"SZ-{i+1}",
-        "lat": c["lat"],
-        "lng": c["lng"],
-        "radius": 300,
-        "safety_score": score,
-        "confidence_score": score,
-        "confidence_level": (
-            "HIGH" if score > 0.8 else
-            "MEDIUM" if score > 0.6 else
-        "LOW"
-        ),
-        "last_verified": datetime.now().isoformat(),
-        "reason": "Low historical risk and stable conditions"
-})
-
-
-#Confidenc Decay Over Time
-
-def apply_confidence_decay(zone, minutes_elapsed):
-    decay_rate = 0.02  # per minute
-    decayed = max(0.0, zone["confidence_score"] - decay_rate * minutes_elapsed)
-
-    zone["confidence_score"] = round(decayed, 2)
-    zone["confidence_level"] = (
-        "HIGH" if decayed > 0.8 else
-        "MEDIUM" if decayed > 0.6 else
-        "LOW"
-    )
-    return zone
-
-def persist_safezones(zones, collection):
-    now = datetime.now()
-
-    for z in zones:
-        expires_at = now + timedelta(minutes=30)
-
-        collection.update_one(
-            {"zone_id": z["id"]},
-            {
-                "$set": {
-                    "lat": z["lat"],
-                    "lng": z["lng"],
-                    "radius": z["radius"],
-                    "confidence_score": z["confidence_score"],
-                    "confidence_level": z["confidence_level"],
-                    "last_verified": now,
-                    "expires_at": expires_at,
-                    "source": "AUTO",
-                    "active": True,
-                    "reason": z["reason"]
-                }
-            },
-            upsert=True
-        )
+            "id": f"SZ-{i+1}",
+            "lat": c["lat"],
+            "lng": c["lng"],
+            "radius": c.get("radius", 300),
+            "safety_score": score,
+            "confidence_score": score,
+            "confidence_level": (
+                "HIGH" if score > 0.8 else
+                "MEDIUM" if score > 0.6 else
+                "LOW"
+            ),
+            "last_verified": datetime.now().isoformat(),
+            "reason": "Low historical risk and stable conditions"
+        })
+    return results
@@ -1,3 +1,10 @@
+import os
+import threading
+from collections import deque
+
+import numpy as np
+
+
 def calculate_risk_trend(risk_values):
     """
     Determines how fast risk is increasing
@@ -15,12 +22,144 @@ def is_sudden_spike(risk_values, threshold=0.25):
     trend = calculate_risk_trend(risk_values)
     return trend >= threshold
 
+from app.ai.temporal_dataset import SEQUENCE_LENGTH
 from app.database import predictions_collection
 
-def get_recent_risks(limit=5):
+DEFAULT_CAMERA_ID = "default"
+RISK_WINDOW_SIZE = max(10, int(os.getenv("POLARIS_RISK_WINDOW_SIZE", "50")))
+FEATURE_VECTOR_WIDTH = 5  # ai_probability, risk_score, brightness, edge_density, entropy
+
+
+class FeatureRing:
+    """
+    Fixed-size ring of feature vectors for one camera.
+    Every row is written twice, so the latest window is always a single
+    contiguous slice and appends stay O(1).
+    """
+
+    def __init__(self, capacity, width=FEATURE_VECTOR_WIDTH):
+        self.capacity = capacity
+        self.count = 0
+        self._next = 0
+        self._buffer = np.zeros((2 * capacity, width), dtype=np.float32)
+
+    def append(self, vector):
+        self._buffer[self._next] = vector
+        self._buffer[self._next + self.capacity] = vector
+        self._next = (self._next + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def latest(self, length):
+        length = min(length, self.count)
+        end = self._next + self.capacity
+        return self._buffer[end - length:end]
+
+
+# Per-camera rolling risk scores and feature vectors, oldest first.
+# Seeded once from Mongo at startup, then appended in-process per frame.
+_risk_lock = threading.Lock()
+_risk_windows: dict[str, deque] = {}
+_feature_rings: dict[str, FeatureRing] = {}
+
+
+def _window_for(camera_id):
+    window = _risk_windows.get(camera_id)
+    if window is None:
+        window = deque(maxlen=RISK_WINDOW_SIZE)
+        _risk_windows[camera_id] = window
+    return window
+
+
+def _ring_for(camera_id):
+    ring = _feature_rings.get(camera_id)
+    if ring is None:
+        ring = FeatureRing(SEQUENCE_LENGTH)
+        _feature_rings[camera_id] = ring
+    return ring
+
+
+def feature_vector(ai_probability, risk_score, features):
+    """
+    The 5-feature temporal input, in the same order as the training set.
+    """
+    return (
+        ai_probability,
+        risk_score,
+        features["brightness"],
+        features["edge_density"],
+        features["entropy"],
+    )
+
+
+def seed_camera_history(scan_limit=5000):
+    """
+    Loads the latest risk scores and feature vectors per camera
+    from stored predictions.
+    """
+    cursor = predictions_collection.find(
+        {},
+        {"_id": 0, "camera_id": 1, "risk_score": 1, "ai_probability": 1, "features": 1},
+    ).sort("timestamp", -1).limit(scan_limit)
+
+    newest_first: dict[str, list] = {}
+    for doc in cursor:
+        if doc.get("risk_score") is None:
+            continue
+        docs = newest_first.setdefault(doc.get("camera_id") or DEFAULT_CAMERA_ID, [])
+        if len(docs) < RISK_WINDOW_SIZE:
+            docs.append(doc)
+
+    with _risk_lock:
+        _risk_windows.clear()
+        _feature_rings.clear()
+        for camera_id, docs in newest_first.items():
+            window = _window_for(camera_id)
+            for doc in reversed(docs):
+                window.append(float(doc["risk_score"]))
+
+            ring = _ring_for(camera_id)
+            for doc in reversed(docs[:SEQUENCE_LENGTH]):
+                features = doc.get("features") or {}
+                try:
+                    ring.append(feature_vector(
+                        doc.get("ai_probability", 0.0),
+                        doc["risk_score"],
+                        features,
+                    ))
+                except (KeyError, TypeError, ValueError):
+                    continue
+
+    return sum(len(docs) for docs in newest_first.values())
+
+
+def record_risk(risk_score, camera_id=DEFAULT_CAMERA_ID):
+    with _risk_lock:
+        _window_for(camera_id).append(float(risk_score))
+
+
+def record_feature_vector(vector, camera_id=DEFAULT_CAMERA_ID):
+    with _risk_lock:
+        _ring_for(camera_id).append(vector)
+
+
+def get_feature_sequence(length=SEQUENCE_LENGTH, camera_id=DEFAULT_CAMERA_ID):
+    """
+    Latest feature vectors for a camera as a (length, 5) array,
+    or None until the camera has that many frames.
+    """
+    with _risk_lock:
+        ring = _feature_rings.get(camera_id)
+        if ring is None or ring.count < length:
+            return None
+        return ring.latest(length).copy()
+
+
+def get_recent_risks(limit=5, camera_id=DEFAULT_CAMERA_ID):
     """
-    Gets last N risk scores
+    Gets last N risk scores for a camera (oldest first)
     """
-    cursor = predictions_collection.find().sort("timestamp", -1).limit(limit)
-    risks = [doc["risk_score"] for doc in reversed(list(cursor))]
-    return risks
+    with _risk_lock:
+        window = _risk_windows.get(camera_id)
+        if not window:
+            return []
+        return list(window)[-limit:]
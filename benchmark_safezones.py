@@ -0,0 +1,71 @@
+"""
+Times the safe-zone pipeline on synthetic points around Mumbai.
+
+    python benchmark_safezones.py --points 100000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.utils.safezone_detector import (
+    cluster_safezones,
+    dbscan,
+    filter_historical,
+    rank_safezones,
+)
+
+
+def synthetic_points(count, seed=7):
+    # Half the points gather around a few hundred hotspots (cameras,
+    # sensor clusters); the rest are scattered over ~40 x 30 km.
+    rng = np.random.default_rng(seed)
+    hotspots = count // 2
+    centres = np.column_stack((
+        19.0 + rng.random(1000) * 0.35,
+        72.8 + rng.random(1000) * 0.28,
+    ))
+    around = centres[rng.integers(0, len(centres), hotspots)] + rng.normal(0, 0.002, (hotspots, 2))
+    scattered = np.column_stack((
+        19.0 + rng.random(count - hotspots) * 0.35,
+        72.8 + rng.random(count - hotspots) * 0.28,
+    ))
+    coords = np.vstack((around, scattered))
+    risks = rng.random(count) * 0.45
+    return [
+        {"lat": float(lat), "lng": float(lng), "risk_score": float(risk)}
+        for (lat, lng), risk in zip(coords, risks)
+    ]
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:<28}{(time.perf_counter() - start) * 1000:9.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--history", type=int, default=2_000)
+    parser.add_argument("--min-samples", type=int, default=5)
+    args = parser.parse_args()
+
+    points = synthetic_points(args.points)
+    history = synthetic_points(args.history, seed=11)
+    lats = np.array([p["lat"] for p in points])
+    lngs = np.array([p["lng"] for p in points])
+    print(f"{args.points} points, {args.history} historical events")
+
+    labels = timed(f"dbscan (min_samples={args.min_samples})", lambda: dbscan(lats, lngs, 300, args.min_samples))
+    print(f"{'':<28}{labels.max() + 1} clusters, {int((labels < 0).sum())} noise points")
+    safe = timed("filter_historical", lambda: filter_historical(points, history))
+    clusters = timed("cluster_safezones", lambda: cluster_safezones(safe))
+    zones = timed("rank_safezones", lambda: rank_safezones(clusters))
+    print(f"{'':<28}{len(safe)} points kept, {len(zones)} zones")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,10 @@ import os
 from app.auth.client_auth import build_auth_headers
 
 SERVER_URL = "http://127.0.0.1:8000/input/camera"
+CAMERA_ID = os.getenv("POLARIS_CAMERA_ID", "default")
+# Optional camera position; feeds the map and safe-zone detection.
+CAMERA_LAT = os.getenv("POLARIS_CAMERA_LAT")
+CAMERA_LNG = os.getenv("POLARIS_CAMERA_LNG")
 TEMP_DIR = "temp_images"
 os.makedirs(TEMP_DIR, exist_ok=True)
 
@@ -36,6 +40,10 @@ try:
                 SERVER_URL,
                 headers=build_auth_headers(base_url, preferred_role="ingest"),
                 files={"image": (os.path.basename(image_path), img, "image/jpeg")},
+                data={
+                    "camera_id": CAMERA_ID,
+                    **({"lat": CAMERA_LAT, "lng": CAMERA_LNG} if CAMERA_LAT and CAMERA_LNG else {}),
+                },
                 timeout=20,
             )
 
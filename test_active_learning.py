@@ -0,0 +1,85 @@
+import unittest
+from collections import Counter, deque
+from unittest.mock import patch
+
+import app.utils.active_learning as active_learning
+
+
+class FakeCursor(list):
+    def sort(self, field, direction):
+        return FakeCursor(sorted(self, key=lambda doc: doc[field], reverse=direction < 0))
+
+    def limit(self, count):
+        return FakeCursor(self[:count])
+
+
+class FakeFeedback:
+    def __init__(self, labels):
+        self.docs = [{"label": label, "timestamp": index} for index, label in enumerate(labels)]
+        self.finds = 0
+
+    def find(self, query, projection):
+        self.finds += 1
+        return FakeCursor(self.docs)
+
+
+class FeedbackBiasTests(unittest.TestCase):
+    def setUp(self):
+        self.feedback = FakeFeedback(["TRUE_POSITIVE", "FALSE_POSITIVE", "LATE", "LATE"])
+        patches = [
+            patch.object(active_learning, "feedback_collection", self.feedback),
+            patch.dict(active_learning._bias_state, {
+                "window": None,
+                "labels": deque(),
+                "counts": Counter(),
+                "loaded_at": 0.0,
+                "value": 0.0,
+            }),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def expected(self, labels):
+        return active_learning._bias_from_counts(Counter(labels), len(labels))
+
+    def test_bias_is_cached_until_the_ttl_expires(self):
+        first = active_learning.feedback_bias(window=10)
+        self.feedback.docs.append({"label": "FALSE_POSITIVE", "timestamp": 99})
+
+        self.assertEqual(active_learning.feedback_bias(window=10), first)
+        self.assertEqual(self.feedback.finds, 1)
+
+        active_learning._bias_state["loaded_at"] -= active_learning.FEEDBACK_BIAS_TTL_SECONDS
+        reloaded = active_learning.feedback_bias(window=10)
+
+        self.assertEqual(self.feedback.finds, 2)
+        self.assertEqual(reloaded, self.expected(["TRUE_POSITIVE", "FALSE_POSITIVE", "LATE", "LATE", "FALSE_POSITIVE"]))
+
+    def test_window_change_reloads_the_latest_labels(self):
+        active_learning.feedback_bias(window=10)
+        value = active_learning.feedback_bias(window=2)
+
+        self.assertEqual(self.feedback.finds, 2)
+        self.assertEqual(value, self.expected(["LATE", "LATE"]))
+        self.assertEqual(active_learning._bias_state["labels"].maxlen, 2)
+
+    def test_recorded_labels_update_the_window_incrementally(self):
+        active_learning.feedback_bias(window=3)
+        for label in ("false_positive", "FALSE_POSITIVE"):
+            active_learning.record_feedback_label(label)
+
+        self.assertEqual(list(active_learning._bias_state["labels"]), ["LATE", "FALSE_POSITIVE", "FALSE_POSITIVE"])
+        self.assertEqual(active_learning._bias_state["counts"]["LATE"], 1)
+        self.assertEqual(active_learning.feedback_bias(window=3), self.expected(["LATE", "FALSE_POSITIVE", "FALSE_POSITIVE"]))
+        self.assertEqual(self.feedback.finds, 1)
+
+    def test_label_before_first_load_is_left_to_the_load(self):
+        active_learning.record_feedback_label("LATE")
+
+        self.assertIsNone(active_learning._bias_state["window"])
+        self.assertEqual(self.feedback.finds, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
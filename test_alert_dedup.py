@@ -0,0 +1,105 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from pymongo.errors import AutoReconnect
+
+import app.services.alert_dedup as alert_dedup
+
+
+class FakeAlerts:
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+        self.queries = 0
+
+    def find_one(self, query, sort=None, projection=None):
+        self.queries += 1
+        matches = [
+            doc for doc in self.docs
+            if doc["dedup_key"] == query["dedup_key"]
+            and doc["timestamp"] >= query["timestamp"]["$gte"]
+        ]
+        return max(matches, key=lambda doc: doc["timestamp"]) if matches else None
+
+
+class AlertDedupTests(unittest.TestCase):
+    def setUp(self):
+        alert_dedup.reset_dedup_cache()
+
+    def tearDown(self):
+        alert_dedup.reset_dedup_cache()
+
+    def test_key_normalizes_severity_and_whitespace(self):
+        self.assertEqual(
+            alert_dedup.alert_dedup_key("warning", " Rising water "),
+            alert_dedup.alert_dedup_key("WARNING", "Rising water"),
+        )
+        self.assertNotEqual(
+            alert_dedup.alert_dedup_key("WARNING", "Rising water"),
+            alert_dedup.alert_dedup_key("ALERT", "Rising water"),
+        )
+
+    def test_second_claim_in_window_is_served_from_memory(self):
+        alerts = FakeAlerts()
+        key = alert_dedup.alert_dedup_key("ALERT", "Move to safe areas")
+
+        with patch.object(alert_dedup, "alerts_collection", alerts):
+            self.assertFalse(alert_dedup.claim_dedup_window(key))
+            self.assertTrue(alert_dedup.claim_dedup_window(key))
+
+        self.assertEqual(alerts.queries, 1)
+
+    def test_alert_from_another_process_counts_until_window_ends(self):
+        key = alert_dedup.alert_dedup_key("ALERT", "Move to safe areas")
+        recent = FakeAlerts([{"dedup_key": key, "timestamp": datetime.now() - timedelta(seconds=5)}])
+        expired = FakeAlerts([{
+            "dedup_key": key,
+            "timestamp": datetime.now() - timedelta(seconds=alert_dedup.ALERT_DEDUP_SECONDS + 5),
+        }])
+
+        with patch.object(alert_dedup, "alerts_collection", recent):
+            self.assertTrue(alert_dedup.claim_dedup_window(key))
+
+        alert_dedup.reset_dedup_cache()
+        with patch.object(alert_dedup, "alerts_collection", expired):
+            self.assertFalse(alert_dedup.claim_dedup_window(key))
+
+    def test_keys_learned_from_mongo_expire_by_their_dispatch_time(self):
+        window = timedelta(seconds=alert_dedup.ALERT_DEDUP_SECONDS)
+        local = alert_dedup.alert_dedup_key("WARNING", "Local alert")
+        remote = alert_dedup.alert_dedup_key("ALERT", "Remote alert")
+        alerts = FakeAlerts([{"dedup_key": remote, "timestamp": datetime.now() - window + timedelta(seconds=5)}])
+
+        with patch.object(alert_dedup, "alerts_collection", alerts):
+            self.assertFalse(alert_dedup.claim_dedup_window(local))
+            self.assertTrue(alert_dedup.claim_dedup_window(remote))
+
+        # The remote alert's window ends first, although it was recorded last.
+        alert_dedup._prune(datetime.now() + timedelta(seconds=10))
+
+        self.assertEqual(set(alert_dedup._seen), {local})
+
+    def test_released_key_can_be_claimed_again(self):
+        key = alert_dedup.alert_dedup_key("EMERGENCY", "Evacuate")
+
+        with patch.object(alert_dedup, "alerts_collection", FakeAlerts()):
+            self.assertFalse(alert_dedup.claim_dedup_window(key))
+            alert_dedup.release_dedup_window(key)
+            self.assertFalse(alert_dedup.claim_dedup_window(key))
+
+    def test_failed_lookup_does_not_keep_the_claim(self):
+        key = alert_dedup.alert_dedup_key("EMERGENCY", "Evacuate")
+        alerts = FakeAlerts()
+
+        with patch.object(alert_dedup, "alerts_collection", alerts), \
+                patch.object(alerts, "find_one", side_effect=AutoReconnect("primary stepped down")):
+            with self.assertRaises(AutoReconnect):
+                alert_dedup.claim_dedup_window(key)
+
+        self.assertNotIn(key, alert_dedup._seen)
+        with patch.object(alert_dedup, "alerts_collection", FakeAlerts()):
+            self.assertFalse(alert_dedup.claim_dedup_window(key))
+
+
+if __name__ == "__main__":
+    unittest.main()
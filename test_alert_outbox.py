@@ -0,0 +1,187 @@
+import unittest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from pymongo import ReturnDocument
+
+import app.services.alert_outbox as alert_outbox
+
+
+def _matches(doc, query):
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(_matches(doc, branch) for branch in condition):
+                return False
+            continue
+        value = doc.get(key)
+        if not isinstance(condition, dict):
+            if value != condition:
+                return False
+            continue
+        for op, operand in condition.items():
+            if op == "$exists" and (key in doc) != operand:
+                return False
+            if op == "$lte" and (value is None or value > operand):
+                return False
+            if op == "$in" and value not in operand:
+                return False
+    return True
+
+
+class FakeAlerts:
+    """
+    The slice of a pymongo collection the outbox uses.
+    """
+
+    def __init__(self, docs):
+        self.docs = [dict(doc, _id=index) for index, doc in enumerate(docs)]
+
+    def get(self, _id):
+        return self.docs[_id]
+
+    def find(self, query, projection=None):
+        return [dict(doc) for doc in self.docs if _matches(doc, query)]
+
+    def _apply(self, doc, update):
+        doc.update(update.get("$set", {}))
+        for field in update.get("$unset", {}):
+            doc.pop(field, None)
+        for field, step in update.get("$inc", {}).items():
+            doc[field] = doc.get(field, 0) + step
+
+    def find_one_and_update(self, query, update, sort, return_document):
+        assert return_document is ReturnDocument.AFTER
+        candidates = [doc for doc in self.docs if _matches(doc, query)]
+        for field, direction in reversed(sort):
+            candidates.sort(key=lambda doc: doc[field], reverse=direction < 0)
+        if not candidates:
+            return None
+        self._apply(candidates[0], update)
+        return dict(candidates[0])
+
+    def update_one(self, query, update):
+        for doc in self.docs:
+            if _matches(doc, query):
+                self._apply(doc, update)
+                return SimpleNamespace(modified_count=1)
+        return SimpleNamespace(modified_count=0)
+
+
+class AlertOutboxTests(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime.now()
+        self.patches = [
+            patch.object(alert_outbox, "publish_event"),
+            patch.object(alert_outbox, "ALERT_OUTBOX_BACKOFF_SECONDS", 5),
+            patch.object(alert_outbox, "ALERT_OUTBOX_BACKOFF_MAX_SECONDS", 30),
+            patch.object(alert_outbox, "ALERT_MAX_DELIVERIES", 3),
+            patch.dict(alert_outbox._state, {"sent": 0, "rescheduled": 0, "failed": 0, "lease_lost": 0}),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in reversed(self.patches):
+            p.stop()
+
+    def use(self, *docs):
+        alerts = FakeAlerts(docs)
+        p = patch.object(alert_outbox, "alerts_collection", alerts)
+        p.start()
+        self.patches.append(p)
+        return alerts
+
+    def queued(self, severity, due_in=0, **extra):
+        return {
+            "status": "queued",
+            "severity": severity,
+            "priority": alert_outbox.severity_priority(severity),
+            "attempts": 0,
+            "next_attempt_at": self.now + timedelta(seconds=due_in),
+            **extra,
+        }
+
+    def test_claims_highest_severity_due_alert_first(self):
+        self.use(
+            self.queued("WATCH", due_in=-20),
+            self.queued("EMERGENCY", due_in=-10),
+            self.queued("EMERGENCY", due_in=-15),
+            self.queued("EMERGENCY", due_in=60),
+        )
+
+        claimed = [alert_outbox.claim_next_alert("w1")["_id"] for _ in range(3)]
+
+        self.assertEqual(claimed, [2, 1, 0])
+        self.assertIsNone(alert_outbox.claim_next_alert("w1"))
+
+    def test_expired_lease_is_reclaimed_but_live_lease_is_not(self):
+        alerts = self.use(
+            self.queued("ALERT", status="sending", attempts=1, lease_owner="dead",
+                        lease_expires_at=self.now - timedelta(seconds=1)),
+            self.queued("ALERT", status="sending", attempts=1, lease_owner="busy",
+                        lease_expires_at=self.now + timedelta(seconds=60)),
+        )
+
+        claimed = alert_outbox.claim_next_alert("w2")
+
+        self.assertEqual((claimed["_id"], claimed["lease_owner"], claimed["attempts"]), (0, "w2", 2))
+        self.assertIsNone(alert_outbox.claim_next_alert("w2"))
+        self.assertEqual(alerts.get(1)["lease_owner"], "busy")
+
+    def test_only_the_lease_owner_records_the_outcome(self):
+        alerts = self.use(self.queued("WARNING"))
+        stale = alert_outbox.claim_next_alert("w1")
+        alerts.get(0)["lease_owner"] = "w2"  # lease expired and was reclaimed
+
+        with patch.object(alert_outbox, "deliver", return_value={"ok": True}):
+            alert_outbox.deliver_claimed_alert(stale, "w1")
+
+        self.assertEqual(alerts.get(0)["status"], "sending")
+        self.assertEqual(alert_outbox._state["lease_lost"], 1)
+        self.assertEqual(alert_outbox._state["sent"], 0)
+
+    def test_backoff_doubles_up_to_the_cap(self):
+        self.assertEqual([alert_outbox.backoff_seconds(n) for n in range(1, 6)], [5, 10, 20, 30, 30])
+
+    def test_failed_delivery_is_rescheduled_then_marked_failed(self):
+        alerts = self.use(self.queued("WARNING", due_in=-1))
+
+        with patch.object(alert_outbox, "deliver", return_value={"ok": False, "error": "fcm 503"}):
+            alert_outbox.deliver_claimed_alert(alert_outbox.claim_next_alert("w1"), "w1")
+            doc = alerts.get(0)
+            self.assertEqual(doc["status"], "queued")
+            self.assertNotIn("lease_owner", doc)
+            delay = (doc["next_attempt_at"] - doc["last_attempt_at"]).total_seconds()
+            self.assertAlmostEqual(delay, 5, places=3)
+
+            doc["next_attempt_at"] = self.now
+            alert_outbox.deliver_claimed_alert(alert_outbox.claim_next_alert("w1"), "w1")
+            doc["next_attempt_at"] = self.now
+            alert_outbox.deliver_claimed_alert(alert_outbox.claim_next_alert("w1"), "w1")
+
+        self.assertEqual((doc["status"], doc["attempts"], doc["retry_count"]), ("failed", 3, 2))
+        self.assertEqual(alert_outbox._state["rescheduled"], 2)
+        self.assertEqual(alert_outbox._state["failed"], 1)
+
+    def test_legacy_alerts_are_requeued_or_closed_once(self):
+        alerts = self.use(
+            {"status": "failed", "severity": "ALERT", "retry_count": 0, "timestamp": self.now},
+            {"status": "failed", "severity": "ALERT", "retry_count": 2, "timestamp": self.now},
+            {"status": "queued", "severity": "WATCH", "retry_count": 0,
+             "timestamp": self.now - timedelta(days=2)},
+            {"status": "sent", "severity": "WATCH", "timestamp": self.now},
+        )
+
+        counts = alert_outbox.requeue_legacy_alerts(self.now)
+
+        self.assertEqual(counts, {"requeued": 1, "closed": 2})
+        self.assertEqual(alerts.get(0)["status"], "queued")
+        self.assertEqual(alerts.get(0)["attempts"], 1)
+        self.assertEqual(alert_outbox.claim_next_alert("w1")["_id"], 0)
+        self.assertEqual([alerts.get(i)["status"] for i in (1, 2, 3)], ["failed", "failed", "sent"])
+        self.assertEqual(alert_outbox.requeue_legacy_alerts(self.now), {"requeued": 0, "closed": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+import app.services.decision_snapshot as decision_snapshot
+from app.services.snapshot_cache import TtlSingleFlight
+
+
+AUTOMATED = {"final_risk_level": "WATCH", "decision_mode": "AUTOMATED"}
+NEWER = {"final_risk_level": "WARNING", "decision_mode": "AUTOMATED"}
+OVERRIDE = {"final_risk_level": "IMMINENT", "decision_mode": "MANUAL_OVERRIDE"}
+
+
+class DecisionSnapshotTests(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime.now()
+        self.stored = (AUTOMATED, self.now)
+        self.loads = 0
+        patches = [
+            patch.dict(decision_snapshot._state, {"version": 0, "decision": None, "decided_at": None, "refreshed_at": None}),
+            patch.object(decision_snapshot, "_reload_flight", TtlSingleFlight(60)),
+            patch.object(decision_snapshot, "_load_latest_decision", self.load),
+            patch.object(decision_snapshot, "publish_event"),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def load(self):
+        self.loads += 1
+        return self.stored
+
+    def test_etag_changes_only_with_the_decision(self):
+        first = decision_snapshot.refresh_decision_snapshot()
+        same = decision_snapshot.refresh_decision_snapshot()
+        decision_snapshot.publish_latest_decision(NEWER, self.now + timedelta(seconds=1))
+        published, stale = decision_snapshot.peek_decision_snapshot()
+
+        self.assertEqual(first["etag"], same["etag"])
+        self.assertNotEqual(published["etag"], first["etag"])
+        self.assertEqual(published["decision"], NEWER)
+        self.assertFalse(stale)
+
+    def test_reload_does_not_replace_a_newer_published_decision(self):
+        # The frame's prediction is still queued for persistence.
+        decision_snapshot.publish_latest_decision(NEWER, self.now + timedelta(seconds=1))
+
+        snapshot = decision_snapshot.refresh_stale_decision_snapshot()
+
+        self.assertEqual(snapshot["decision"], NEWER)
+
+        # An override set by another worker wins regardless of time.
+        decision_snapshot._reload_flight.invalidate()
+        self.stored = (OVERRIDE, self.now - timedelta(minutes=5))
+        self.assertEqual(decision_snapshot.refresh_stale_decision_snapshot()["decision"], OVERRIDE)
+
+    def test_reload_is_dropped_when_a_decision_is_published_meanwhile(self):
+        def load_then_publish():
+            decision_snapshot.publish_latest_decision(NEWER, self.now - timedelta(minutes=1))
+            return AUTOMATED, self.now
+
+        with patch.object(decision_snapshot, "_load_latest_decision", load_then_publish):
+            snapshot = decision_snapshot.refresh_decision_snapshot()
+
+        self.assertEqual(snapshot["decision"], NEWER)
+
+    def test_concurrent_stale_pollers_share_one_reload(self):
+        def slow_load():
+            time.sleep(0.1)
+            return self.load()
+
+        with patch.object(decision_snapshot, "_load_latest_decision", slow_load):
+            threads = [threading.Thread(target=decision_snapshot.refresh_stale_decision_snapshot) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(self.loads, 1)
+
+    def test_long_poll_wakes_up_on_publish(self):
+        etag = decision_snapshot.refresh_decision_snapshot()["etag"]
+
+        async def scenario():
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.05, decision_snapshot.publish_latest_decision, NEWER)
+            started = time.monotonic()
+            snapshot = await decision_snapshot.wait_for_decision_change(etag, timeout=5)
+            return snapshot, time.monotonic() - started
+
+        snapshot, waited = asyncio.run(scenario())
+
+        self.assertEqual(snapshot["decision"], NEWER)
+        self.assertLess(waited, 1)
+
+    def test_latest_decision_endpoint_answers_304_for_a_known_etag(self):
+        from app.main import app
+
+        client = TestClient(app)
+        first = client.get("/decision/latest")
+        repeat = client.get("/decision/latest", headers={"If-None-Match": first.headers["etag"]})
+
+        self.assertEqual(first.json(), AUTOMATED)
+        self.assertEqual(repeat.status_code, 304)
+        self.assertEqual(repeat.headers["etag"], first.headers["etag"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import patch
+
+import app.services.event_hub as event_hub
+
+
+class EventHubTests(unittest.TestCase):
+    def test_local_bus_filters_by_subscribed_type(self):
+        async def scenario():
+            decisions = event_hub.subscribe({"decision"})
+            everything = event_hub.subscribe()
+            try:
+                event_hub.publish_event("alert", {"severity": "WARNING"})
+                event_hub.publish_event("decision", {"final_risk_level": "SAFE"})
+                await asyncio.sleep(0)
+                return (
+                    [decisions.queue.get_nowait()["type"] for _ in range(decisions.queue.qsize())],
+                    [everything.queue.get_nowait()["type"] for _ in range(everything.queue.qsize())],
+                )
+            finally:
+                event_hub.unsubscribe(decisions)
+                event_hub.unsubscribe(everything)
+
+        decision_types, all_types = asyncio.run(scenario())
+
+        self.assertEqual(decision_types, ["decision"])
+        self.assertEqual(all_types, ["alert", "decision"])
+
+    def test_slow_subscriber_drops_oldest_events(self):
+        async def scenario():
+            subscription = event_hub.subscribe({"alert"})
+            try:
+                for index in range(5):
+                    event_hub.publish_event("alert", {"index": index})
+                await asyncio.sleep(0)
+                return [
+                    subscription.queue.get_nowait()["data"]["index"]
+                    for _ in range(subscription.queue.qsize())
+                ]
+            finally:
+                event_hub.unsubscribe(subscription)
+
+        with patch.object(event_hub, "EVENT_QUEUE_SIZE", 2):
+            received = asyncio.run(scenario())
+
+        self.assertEqual(received, [3, 4])
+
+    def test_publish_only_enqueues_while_valkey_is_connected(self):
+        async def scenario():
+            subscription = event_hub.subscribe({"alert"})
+            try:
+                event_hub.publish_event("alert", {"severity": "WARNING"})
+                await asyncio.sleep(0)
+                return subscription.queue.qsize()
+            finally:
+                event_hub.unsubscribe(subscription)
+
+        with patch.dict(event_hub._state, {"valkey_connected": True}), \
+                patch.object(event_hub, "_publisher_client", side_effect=AssertionError("blocking publish")):
+            delivered_locally = asyncio.run(scenario())
+            queued = event_hub._outbound.get_nowait()
+
+        self.assertEqual(delivered_locally, 0)
+        self.assertEqual(queued["data"], {"severity": "WARNING"})
+
+    def test_decisions_use_the_router_channel_and_wire_format(self):
+        decision = {"final_risk_level": "WATCH"}
+        channel, payload = event_hub.channel_message(event_hub.make_event("decision", decision))
+
+        self.assertEqual(channel, event_hub.DECISION_CHANNEL)
+        self.assertEqual(json.loads(payload), decision)
+        relayed = event_hub.event_from_message(channel, payload)
+        self.assertEqual((relayed["type"], relayed["data"]), ("decision", decision))
+
+        channel, payload = event_hub.channel_message(event_hub.make_event("alert", {"id": 1}))
+        self.assertEqual(channel, event_hub.EVENT_CHANNEL)
+        self.assertEqual(event_hub.event_from_message(channel, payload)["data"], {"id": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
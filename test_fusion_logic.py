@@ -0,0 +1,102 @@
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import app.utils.fusion_logic as fusion_logic
+
+
+class WaterSignalTests(unittest.TestCase):
+    def setUp(self):
+        self.reports = {}
+        self.queries = 0
+        patches = [
+            patch.dict(fusion_logic._zone_signals, clear=True),
+            patch.dict(fusion_logic._zone_load_locks, clear=True),
+            patch.dict(fusion_logic._reloading, clear=True),
+            patch.object(fusion_logic, "_query_reports", self.query),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def query(self, zone_id, since):
+        self.queries += 1
+        return [r for r in self.reports.get(zone_id, []) if r["timestamp"] >= since]
+
+    def test_reports_roll_over_into_minute_buckets(self):
+        minute = datetime(2026, 6, 1, 10, 0)
+        self.assertEqual(
+            fusion_logic._bucket_start(minute + timedelta(seconds=59.9)),
+            fusion_logic._bucket_start(minute),
+        )
+        self.assertEqual(
+            fusion_logic._bucket_start(minute + timedelta(minutes=1)) - fusion_logic._bucket_start(minute),
+            fusion_logic.WATER_SIGNAL_BUCKET_SECONDS,
+        )
+
+        now = datetime.now()
+        fusion_logic.recent_water_signal("Z")
+        fusion_logic.record_water_report("Z", "HIGH", now)
+        fusion_logic.record_water_report("Z", "LOW", now - timedelta(minutes=30))
+        fusion_logic.record_water_report("Z", "SEVERE", now - timedelta(minutes=90))
+
+        self.assertEqual(fusion_logic.recent_water_signal("Z", minutes=20), 1.4)
+        self.assertEqual(fusion_logic.recent_water_signal("Z", minutes=60), 2.0)
+        # Past the retention the bucket is pruned.
+        self.assertEqual(len(fusion_logic._zone_signals["Z"]["buckets"]), 2)
+        self.assertEqual(self.queries, 1)
+
+    def test_zone_reloads_after_ttl(self):
+        self.reports["Z"] = [{"level": "HIGH", "timestamp": datetime.now()}]
+        self.assertEqual(fusion_logic.recent_water_signal("Z"), 1.4)
+
+        # Stored by another worker; visible only after the TTL.
+        self.reports["Z"].append({"level": "SEVERE", "timestamp": datetime.now()})
+        self.assertEqual(fusion_logic.recent_water_signal("Z"), 1.4)
+
+        fusion_logic._zone_signals["Z"]["loaded_at"] -= fusion_logic.WATER_SIGNAL_TTL_SECONDS
+        self.assertEqual(fusion_logic.recent_water_signal("Z"), 3.2)
+        self.assertEqual(self.queries, 2)
+
+    def test_slow_reload_does_not_block_other_zones(self):
+        release = threading.Event()
+
+        def slow_query(zone_id, since):
+            if zone_id == "SLOW":
+                release.wait(5)
+            return self.query(zone_id, since)
+
+        with patch.object(fusion_logic, "_query_reports", slow_query):
+            loader = threading.Thread(target=fusion_logic.recent_water_signal, args=("SLOW",))
+            loader.start()
+            time.sleep(0.05)
+
+            started = time.monotonic()
+            fusion_logic.recent_water_signal("FAST")
+            fusion_logic.record_water_report("FAST", "HIGH", datetime.now())
+            fusion_logic.record_water_report("SLOW", "HIGH", datetime.now())
+            self.assertEqual(fusion_logic.recent_water_signal("FAST"), 1.4)
+            self.assertLess(time.monotonic() - started, 1)
+
+            release.set()
+            loader.join()
+
+        # A report recorded during the reload is kept, not dropped by the swap.
+        self.assertEqual(fusion_logic.recent_water_signal("SLOW"), 1.4)
+
+    def test_stale_zone_is_served_while_it_reloads(self):
+        fusion_logic.record_water_report("Z", "HIGH", datetime.now())
+        self.reports["Z"] = [{"level": "HIGH", "timestamp": datetime.now()}]
+        fusion_logic.recent_water_signal("Z")
+        fusion_logic._zone_signals["Z"]["loaded_at"] -= fusion_logic.WATER_SIGNAL_TTL_SECONDS
+
+        with fusion_logic._zone_load_locks["Z"]:
+            # Another caller holds the reload; this one reads the stale aggregate.
+            self.assertEqual(fusion_logic.recent_water_signal("Z"), 1.4)
+        self.assertEqual(self.queries, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+import os
+import unittest
+import uuid
+from unittest.mock import MagicMock, patch
+
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from app import database
+import app.routes.dashboard as dashboard
+from app.routes.dashboard import NotifyNearbyRequest, nearby_teams_pipeline
+
+
+TEST_MONGO_URL = os.getenv("POLARIS_TEST_MONGO_URL", "mongodb://localhost:27017")
+
+
+class PlanStageTests(unittest.TestCase):
+    def test_collscan_is_found_below_or_and_sort(self):
+        plan = {
+            "stage": "SORT",
+            "inputStage": {
+                "stage": "OR",
+                "inputStages": [
+                    {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}},
+                    {"stage": "COLLSCAN"},
+                ],
+            },
+        }
+
+        self.assertIn("COLLSCAN", set(database._plan_stages(plan)))
+
+
+class GeoPointTests(unittest.TestCase):
+    def test_out_of_range_coordinates_have_no_point(self):
+        self.assertEqual(database.geo_point(19.08, 72.86), {"type": "Point", "coordinates": [72.86, 19.08]})
+        for lat, lng in ((91, 72.86), (19.08, -181), (None, 72.86), (float("nan"), 72.86)):
+            self.assertIsNone(database.geo_point(lat, lng))
+
+
+class NearbyTeamsPipelineTests(unittest.TestCase):
+    """
+    Shape of the $geoNear query without a mongod; HotQueryPlanTests runs
+    it for real.
+    """
+
+    def setUp(self):
+        self.help_requests = MagicMock()
+        self.teams = MagicMock()
+        self.teams.aggregate.return_value = [{"team_id": "TEAM-01", "distance_m": 1234.0}]
+        patches = [
+            patch.object(dashboard, "help_requests_collection", self.help_requests),
+            patch.object(dashboard, "rescue_teams_collection", self.teams),
+            patch.object(dashboard, "team_notifications_collection", MagicMock()),
+            patch.object(dashboard, "publish_event"),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def notify(self, request_doc):
+        self.help_requests.find_one.return_value = request_doc
+        return dashboard.notify_nearby_teams(str(ObjectId()), NotifyNearbyRequest(radius_km=2.5), {})
+
+    def test_geonear_runs_first_on_the_location_index(self):
+        near = database.geo_point(19.0896, 72.8656)
+
+        pipeline = nearby_teams_pipeline(near, 2.5)
+
+        self.assertEqual(list(pipeline[0]), ["$geoNear"])
+        self.assertEqual(pipeline[0]["$geoNear"], {
+            "near": near,
+            "key": "location",
+            "distanceField": "distance_m",
+            "maxDistance": 2500.0,
+            "spherical": True,
+            "query": {"status": {"$in": ["AVAILABLE", "DEPLOYED"]}},
+        })
+        self.assertEqual(pipeline[1:], [{"$project": {"team_id": 1, "distance_m": 1}}])
+
+    def test_notify_nearby_queries_around_the_request_location(self):
+        stored = database.geo_point(19.0, 72.8)
+
+        response = self.notify({"location": stored, "lat": 1.0, "lng": 1.0})
+
+        self.teams.aggregate.assert_called_once_with(nearby_teams_pipeline(stored, 2.5))
+        self.assertEqual(response["teams"], [{"team_id": "TEAM-01", "distance_km": 1.234}])
+
+    def test_notify_nearby_falls_back_to_lat_lng_and_rejects_requests_without_them(self):
+        self.notify({"lat": 19.0, "lng": 72.8})
+        self.teams.aggregate.assert_called_once_with(nearby_teams_pipeline(database.geo_point(19.0, 72.8), 2.5))
+
+        with self.assertRaises(HTTPException) as raised:
+            self.notify({"lat": None, "lng": 72.8})
+        self.assertEqual(raised.exception.status_code, 400)
+
+
+class HotQueryPlanTests(unittest.TestCase):
+    """
+    Runs against a local mongod (POLARIS_TEST_MONGO_URL); skipped when
+    none is reachable.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.client = MongoClient(TEST_MONGO_URL, serverSelectionTimeoutMS=1000)
+        try:
+            cls.client.admin.command("ping")
+        except PyMongoError:
+            cls.client.close()
+            raise unittest.SkipTest(f"No mongod reachable at {TEST_MONGO_URL}")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.close()
+
+    def setUp(self):
+        # A fresh database per test: indexes created by one test must not
+        # leak into another (unittest runs them alphabetically).
+        self.db_name = f"polaris_index_test_{uuid.uuid4().hex[:8]}"
+        self.db = self.client[self.db_name]
+
+    def tearDown(self):
+        self.client.drop_database(self.db_name)
+
+    def test_unindexed_collections_are_reported(self):
+        for collection_name in database.HOT_PATH_INDEXES:
+            self.db[collection_name].insert_one({"seed": True})
+
+        violations = database.audit_hot_query_plans(self.db)
+
+        self.assertTrue(any("predictions" in violation for violation in violations))
+
+    def test_hot_queries_use_indexes(self):
+        database.ensure_hot_path_indexes(self.db)
+
+        self.assertEqual(database.audit_hot_query_plans(self.db), [])
+        database.verify_hot_query_plans(self.db)
+
+    def test_nearby_teams_come_back_within_radius_nearest_first(self):
+        teams = self.db["geo_rescue_teams"]
+        teams.insert_many([
+            {"team_id": "FAR", "status": "AVAILABLE", "lat": 19.30, "lng": 72.86},
+            {"team_id": "NEAR", "status": "AVAILABLE", "lat": 19.0900, "lng": 72.8660},
+            {"team_id": "MID", "status": "DEPLOYED", "lat": 19.1044, "lng": 72.9012},
+            {"team_id": "OFF", "status": "OFFLINE", "lat": 19.0890, "lng": 72.8650},
+            {"team_id": "NOWHERE", "status": "AVAILABLE"},
+            {"team_id": "BAD", "status": "AVAILABLE", "lat": 123.0, "lng": 72.86},
+        ])
+        self.assertEqual(database.backfill_geo_locations(teams), 4)
+        teams.create_index([("location", "2dsphere"), ("status", 1)])
+
+        nearby = list(teams.aggregate(nearby_teams_pipeline(database.geo_point(19.0896, 72.8656), 5.0)))
+
+        self.assertEqual([team["team_id"] for team in nearby], ["NEAR", "MID"])
+        self.assertLess(nearby[0]["distance_m"], nearby[1]["distance_m"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+import torch
+
+import app.ai.infer as infer
+import app.ai.temporal_infer as temporal_infer
+from app.utils.frame import CameraFrame
+from app.utils.image_processing import extract_features
+
+
+class _RecordingModel(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.batch_sizes = []
+
+    def forward(self, x):
+        self.batch_sizes.append(x.shape[0])
+        # Class-1 logit grows with mean brightness so each frame gets its own answer.
+        mean = x.mean(dim=(1, 2, 3))
+        return torch.stack([torch.zeros_like(mean), mean * 10], dim=1)
+
+
+class CnnBatcherTests(unittest.TestCase):
+    def setUp(self):
+        self.original_model = infer._model
+        self.model = _RecordingModel()
+        infer._model = self.model
+
+    def tearDown(self):
+        infer._model = self.original_model
+
+    def test_concurrent_frames_share_one_forward_pass(self):
+        batcher = infer.CnnBatcher(window_ms=200, max_batch_size=8)
+        tensors = [torch.full((3, 4, 4), value) for value in (0.0, 0.1, 0.2, 0.3)]
+        futures = [batcher.submit(t) for t in tensors]
+
+        results = [f.result(timeout=5) for f in futures]
+
+        self.assertEqual(self.model.batch_sizes, [4])
+        self.assertEqual(results, sorted(results))
+        self.assertAlmostEqual(results[0], 0.5, places=5)
+        self.assertEqual(batcher.stats()["largest_batch"], 4)
+
+    def test_batch_is_capped_at_max_batch_size(self):
+        batcher = infer.CnnBatcher(window_ms=200, max_batch_size=2)
+        futures = [batcher.submit(torch.zeros((3, 4, 4))) for _ in range(5)]
+
+        for future in futures:
+            future.result(timeout=5)
+
+        self.assertTrue(all(size <= 2 for size in self.model.batch_sizes))
+        self.assertEqual(sum(self.model.batch_sizes), 5)
+
+    def test_model_errors_propagate_to_every_caller(self):
+        def broken(_x):
+            raise RuntimeError("model unavailable")
+
+        infer._model = broken
+        batcher = infer.CnnBatcher(window_ms=50, max_batch_size=4)
+        futures = [batcher.submit(torch.zeros((3, 4, 4))) for _ in range(2)]
+
+        for future in futures:
+            with self.assertRaises(RuntimeError):
+                future.result(timeout=5)
+
+
+class CameraFrameTests(unittest.TestCase):
+    def _encoded_image(self):
+        rng = np.random.default_rng(7)
+        image = rng.integers(0, 255, size=(48, 64, 3), dtype=np.uint8)
+        ok, encoded = cv2.imencode(".png", image)
+        self.assertTrue(ok)
+        return encoded.tobytes()
+
+    def test_frame_features_match_disk_features(self):
+        data = self._encoded_image()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "frame.png"
+            path.write_bytes(data)
+            from_disk = extract_features(str(path))
+
+        from_frame = extract_features(CameraFrame.from_bytes(data))
+
+        self.assertEqual(from_disk, from_frame)
+
+    def test_frame_tensor_matches_disk_tensor(self):
+        data = self._encoded_image()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "frame.png"
+            path.write_bytes(data)
+            from_disk = infer._prepare_tensor(str(path))
+
+        from_frame = infer._prepare_tensor(CameraFrame.from_bytes(data))
+
+        self.assertTrue(torch.equal(from_disk, from_frame))
+
+    def test_undecodable_bytes_are_rejected(self):
+        with self.assertRaises(ValueError):
+            CameraFrame.from_bytes(b"not an image")
+
+
+class TemporalStreamingTests(unittest.TestCase):
+    def setUp(self):
+        torch.manual_seed(3)
+        self.original_model = temporal_infer._model
+        self.original_resync = temporal_infer.TEMPORAL_RESYNC_STEPS
+        temporal_infer._model = temporal_infer.TemporalLSTM().eval()
+        temporal_infer.reset_temporal_stream()
+
+    def tearDown(self):
+        temporal_infer._model = self.original_model
+        temporal_infer.TEMPORAL_RESYNC_STEPS = self.original_resync
+        temporal_infer.reset_temporal_stream()
+
+    def test_streaming_steps_match_full_history_replay(self):
+        temporal_infer.TEMPORAL_RESYNC_STEPS = 100
+        frames = np.random.default_rng(5).random((14, 5), dtype=np.float32)
+
+        first = temporal_infer.temporal_predict_streaming("cam", frames[:10])
+        self.assertAlmostEqual(first, temporal_infer.temporal_predict(frames[:10]), places=5)
+
+        for end in range(11, 15):
+            streamed = temporal_infer.temporal_predict_streaming("cam", frames[end - 10:end])
+            # Between resyncs the cached state covers every frame since the last resync.
+            self.assertAlmostEqual(streamed, temporal_infer.temporal_predict(frames[:end]), places=5)
+
+    def test_resync_replays_the_window(self):
+        temporal_infer.TEMPORAL_RESYNC_STEPS = 1
+        frames = np.random.default_rng(6).random((12, 5), dtype=np.float32)
+
+        temporal_infer.temporal_predict_streaming("cam", frames[:10])
+        temporal_infer.temporal_predict_streaming("cam", frames[1:11])
+        resynced = temporal_infer.temporal_predict_streaming("cam", frames[2:12])
+
+        self.assertAlmostEqual(resynced, temporal_infer.temporal_predict(frames[2:12]), places=5)
+
+    def test_concurrent_frames_from_one_camera_step_once_each_in_order(self):
+        temporal_infer.TEMPORAL_RESYNC_STEPS = 100
+        frames = np.random.default_rng(7).random((18, 5), dtype=np.float32)
+        temporal_infer.temporal_predict_streaming("cam", frames[:10])
+        window = list(frames[:10])
+        pending = iter(frames[10:])
+        step = temporal_infer._model.forward_with_state
+
+        def slow_step(x, state=None):
+            time.sleep(0.01)
+            return step(x, state)
+
+        def on_frame():
+            # Same order as the analysis stage: append, read window, step.
+            with temporal_infer.temporal_stream_lock("cam"):
+                window.append(next(pending))
+                temporal_infer.temporal_predict_streaming("cam", np.array(window[-10:]))
+
+        with patch.object(temporal_infer._model, "forward_with_state", slow_step):
+            threads = [threading.Thread(target=on_frame) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(temporal_infer._stream_states["cam"]["steps"], 8)
+        streamed = temporal_infer._model.fc(temporal_infer._stream_states["cam"]["state"][0][-1])
+        replayed = temporal_infer._model(torch.from_numpy(frames).unsqueeze(0))
+        self.assertTrue(torch.allclose(streamed, replayed, atol=1e-5))
+
+    def test_cameras_get_separate_stream_locks(self):
+        self.assertIs(temporal_infer.temporal_stream_lock("cam-a"), temporal_infer.temporal_stream_lock("cam-a"))
+        self.assertIsNot(temporal_infer.temporal_stream_lock("cam-a"), temporal_infer.temporal_stream_lock("cam-b"))
+
+
+if __name__ == "__main__":
+    unittest.main()
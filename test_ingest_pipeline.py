@@ -0,0 +1,69 @@
+import queue
+import unittest
+from unittest.mock import patch
+
+from fastapi import HTTPException
+
+import app.services.ingest_pipeline as ingest_pipeline
+
+
+class IngestPipelineTests(unittest.TestCase):
+    def setUp(self):
+        self.state = patch.dict(ingest_pipeline._state, {
+            "in_flight": 0,
+            "accepted": 0,
+            "rejected": 0,
+            "background_completed": 0,
+            "background_failed": 0,
+            "last_background_error": None,
+        })
+        self.state.start()
+        # Workers are not started, so submitted jobs stay queued.
+        self.queue = patch.object(ingest_pipeline, "_background_queue", queue.Queue())
+        self.queue.start()
+
+    def tearDown(self):
+        self.queue.stop()
+        self.state.stop()
+
+    def test_admission_rejects_with_503_when_frames_are_in_flight(self):
+        with patch.object(ingest_pipeline, "INGEST_MAX_PENDING", 1):
+            with ingest_pipeline.ingest_admission():
+                with self.assertRaises(HTTPException) as ctx:
+                    with ingest_pipeline.ingest_admission():
+                        pass
+
+        self.assertEqual(ctx.exception.status_code, 503)
+        self.assertEqual(ctx.exception.headers, {"Retry-After": "1"})
+        metrics = ingest_pipeline.get_ingest_metrics()
+        self.assertEqual((metrics["accepted"], metrics["rejected"], metrics["in_flight"]), (1, 1, 0))
+        self.assertIsNotNone(metrics["last_ingest_ms"])
+
+    def test_queued_background_jobs_count_against_admission(self):
+        with patch.object(ingest_pipeline, "INGEST_MAX_PENDING", 2):
+            ingest_pipeline.submit_background(print)
+            with ingest_pipeline.ingest_admission():
+                ingest_pipeline.submit_background(print)
+            with self.assertRaises(HTTPException):
+                with ingest_pipeline.ingest_admission():
+                    pass
+
+        metrics = ingest_pipeline.get_ingest_metrics()
+        self.assertEqual(metrics["queue_depth"], 2)
+        self.assertEqual(metrics["rejected"], 1)
+
+    def test_background_outcomes_are_counted(self):
+        def fail():
+            raise RuntimeError("mongo down")
+
+        ingest_pipeline._run_background_job(lambda: None, (), {})
+        ingest_pipeline._run_background_job(fail, (), {})
+
+        metrics = ingest_pipeline.get_ingest_metrics()
+        self.assertEqual(metrics["background_completed"], 1)
+        self.assertEqual(metrics["background_failed"], 1)
+        self.assertIn("mongo down", metrics["last_background_error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+import numpy as np
+
+from app.utils.location_stats import LocationStats, location_key
+from app.utils.safezone_detector import filter_stable
+
+
+class LocationStatsTests(unittest.TestCase):
+    def test_mean_is_exact_until_window_then_exponential(self):
+        stats = LocationStats(window=3, capacity=1)
+        for value in (0.3, 0.2, 0.1):
+            stats.record(19.0760, 72.8777, value)
+
+        self.assertAlmostEqual(stats.lookup(19.0760, 72.8777)["mean"], 0.2)
+
+        stats.record(19.0760, 72.8777, 0.6)
+        cell = stats.lookup(19.07601, 72.87771)
+        self.assertAlmostEqual(cell["mean"], 0.2 + (0.6 - 0.2) * 0.5)
+        self.assertEqual((cell["count"], cell["last"]), (4, 0.6))
+
+    def test_arrays_grow_past_initial_capacity(self):
+        stats = LocationStats(window=3, capacity=2)
+        for index in range(5):
+            stats.record(19.0 + index / 100, 72.8, 0.1 * index)
+
+        self.assertEqual(len(stats), 5)
+        self.assertEqual(stats.lookup(19.04, 72.8)["last"], 0.4)
+        self.assertEqual(len(stats.latest_points()), 5)
+
+    def test_filter_stable_uses_count_and_last_against_mean(self):
+        stats = LocationStats(window=10)
+        settling = {"lat": 19.0760, "lng": 72.8777, "risk_score": 0.2}
+        rising = {"lat": 19.0780, "lng": 72.8800, "risk_score": 0.4}
+        sparse = {"lat": 19.0800, "lng": 72.8900, "risk_score": 0.1}
+        for value in (0.30, 0.28, 0.25, 0.22):
+            stats.record(settling["lat"], settling["lng"], value)
+        for value in (0.20, 0.25, 0.30, 0.40):
+            stats.record(rising["lat"], rising["lng"], value)
+        stats.record(sparse["lat"], sparse["lng"], 0.1)
+
+        self.assertEqual(filter_stable([settling, rising, sparse], stats, window=3), [settling])
+        np.testing.assert_array_equal(
+            stats.stable_mask([19.0760, 19.5], [72.8777, 72.5], 3), [True, False]
+        )
+
+    def test_location_key_matches_rounded_cell(self):
+        self.assertEqual(location_key(19.07601, 72.87771), "19.076_72.8777")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+
+from app.services.map_tiles import (
+    TILE_GRID,
+    bbox_filter,
+    parse_bbox,
+    tile_bounds,
+    tile_pipeline,
+)
+
+
+class MapTileTests(unittest.TestCase):
+    def test_tile_bounds_follow_xyz_scheme(self):
+        west, south, east, north = tile_bounds(0, 0, 0)
+        self.assertEqual((west, east), (-180, 180))
+        self.assertAlmostEqual(north, 85.0511, places=4)
+        self.assertAlmostEqual(south, -85.0511, places=4)
+
+        # Mumbai sits in tile 12/2876/1826.
+        west, south, east, north = tile_bounds(12, 2876, 1826)
+        self.assertTrue(west <= 72.85 < east and south <= 19.07 < north)
+
+    def test_invalid_tiles_are_rejected(self):
+        for z, x, y in ((-1, 0, 0), (2, 4, 0), (2, 0, -1), (19, 0, 0)):
+            with self.assertRaises(ValueError):
+                tile_bounds(z, x, y)
+
+    def test_parse_bbox_rejects_malformed_boxes(self):
+        self.assertEqual(parse_bbox("72.8,19.0,73,19.2"), (72.8, 19.0, 73.0, 19.2))
+        for raw in ("72.8,19.0,73", "a,b,c,d", "73,19.0,72.8,19.2", "72.8,19.0,73,91"):
+            with self.assertRaises(ValueError):
+                parse_bbox(raw)
+
+    def test_bbox_filter_uses_geo_index_for_small_boxes_only(self):
+        small = bbox_filter((72.8, 19.0, 73.0, 19.2))
+        self.assertEqual(small["lat"], {"$gte": 19.0, "$lte": 19.2})
+        ring = small["location"]["$geoWithin"]["$geometry"]["coordinates"][0]
+        self.assertEqual(ring[0], ring[-1])
+
+        world = bbox_filter(tile_bounds(0, 0, 0))
+        self.assertNotIn("location", world)
+        self.assertIn("lng", world)
+
+    def test_pipeline_groups_into_grid_cells(self):
+        pipeline = tile_pipeline("live-risk", tile_bounds(12, 2876, 1826))
+        group = pipeline[1]["$group"]
+        self.assertEqual(set(group["_id"]), {"x", "y"})
+        self.assertEqual(group["max_risk"], {"$max": "$risk_score"})
+        self.assertEqual(group["_id"]["x"]["$min"][0], TILE_GRID - 1)
+        self.assertIn("timestamp", pipeline[0]["$match"])
+
+        group = tile_pipeline("historical-events", tile_bounds(0, 0, 0))[1]["$group"]
+        self.assertNotIn("max_risk", group)
+
+
+if __name__ == "__main__":
+    unittest.main()
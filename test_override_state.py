@@ -0,0 +1,100 @@
+import threading
+import unittest
+from unittest.mock import patch
+
+from pymongo.errors import OperationFailure
+
+import app.services.override_state as override_state
+
+
+class FakeStream:
+    def __init__(self, changes, stop_event):
+        self.changes = list(changes)
+        self.stop_event = stop_event
+        self.alive = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def try_next(self):
+        if self.changes:
+            return self.changes.pop(0)()
+        self.stop_event.set()
+        return None
+
+
+class FakeOverrides:
+    def __init__(self):
+        self.active = None
+        self.finds = 0
+        self.stream = None
+
+    def find_one(self, query, sort):
+        self.finds += 1
+        return self.active
+
+    def watch(self, max_await_time_ms):
+        if self.stream is None:
+            raise OperationFailure("The $changeStream stage is only supported on replica sets")
+        return self.stream
+
+
+class OverrideStateTests(unittest.TestCase):
+    def setUp(self):
+        self.overrides = FakeOverrides()
+        patches = [
+            patch.object(override_state, "overrides_collection", self.overrides),
+            patch.dict(override_state._state, {"override": None, "loaded_at": None, "watching": False}),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_cache_reloads_after_ttl(self):
+        self.assertIsNone(override_state.current_override())
+        self.overrides.active = {"risk_level": "IMMINENT"}
+
+        # Set by another worker: not visible until the TTL passes.
+        self.assertIsNone(override_state.current_override())
+        override_state._state["loaded_at"] -= override_state.OVERRIDE_CACHE_TTL_SECONDS
+
+        self.assertEqual(override_state.current_override(), {"risk_level": "IMMINENT"})
+        self.assertEqual(self.overrides.finds, 2)
+
+    def test_without_change_streams_the_ttl_path_stays_in_charge(self):
+        override_state.watch_override_changes(threading.Event())
+
+        self.assertFalse(override_state._state["watching"])
+        override_state.current_override()
+        override_state._state["loaded_at"] -= override_state.OVERRIDE_CACHE_TTL_SECONDS
+        override_state.current_override()
+        self.assertEqual(self.overrides.finds, 2)
+
+    def test_change_stream_refreshes_and_skips_ttl_reloads_while_watching(self):
+        stop_event = threading.Event()
+        seen_while_watching = []
+
+        def change():
+            self.overrides.active = {"risk_level": "WARNING"}
+            # Long past the TTL, but the stream keeps the cache current.
+            override_state._state["loaded_at"] -= 10 * override_state.OVERRIDE_CACHE_TTL_SECONDS
+            finds = self.overrides.finds
+            seen_while_watching.append(override_state.current_override())
+            self.assertEqual(self.overrides.finds, finds)
+            return {"operationType": "insert"}
+
+        self.overrides.stream = FakeStream([change], stop_event)
+        override_state.watch_override_changes(stop_event)
+
+        # The stale value was served from cache; the change event then reloaded it.
+        self.assertEqual(seen_while_watching, [None])
+        self.assertEqual(override_state._state["override"], {"risk_level": "WARNING"})
+        # Once the watcher exits, TTL reloads take over again.
+        self.assertFalse(override_state._state["watching"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import app.routes.dashboard as dashboard
+import app.services.prediction_rollups as prediction_rollups
+
+
+class FakeCursor(list):
+    def sort(self, field, direction):
+        return FakeCursor(sorted(self, key=lambda doc: doc[field], reverse=direction < 0))
+
+
+def _set_path(doc, path, fn):
+    *parents, leaf = path.split(".")
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    doc[leaf] = fn(doc.get(leaf))
+
+
+class FakeRollups:
+    """
+    Applies the update operators record_prediction_rollup uses.
+    """
+
+    def __init__(self):
+        self.docs = []
+
+    def update_one(self, query, update, upsert=False):
+        doc = next((d for d in self.docs if all(d.get(k) == v for k, v in query.items())), None)
+        if doc is None:
+            assert upsert
+            doc = dict(query, **update.get("$setOnInsert", {}))
+            self.docs.append(doc)
+        for path, step in update.get("$inc", {}).items():
+            _set_path(doc, path, lambda old: (old or 0) + step)
+        for path, value in update.get("$min", {}).items():
+            _set_path(doc, path, lambda old: value if old is None else min(old, value))
+        for path, value in update.get("$max", {}).items():
+            _set_path(doc, path, lambda old: value if old is None else max(old, value))
+        for path, value in update.get("$set", {}).items():
+            _set_path(doc, path, lambda old: value)
+
+    def find(self, query, projection=None):
+        return FakeCursor(
+            doc for doc in self.docs
+            if doc["resolution"] == query["resolution"]
+            and doc["bucket_start"] >= query["bucket_start"]["$gte"]
+        )
+
+
+def prediction(timestamp, risk, level, eta="> 60 min"):
+    return {
+        "timestamp": timestamp,
+        "risk_score": risk,
+        "ensemble_score": risk,
+        "confidence": 0.9,
+        "risk_level": level,
+        "alert_severity": "INFO",
+        "eta": eta,
+    }
+
+
+class PredictionRollupTests(unittest.TestCase):
+    def setUp(self):
+        self.rollups = FakeRollups()
+        patcher = patch.object(prediction_rollups, "prediction_rollups_collection", self.rollups)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.hour = datetime(2026, 6, 1, 10, 0)
+
+    def buckets(self, resolution):
+        return sorted(
+            (doc for doc in self.rollups.docs if doc["resolution"] == resolution),
+            key=lambda doc: doc["bucket_start"],
+        )
+
+    def test_predictions_fold_into_minute_and_hour_buckets(self):
+        for seconds, risk, level in ((0, 0.2, "SAFE"), (59.999, 0.6, "WATCH"), (60, 0.4, "SAFE")):
+            prediction_rollups.record_prediction_rollup(
+                prediction(self.hour + timedelta(seconds=seconds), risk, level)
+            )
+
+        minutes = self.buckets("minute")
+        hours = self.buckets("hour")
+
+        self.assertEqual([b["bucket_start"] for b in minutes], [self.hour, self.hour + timedelta(minutes=1)])
+        self.assertEqual([b["count"] for b in minutes], [2, 1])
+        self.assertEqual(minutes[0]["risk_score"], {"sum": 0.8, "n": 2, "min": 0.2, "max": 0.6})
+        self.assertEqual(minutes[0]["levels"], {"SAFE": 1, "WATCH": 1})
+        self.assertEqual(len(hours), 1)
+        self.assertEqual((hours[0]["count"], hours[0]["risk_score"]["max"]), (3, 0.6))
+
+    def test_buckets_expire_after_their_retention(self):
+        prediction_rollups.record_prediction_rollup(prediction(self.hour + timedelta(minutes=5, seconds=30), 0.1, "SAFE"))
+        minute, hour = self.buckets("minute")[0], self.buckets("hour")[0]
+
+        self.assertEqual(
+            minute["expires_at"],
+            self.hour + timedelta(minutes=6) + prediction_rollups.ROLLUP_RETENTION["minute"],
+        )
+        self.assertEqual(
+            hour["expires_at"],
+            self.hour + timedelta(hours=1) + prediction_rollups.ROLLUP_RETENTION["hour"],
+        )
+
+    def test_series_resolves_means_and_modes(self):
+        prediction_rollups.record_prediction_rollup(prediction(self.hour, 0.2, "SAFE", eta="> 60 min"))
+        prediction_rollups.record_prediction_rollup(prediction(self.hour, 0.6, "WATCH", eta="10–30 min"))
+        prediction_rollups.record_prediction_rollup(prediction(self.hour, 0.7, "WATCH", eta="10–30 min"))
+        prediction_rollups.record_prediction_rollup({"timestamp": self.hour - timedelta(minutes=1)})
+
+        series = prediction_rollups.rollup_series("minute", self.hour + timedelta(seconds=30))
+
+        self.assertEqual(len(series), 1)
+        bucket = series[0]
+        self.assertEqual(bucket["time"], self.hour)
+        self.assertEqual(bucket["risk_score"], {"mean": 0.5, "min": 0.2, "max": 0.7})
+        self.assertEqual((bucket["risk_level"], bucket["alert_severity"]), ("WATCH", "INFO"))
+        self.assertEqual(bucket["eta"], "10–30 min")
+
+    def test_timeseries_endpoints_read_rollups_for_minute_and_hour(self):
+        prediction_rollups.record_prediction_rollup(prediction(datetime.now(), 0.4, "WATCH"))
+        prediction_rollups.record_prediction_rollup({"timestamp": datetime.now() - timedelta(minutes=2)})
+
+        self.assertEqual([b["count"] for b in dashboard.risk_timeseries(minutes=10, resolution="minute")], [1, 1])
+        for resolution in ("minute", "hour"):
+            risk = dashboard.risk_timeseries(minutes=10, resolution=resolution)
+            self.assertEqual((risk[-1]["risk"], risk[-1]["level"]), (0.4, "WATCH"))
+            # Buckets without confidence or ETA are left out.
+            self.assertEqual(len(dashboard.confidence_timeseries(minutes=10, resolution=resolution)), 1)
+            self.assertEqual(dashboard.eta_timeseries(minutes=10, resolution=resolution)[0]["eta"], "> 60 min")
+
+
+if __name__ == "__main__":
+    unittest.main()
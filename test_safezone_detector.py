@@ -0,0 +1,127 @@
+import unittest
+from math import atan2, cos, radians, sin, sqrt
+
+import numpy as np
+
+from app.utils.safezone_detector import (
+    cluster_safezones,
+    dbscan,
+    filter_historical,
+    METERS_PER_DEGREE_LAT,
+    haversine,
+    radius_pairs,
+    rank_safezones,
+)
+
+
+def scalar_haversine(lat1, lon1, lat2, lon2):
+    phi1, phi2 = radians(lat1), radians(lat2)
+    a = sin((phi2 - phi1) / 2) ** 2 + cos(phi1) * cos(phi2) * sin(radians(lon2 - lon1) / 2) ** 2
+    return 2 * 6371000 * atan2(sqrt(a), sqrt(1 - a))
+
+
+def brute_force_dbscan(lats, lngs, eps_m, min_samples):
+    distances = haversine(lats[:, None], lngs[:, None], lats[None, :], lngs[None, :])
+    neighbours = distances < eps_m
+    core = neighbours.sum(axis=1) >= min_samples
+    labels = np.full(lats.size, -1)
+    cluster = 0
+    for seed in range(lats.size):
+        if not core[seed] or labels[seed] >= 0:
+            continue
+        labels[seed] = cluster
+        stack = [seed]
+        while stack:
+            point = stack.pop()
+            for other in np.flatnonzero(neighbours[point]):
+                if labels[other] < 0:
+                    labels[other] = cluster
+                    if core[other]:
+                        stack.append(other)
+        cluster += 1
+    return labels, core
+
+
+class SafezoneDetectorTests(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.lats = 19.0 + rng.random(1500) * 0.12
+        self.lngs = 72.8 + rng.random(1500) * 0.12
+
+    def test_batch_haversine_matches_scalar_formula(self):
+        expected = [
+            scalar_haversine(19.0, 72.8, lat, lng)
+            for lat, lng in zip(self.lats[:20], self.lngs[:20])
+        ]
+
+        np.testing.assert_allclose(haversine(19.0, 72.8, self.lats[:20], self.lngs[:20]), expected, rtol=1e-9)
+
+    def test_radius_pairs_match_brute_force(self):
+        distances = haversine(self.lats[:, None], self.lngs[:, None], self.lats[None, :], self.lngs[None, :])
+        expected = set(zip(*np.nonzero(np.triu(distances < 300, k=1))))
+
+        i, j, d = radius_pairs(self.lats, self.lngs, self.lats, self.lngs, 300, upper_only=True)
+
+        self.assertEqual(set(zip(i.tolist(), j.tolist())), {(a.item(), b.item()) for a, b in expected})
+        np.testing.assert_allclose(d, distances[i, j], atol=1e-6)
+
+    def test_dbscan_matches_brute_force(self):
+        for min_samples in (1, 3):
+            labels = dbscan(self.lats, self.lngs, 300, min_samples)
+            expected, core = brute_force_dbscan(self.lats, self.lngs, 300, min_samples)
+
+            np.testing.assert_array_equal(labels < 0, expected < 0)
+            # Same partition of core points (border points may join
+            # either neighbouring cluster).
+            pairs = set(zip(labels[core].tolist(), expected[core].tolist()))
+            self.assertEqual(len(pairs), expected.max() + 1)
+            self.assertEqual(labels.max(), expected.max())
+
+    def test_filter_historical_drops_points_near_past_events(self):
+        points = [
+            {"lat": 19.0760, "lng": 72.8777, "risk_score": 0.2},
+            {"lat": 19.0700, "lng": 72.8700, "risk_score": 0.3},
+        ]
+
+        kept = filter_historical(points, [{"lat": 19.0705, "lng": 72.8710}])
+
+        self.assertEqual(kept, points[:1])
+
+    def test_clusters_are_ranked_into_zones(self):
+        points = [
+            {"lat": 19.0760, "lng": 72.8777, "risk_score": 0.2},
+            {"lat": 19.0765, "lng": 72.8780, "risk_score": 0.3},
+            {"lat": 19.0900, "lng": 72.9000, "risk_score": 0.1},
+        ]
+
+        zones = rank_safezones(cluster_safezones(points, min_samples=1))
+
+        self.assertEqual([zone["id"] for zone in zones], ["SZ-1", "SZ-2"])
+        self.assertEqual(zones[0]["safety_score"], 0.75)
+        self.assertEqual(zones[1]["confidence_level"], "HIGH")
+        self.assertGreaterEqual(zones[0]["radius"], 300)
+        # By default a lone low-risk cell is noise, not a zone.
+        self.assertEqual(len(cluster_safezones(points)), 0)
+
+    def test_chained_points_are_split_into_capped_zones(self):
+        # A 10 km line of cells 200 m apart: DBSCAN links it into one cluster.
+        step = 200 / METERS_PER_DEGREE_LAT
+        points = [
+            {"lat": 19.0 + i * step, "lng": 72.85, "risk_score": 0.2}
+            for i in range(51)
+        ]
+        lats = np.array([p["lat"] for p in points])
+        self.assertEqual(dbscan(lats, np.full(lats.size, 72.85), 300, 3).max(), 0)
+
+        zones = cluster_safezones(points, max_radius=1000)
+
+        self.assertGreater(len(zones), 1)
+        self.assertTrue(all(zone["radius"] <= 1000 for zone in zones))
+        self.assertEqual(sorted(p["lat"] for z in zones for p in z["points"]), [p["lat"] for p in points])
+        for zone in zones:
+            for p in zone["points"]:
+                self.assertLessEqual(haversine(zone["lat"], zone["lng"], p["lat"], p["lng"]), zone["radius"] + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
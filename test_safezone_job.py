@@ -0,0 +1,235 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from pymongo import UpdateOne
+
+import app.routes.safezones as safezone_routes
+import app.services.safezone_job as safezone_job
+from app.database import geo_point
+from app.services.safezone_job import SAFEZONE_TTL, assign_zone_ids, plan_safezone_writes
+from app.services.snapshot_cache import TtlSingleFlight
+
+
+def zone(lat, lng, score=0.75, radius=300):
+    return {
+        "id": "SZ-1",
+        "lat": lat,
+        "lng": lng,
+        "radius": radius,
+        "confidence_score": score,
+        "confidence_level": "MEDIUM",
+        "reason": "Low historical risk and stable conditions",
+    }
+
+
+def upsert(detected, now):
+    fields = {field: detected[field] for field in ("lat", "lng", "radius", "confidence_score", "confidence_level", "reason")}
+    return UpdateOne(
+        {"zone_id": detected["id"]},
+        {"$set": {
+            **fields,
+            "location": geo_point(detected["lat"], detected["lng"]),
+            "last_verified": now,
+            "expires_at": now + SAFEZONE_TTL,
+            "source": "AUTO",
+            "active": True,
+        }},
+        upsert=True,
+    )
+
+
+def stored(zone_id, detected, expires_at):
+    doc = {field: detected[field] for field in ("lat", "lng", "radius", "confidence_score", "confidence_level", "reason")}
+    return {**doc, "zone_id": zone_id, "expires_at": expires_at}
+
+
+def matches(doc, query):
+    for key, expected in query.items():
+        if key == "$or":
+            if not any(matches(doc, branch) for branch in expected):
+                return False
+        elif isinstance(expected, dict):
+            if doc.get(key) is None or not doc[key] > expected["$gt"]:
+                return False
+        elif doc.get(key) != expected:
+            return False
+    return True
+
+
+class FakeUpdateResult:
+    def __init__(self, matched_count):
+        self.matched_count = matched_count
+
+
+class FakeSafezones:
+    """
+    Stores zone documents and records every bulk_write call.
+    """
+
+    def __init__(self, docs=()):
+        self.docs = [dict(doc) for doc in docs]
+        self.bulk_writes = []
+
+    def find(self, query, projection):
+        included = {field for field, flag in projection.items() if flag and field != "_id"}
+        excluded = {field for field, flag in projection.items() if not flag}
+        return [
+            {k: v for k, v in doc.items() if (k in included if included else k not in excluded)}
+            for doc in self.docs
+            if matches(doc, query)
+        ]
+
+    def insert_one(self, doc):
+        self.docs.append(dict(doc))
+
+    def update_one(self, query, update):
+        doc = next((d for d in self.docs if matches(d, query)), None)
+        if doc is not None:
+            doc.update(update["$set"])
+        return FakeUpdateResult(0 if doc is None else 1)
+
+    def bulk_write(self, ops, ordered=True):
+        self.bulk_writes.append((list(ops), ordered))
+
+
+class FixedClock(datetime):
+    current = datetime(2026, 6, 1, 10, 0)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+class SafezoneJobTests(unittest.TestCase):
+    def test_overlapping_zone_keeps_its_id(self):
+        existing = [stored("SZ-KEEP", zone(19.0760, 72.8777), datetime.now())]
+        zones = [zone(19.0765, 72.8780), zone(19.2000, 72.9500)]
+
+        assign_zone_ids(zones, existing)
+
+        self.assertEqual(zones[0]["id"], "SZ-KEEP")
+        self.assertNotEqual(zones[1]["id"], "SZ-KEEP")
+        self.assertTrue(zones[1]["id"].startswith("SZ-"))
+
+    def test_only_the_diff_is_written(self):
+        now = datetime.now()
+        fresh = now + SAFEZONE_TTL
+        same = zone(19.0760, 72.8777)
+        moved = zone(19.0800, 72.8800)
+        ageing = zone(19.0900, 72.8900)
+        existing = [
+            stored("SZ-SAME", same, fresh),
+            stored("SZ-MOVED", zone(19.0801, 72.8800), fresh),
+            stored("SZ-AGEING", ageing, now + timedelta(minutes=5)),
+            stored("SZ-GONE", zone(19.1000, 72.9000), fresh),
+        ]
+        for zone_id, detected in (("SZ-SAME", same), ("SZ-MOVED", moved), ("SZ-AGEING", ageing)):
+            detected["id"] = zone_id
+        new = zone(19.1500, 72.9500)
+        new["id"] = "SZ-NEW"
+
+        ops, counts = plan_safezone_writes([same, moved, ageing, new], existing, now)
+
+        self.assertEqual(counts, {"upserted": 2, "extended": 1, "deactivated": 1, "unchanged": 1})
+        self.assertEqual(ops, [
+            upsert(moved, now),
+            UpdateOne({"zone_id": "SZ-AGEING"}, {"$set": {"last_verified": now, "expires_at": fresh}}),
+            upsert(new, now),
+            UpdateOne({"zone_id": "SZ-GONE", "source": "AUTO"}, {"$set": {"active": False, "last_verified": now}}),
+        ])
+
+    def refresh(self, detected, stored_zones):
+        now = FixedClock.current
+        collection = FakeSafezones(
+            {**stored(zone_id, z, now + SAFEZONE_TTL), "source": "AUTO", "active": True}
+            for zone_id, z in stored_zones
+        )
+        cache = TtlSingleFlight(60)
+        cache.get("active", lambda: "cached")
+        with patch.object(safezone_job, "datetime", FixedClock), \
+                patch.object(safezone_job, "_zone_cache", cache), \
+                patch.object(safezone_job, "detect_safezones", lambda: [dict(z) for z in detected]), \
+                patch.dict(safezone_job._state):
+            counts = safezone_job.refresh_safezones(collection)
+        return counts, collection.bulk_writes, cache.get("active", lambda: "reloaded")
+
+    def test_refresh_writes_changes_in_one_unordered_bulk_write(self):
+        same = zone(19.0760, 72.8777)
+
+        counts, bulk_writes, cached = self.refresh([same], [("SZ-SAME", same), ("SZ-GONE", zone(19.1000, 72.9000))])
+
+        self.assertEqual((counts["unchanged"], counts["deactivated"]), (1, 1))
+        self.assertEqual(bulk_writes, [([
+            UpdateOne({"zone_id": "SZ-GONE", "source": "AUTO"}, {"$set": {"active": False, "last_verified": FixedClock.current}}),
+        ], False)])
+        self.assertEqual(cached, "reloaded")
+
+    def test_unchanged_refresh_writes_nothing_and_keeps_the_cache(self):
+        same = zone(19.0760, 72.8777)
+
+        counts, bulk_writes, cached = self.refresh([same], [("SZ-SAME", same)])
+
+        self.assertEqual(counts["unchanged"], 1)
+        self.assertEqual(bulk_writes, [])
+        self.assertEqual(cached, "cached")
+
+
+class ActiveSafezoneCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.collection = FakeSafezones([
+            {**stored("SZ-AUTO", zone(19.0760, 72.8777), datetime.now() + SAFEZONE_TTL), "source": "AUTO", "active": True},
+        ])
+        self.loads = 0
+        load = safezone_job._load_active_safezones
+
+        def counted_load():
+            self.loads += 1
+            return load()
+
+        for p in (
+            patch.object(safezone_job, "safezones_collection", self.collection),
+            patch.object(safezone_routes, "safezones_collection", self.collection),
+            patch.object(safezone_job, "_zone_cache", TtlSingleFlight(60)),
+            patch.object(safezone_job, "_load_active_safezones", counted_load),
+        ):
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_safe_zones_endpoint_answers_304_for_a_known_etag(self):
+        from app.main import app
+
+        client = TestClient(app)
+        first = client.get("/map/safe-zones")
+        repeat = client.get("/map/safe-zones", headers={"If-None-Match": first.headers["etag"]})
+
+        self.assertEqual([z["zone_id"] for z in first.json()], ["SZ-AUTO"])
+        self.assertEqual(repeat.status_code, 304)
+        self.assertEqual(repeat.headers["etag"], first.headers["etag"])
+        self.assertEqual(self.loads, 1)
+
+    def test_manual_add_and_disable_invalidate_the_cache(self):
+        before = safezone_job.cached_active_safezones()
+
+        added = safezone_routes.add_manual_safezone(safezone_routes.AddManualSafeZoneRequest(
+            lat=19.08, lng=72.88, reason="Relief camp", author="ops",
+        ))
+        after_add = safezone_job.cached_active_safezones()
+
+        self.assertEqual([z["zone_id"] for z in after_add["zones"]], [added["zone_id"], "SZ-AUTO"])
+        self.assertNotEqual(after_add["etag"], before["etag"])
+
+        missing = safezone_routes.disable_manual_safezone(safezone_routes.DisableSafeZoneRequest(zone_id="MZ-0"))
+        self.assertEqual(missing["status"], "not_found")
+        self.assertIs(safezone_job.cached_active_safezones(), after_add)
+
+        safezone_routes.disable_manual_safezone(safezone_routes.DisableSafeZoneRequest(zone_id=added["zone_id"]))
+        after_disable = safezone_job.cached_active_safezones()
+
+        self.assertEqual(after_disable["etag"], before["etag"])
+        self.assertEqual(self.loads, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
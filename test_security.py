@@ -20,6 +20,8 @@ def _settings(**overrides):
         "max_upload_bytes": 1024 * 1024,
         "camera_upload_dir": Path("app/uploads"),
         "citizen_upload_dir": Path("app/uploads/citizen"),
+        "persist_camera_frames": True,
+        "audit_query_plans": False,
         "enable_debug_endpoints": True,
         "enable_test_alert_endpoints": True,
         "authority_username": "authority",
@@ -0,0 +1,65 @@
+import threading
+import time
+import unittest
+
+from app.services.snapshot_cache import TtlSingleFlight
+
+
+class TtlSingleFlightTests(unittest.TestCase):
+    def test_concurrent_misses_share_one_build(self):
+        cache = TtlSingleFlight(ttl_seconds=5)
+        builds = []
+
+        def builder():
+            builds.append(1)
+            time.sleep(0.1)
+            return {"value": len(builds)}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get("snapshot", builder)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(builds), 1)
+        self.assertEqual(results, [{"value": 1}] * 8)
+        self.assertEqual(cache.stats()["hits"], 7)
+
+    def test_value_is_rebuilt_after_ttl(self):
+        cache = TtlSingleFlight(ttl_seconds=0.05)
+        counter = iter(range(10))
+
+        first = cache.get("key", lambda: next(counter))
+        self.assertEqual(cache.get("key", lambda: next(counter)), first)
+        time.sleep(0.06)
+
+        self.assertEqual(cache.get("key", lambda: next(counter)), first + 1)
+
+    def test_failed_build_is_not_cached(self):
+        cache = TtlSingleFlight(ttl_seconds=5)
+
+        def failing():
+            raise RuntimeError("mongo down")
+
+        with self.assertRaises(RuntimeError):
+            cache.get("key", failing)
+
+        self.assertEqual(cache.get("key", lambda: "ok"), "ok")
+        self.assertEqual(cache.stats()["errors"], 1)
+
+    def test_max_entries_evicts_oldest(self):
+        cache = TtlSingleFlight(ttl_seconds=5, max_entries=2)
+        for key in ("a", "b", "c"):
+            cache.get(key, lambda key=key: key.upper())
+
+        self.assertEqual(cache.stats()["keys"], 2)
+        self.assertEqual(cache.get("a", lambda: "rebuilt"), "rebuilt")
+        self.assertEqual(cache.get("c", lambda: "rebuilt"), "C")
+
+
+if __name__ == "__main__":
+    unittest.main()
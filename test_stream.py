@@ -0,0 +1,144 @@
+import asyncio
+import json
+import time
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+import app.routes.stream as stream
+import app.services.event_hub as event_hub
+from app.auth.jwt_handler import create_access_token
+from app.main import app
+
+
+DECISION = {"final_risk_level": "WATCH", "decision_mode": "AUTOMATED"}
+HELP_REQUEST = {"request_id": "HR-1", "contact_number": "+910000000000", "lat": 19.07, "lng": 72.87}
+
+
+def bearer(role):
+    return {"authorization": f"Bearer {create_access_token({'sub': 'tester', 'role': role})}"}
+
+
+class StreamRouteTests(unittest.TestCase):
+    def setUp(self):
+        patches = [
+            patch.object(stream, "peek_decision_snapshot", lambda: ({"decision": DECISION}, False)),
+            patch.dict(event_hub._state, {"valkey_connected": False}),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def publish_events(self):
+        event_hub.publish_event("help_request", HELP_REQUEST)
+        event_hub.publish_event("alert", {"severity": "WARNING"})
+        event_hub.publish_event("decision", {"final_risk_level": "WARNING"})
+
+    def ws_events(self, query="", headers=None, count=2):
+        client = TestClient(app)
+        with client.websocket_connect(f"/stream/decisions{query}", headers=headers or {}) as ws:
+            # The initial decision is sent after the subscription exists.
+            received = [json.loads(ws.receive_text())]
+            self.publish_events()
+            received += [json.loads(ws.receive_text()) for _ in range(count - 1)]
+        return received
+
+    def sse_events(self, query="", headers=None, count=2):
+        # TestClient buffers whole responses, so the endless SSE body is
+        # read by driving the ASGI app directly.
+        async def scenario():
+            bodies = asyncio.Queue()
+            closed = asyncio.Event()
+
+            async def receive():
+                await closed.wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                if message["type"] == "http.response.body" and message.get("body"):
+                    await bodies.put(message["body"].decode())
+
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": "1.1",
+                "method": "GET",
+                "scheme": "http",
+                "path": "/stream/decisions",
+                "raw_path": b"/stream/decisions",
+                "root_path": "",
+                "query_string": query.lstrip("?").encode(),
+                "headers": [(k.encode(), v.encode()) for k, v in (headers or {}).items()],
+                "client": ("127.0.0.1", 50000),
+                "server": ("testserver", 80),
+            }
+            task = asyncio.create_task(app(scope, receive, send))
+            try:
+                frames = [await asyncio.wait_for(bodies.get(), 5)]
+                self.publish_events()
+                while len(frames) < count:
+                    frames.append(await asyncio.wait_for(bodies.get(), 5))
+            finally:
+                closed.set()
+                task.cancel()
+            return [
+                dict(line.split(": ", 1) for line in frame.strip().splitlines())
+                for frame in frames
+            ]
+
+        return asyncio.run(scenario())
+
+    def test_ws_anonymous_subscriber_does_not_get_help_requests(self):
+        events = self.ws_events()
+
+        self.assertEqual([event["type"] for event in events], ["decision", "alert"])
+        self.assertEqual(events[0]["data"], DECISION)
+
+    def test_ws_authority_subscriber_gets_help_requests(self):
+        events = self.ws_events(headers=bearer("authority"), count=3)
+
+        self.assertEqual([event["type"] for event in events], ["decision", "help_request", "alert"])
+        self.assertEqual(events[1]["data"], HELP_REQUEST)
+
+    def test_ws_token_without_authority_role_is_anonymous(self):
+        token = create_access_token({"sub": "camera", "role": "ingest"})
+
+        events = self.ws_events(query=f"?token={token}")
+
+        self.assertEqual([event["type"] for event in events], ["decision", "alert"])
+
+    def test_ws_types_filter_narrows_the_stream(self):
+        client = TestClient(app)
+        with client.websocket_connect("/stream/decisions?types=alert,help_request") as ws:
+            # No initial decision: wait until the route has subscribed.
+            deadline = time.monotonic() + 5
+            while not any(sub.types == {"alert"} for sub in list(event_hub._subscribers)):
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.01)
+            self.publish_events()
+            first = json.loads(ws.receive_text())
+
+        self.assertEqual((first["type"], first["data"]), ("alert", {"severity": "WARNING"}))
+
+    def test_sse_anonymous_subscriber_does_not_get_help_requests(self):
+        frames = self.sse_events()
+
+        self.assertEqual([frame["event"] for frame in frames], ["decision", "alert"])
+        self.assertEqual(json.loads(frames[0]["data"]), DECISION)
+
+    def test_sse_authority_subscriber_gets_help_requests(self):
+        frames = self.sse_events(headers=bearer("authority"), count=3)
+
+        self.assertEqual([frame["event"] for frame in frames], ["decision", "help_request", "alert"])
+        self.assertEqual(json.loads(frames[1]["data"]), HELP_REQUEST)
+
+    def test_sse_types_filter_narrows_the_stream(self):
+        frames = self.sse_events(query="?types=decision", headers=bearer("authority"))
+
+        self.assertEqual([frame["event"] for frame in frames], ["decision", "decision"])
+        self.assertEqual(json.loads(frames[1]["data"]), {"final_risk_level": "WARNING"})
+
+
+if __name__ == "__main__":
+    unittest.main()
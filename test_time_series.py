@@ -0,0 +1,70 @@
+import unittest
+
+import numpy as np
+
+import app.utils.time_series as time_series
+from app.utils.time_series import FeatureRing
+
+
+class FeatureRingTests(unittest.TestCase):
+    def test_latest_window_is_chronological_after_wraparound(self):
+        ring = FeatureRing(capacity=4, width=1)
+        for value in range(1, 8):
+            ring.append([value])
+
+        window = ring.latest(4)
+
+        self.assertEqual(window[:, 0].tolist(), [4.0, 5.0, 6.0, 7.0])
+        self.assertTrue(window.flags["C_CONTIGUOUS"])
+
+    def test_latest_is_limited_by_count(self):
+        ring = FeatureRing(capacity=5, width=2)
+        ring.append([1, 2])
+        ring.append([3, 4])
+
+        self.assertEqual(ring.latest(5).tolist(), [[1.0, 2.0], [3.0, 4.0]])
+
+
+class CameraHistoryTests(unittest.TestCase):
+    def setUp(self):
+        time_series._risk_windows.clear()
+        time_series._feature_rings.clear()
+
+    def tearDown(self):
+        time_series._risk_windows.clear()
+        time_series._feature_rings.clear()
+
+    def test_risk_windows_are_kept_per_camera(self):
+        for score in (0.1, 0.2, 0.3):
+            time_series.record_risk(score, camera_id="cam-a")
+        time_series.record_risk(0.9, camera_id="cam-b")
+
+        self.assertEqual(time_series.get_recent_risks(2, camera_id="cam-a"), [0.2, 0.3])
+        self.assertEqual(time_series.get_recent_risks(10, camera_id="cam-b"), [0.9])
+        self.assertEqual(time_series.get_recent_risks(10, camera_id="unknown"), [])
+
+    def test_feature_sequence_needs_a_full_window(self):
+        length = time_series.SEQUENCE_LENGTH
+        features = {"brightness": 100.0, "edge_density": 0.1, "entropy": 5.0}
+
+        for step in range(length - 1):
+            time_series.record_feature_vector(
+                time_series.feature_vector(step / 100, 0.5, features),
+                camera_id="cam-a",
+            )
+        self.assertIsNone(time_series.get_feature_sequence(camera_id="cam-a"))
+
+        time_series.record_feature_vector(
+            time_series.feature_vector(0.99, 0.5, features),
+            camera_id="cam-a",
+        )
+        sequence = time_series.get_feature_sequence(camera_id="cam-a")
+
+        self.assertEqual(sequence.shape, (length, time_series.FEATURE_VECTOR_WIDTH))
+        # Sequence steps differ (no repeated current frame) and end with the newest.
+        self.assertEqual(len(np.unique(sequence[:, 0])), length)
+        self.assertAlmostEqual(float(sequence[-1, 0]), 0.99, places=5)
+
+
+if __name__ == "__main__":
+    unittest.main()